@@ -53,8 +53,77 @@ class MSFS_ExporterProperties(bpy.types.PropertyGroup):
         description='use ASOBO Unique ID extension',
         default=True,
     )
+
+    enable_profiler: bpy.props.BoolProperty(
+        name='Profile Export',
+        description='Record the time spent in each MSFS export hook and material extension, and write a report next to the exported file',
+        default=False,
+    )
+
+    profiler_report_format: bpy.props.EnumProperty(
+        name='Report Format',
+        description='File format of the export profiling report',
+        items=(
+            ('JSON', 'JSON', 'Write the report as a JSON file'),
+            ('CSV', 'CSV', 'Write the report as a CSV file'),
+        ),
+        default='JSON',
+    )
+
+    use_texture_cache: bpy.props.BoolProperty(
+        name='Texture Cache',
+        description='Keep the encoded textures in a cache folder and reuse them in later exports when the images are unchanged',
+        default=False,
+    )
+
+    texture_cache_dir: bpy.props.StringProperty(
+        name='Cache Folder',
+        description='Folder of the texture cache. Leave empty to use the temporary folder of the system',
+        default='',
+        subtype='DIR_PATH',
+    )
+
+    texture_cache_max_size: bpy.props.IntProperty(
+        name='Max Cache Size (MB)',
+        description='Least recently used textures are removed from the cache above this size',
+        default=2048,
+        min=1,
+    )
+
+    gizmo_radius_mode: bpy.props.EnumProperty(
+        name='Collision Radius',
+        description='How the radius of the sphere and cylinder collision gizmos is computed from their scale',
+        items=(
+            ('LARGEST_SCALE', 'Largest Scale', 'The radius is the largest scale of the round axes'),
+            ('PRODUCT', 'Product of Scales (Legacy)', 'The radius is the product of the scales of the round axes, like the add-on versions up to 1.3.1'),
+        ),
+        default='LARGEST_SCALE',
+    )
+
+    # Version of the gizmo radius rule the scene was saved with, files saved before it was added are still at 0
+    gizmo_radius_version: bpy.props.IntProperty(
+        default=0,
+        options={'HIDDEN'},
+    )
     
 
+class MSFS_AddonPreferences(bpy.types.AddonPreferences):
+    bl_idname = __package__
+
+    use_shared_node_groups: bpy.props.BoolProperty(
+        name='Use Shared Node Groups',
+        description='Build the detail UV and normal map flip nodes of new MSFS material node trees in node groups shared by every material, instead of in each material',
+        default=False,
+    )
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, 'use_shared_node_groups')
+
+        # Switching only applies to the node trees built afterwards, rebuilding the existing ones is explicit
+        layout.label(text="Existing materials keep their node trees until they are rebuilt. Rebuilding discards shader node edits.", icon='INFO')
+        layout.operator("msfs.rebuild_material_node_trees")
+
 class GLTF_PT_MSFSImporterExtensionPanel(bpy.types.Panel):
     bl_space_type = 'FILE_BROWSER'
     bl_region_type = 'TOOL_PROPS'
@@ -108,6 +177,14 @@ class GLTF_PT_MSFSExporterExtensionPanel(bpy.types.Panel):
         layout.prop(props, 'enabled', text="Enabled")
         if props.enabled:
             layout.prop(props, 'use_unique_id', text="Enable ASOBO Unique ID extension")
+            layout.prop(props, 'enable_profiler')
+            if props.enable_profiler:
+                layout.prop(props, 'profiler_report_format')
+            layout.prop(props, 'use_texture_cache')
+            if props.use_texture_cache:
+                layout.prop(props, 'texture_cache_dir')
+                layout.prop(props, 'texture_cache_max_size')
+            layout.prop(props, 'gizmo_radius_mode')
 
 def recursive_module_search(path, root=""):
     for _, name, ispkg in pkgutil.iter_modules([str(path)]):
@@ -126,7 +203,7 @@ def modules():
 
 
 classes = []
-extension_classes = [MSFS_ImporterProperties, MSFS_ExporterProperties]
+extension_classes = [MSFS_ImporterProperties, MSFS_ExporterProperties, MSFS_AddonPreferences]
 extension_panels = [GLTF_PT_MSFSImporterExtensionPanel, GLTF_PT_MSFSExporterExtensionPanel]
 
 # Refresh the list of classes
@@ -232,3 +309,7 @@ class glTF2ExportUserExtension(Export):
         from io_scene_gltf2.io.com.gltf2_io_extensions import Extension
         self.Extension = Extension
         self.properties = bpy.context.scene.msfs_exporter_properties
+
+        if self.properties.enable_profiler:
+            from .io.msfs_profiler import MSFSExportProfiler
+            self.profiler = MSFSExportProfiler()
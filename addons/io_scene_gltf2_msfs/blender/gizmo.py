@@ -15,21 +15,65 @@
 import bpy
 import bgl
 import gpu
-import bmesh
 import numpy as np
+from bpy.app.handlers import persistent
 from mathutils import Matrix
-from math import radians
 from gpu_extras.batch import batch_for_shader
 
 
+# Edge vertices of the unit shape of each gizmo type, two rows per edge
+unit_shapes = {}
+
+def create_circle_edges(segments, axes):
+    # Circle of radius 1 in the plane of the two axes
+    angles = np.linspace(0, 2 * np.pi, segments, endpoint=False)
+    points = np.zeros((segments, 3), dtype=np.float32)
+    points[:, axes[0]] = np.cos(angles)
+    points[:, axes[1]] = np.sin(angles)
+    return np.stack((points, np.roll(points, -1, axis=0)), axis=1).reshape(-1, 3)
+
+def get_unit_shape(gizmo_type):
+    edges = unit_shapes.get(gizmo_type)
+    if edges is not None:
+        return edges
+
+    if gizmo_type == "sphere":
+        edges = np.concatenate((create_circle_edges(32, (0, 1)), create_circle_edges(32, (1, 2)), create_circle_edges(32, (0, 2))))
+    elif gizmo_type == "box":
+        # Cube of size 2, each edge joins two corners that only differ on one axis
+        corners = np.array([(x, y, z) for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)], dtype=np.float32)
+        edges = np.array([
+            (a, b) for a in range(8) for b in range(a + 1, 8) if np.count_nonzero(corners[a] != corners[b]) == 1
+        ])
+        edges = corners[edges.reshape(-1)]
+    elif gizmo_type == "cylinder":
+        bottom = create_circle_edges(32, (0, 1))
+        bottom[:, 2] = -1
+        top = bottom.copy()
+        top[:, 2] = 1
+        # One side edge per segment, between the start vertices of the matching circle edges
+        sides = np.stack((bottom[0::2], top[0::2]), axis=1).reshape(-1, 3)
+        edges = np.concatenate((bottom, top, sides))
+    else:
+        edges = np.empty((0, 3), dtype=np.float32)
+
+    unit_shapes[gizmo_type] = edges
+    return edges
+
+
 class MSFSGizmoProperties():
     def msfs_gizmo_type_update(self, context):
+        # The property is also used by the AddGizmo operator
+        if not isinstance(self, bpy.types.Object):
+            return
+
+        MSFSCollisionGizmoGroup.update_registry(self)
+
         empties = MSFSCollisionGizmoGroup.empties
-        object = context.object
-        if object in empties.keys():
-            if object.msfs_gizmo_type != empties[object].msfs_gizmo_type:
-                empties[object].msfs_gizmo_type = object.msfs_gizmo_type
-                empties[object].create_custom_shape()
+        gizmo = empties.get(self.name)
+        if gizmo is not None and self.msfs_gizmo_type != gizmo.msfs_gizmo_type:
+            gizmo.msfs_gizmo_type = self.msfs_gizmo_type
+            gizmo.create_custom_shape()
 
     bpy.types.Object.msfs_gizmo_type = bpy.props.EnumProperty(
         name = "Type",
@@ -87,6 +131,11 @@ class MSFSCollisionGizmo(bpy.types.Gizmo):
         "custom_shape_edges",
     )
 
+    # The edges of a gizmo type are the same for every gizmo, so their GPU batch is only created once per type. The
+    # transform of each gizmo is applied by the shader.
+    shader = None
+    batches = {}
+
     def _update_offset_matrix(self):
         pass
 
@@ -94,49 +143,47 @@ class MSFSCollisionGizmo(bpy.types.Gizmo):
         if not hasattr(self, "custom_shape"):
             self.custom_shape = None
 
-    def draw_line_3d(self, color, width, region, pos):
-        shader = gpu.shader.from_builtin('3D_POLYLINE_UNIFORM_COLOR')
-        batch = batch_for_shader(shader, 'LINES', {"pos": pos})
+    @staticmethod
+    def get_shader():
+        if MSFSCollisionGizmo.shader is None:
+            MSFSCollisionGizmo.shader = gpu.shader.from_builtin('3D_POLYLINE_UNIFORM_COLOR')
+        return MSFSCollisionGizmo.shader
+
+    def get_batch(self):
+        batch = MSFSCollisionGizmo.batches.get(self.msfs_gizmo_type)
+        if batch is None:
+            batch = batch_for_shader(MSFSCollisionGizmo.get_shader(), 'LINES', {"pos": self.custom_shape_edges})
+            MSFSCollisionGizmo.batches[self.msfs_gizmo_type] = batch
+        return batch
+
+    def draw_line_3d(self, color, width, region, batch, matrix):
+        shader = MSFSCollisionGizmo.get_shader()
         shader.bind()
         shader.uniform_float("color", color)
         shader.uniform_float("lineWidth", width)
         shader.uniform_float("viewportSize", (region.width, region.height))
-        batch.draw(shader)
+        with gpu.matrix.push_pop():
+            gpu.matrix.multiply_matrix(matrix)
+            batch.draw(shader)
 
     def create_custom_shape(self):
-        mesh = bpy.data.meshes.new("Gizmo Mesh")
-        bm = bmesh.new()
-        if self.msfs_gizmo_type == "sphere":
-            bmesh.ops.create_circle(bm, segments=32, radius=1)
-            bm.to_mesh(mesh)
-            bmesh.ops.create_circle(bm, segments=32, radius=1, matrix=Matrix.Rotation(radians(90), 4, 'X'))
-            bm.to_mesh(mesh)
-            bmesh.ops.create_circle(bm, segments=32, radius=1, matrix=Matrix.Rotation(radians(90), 4, 'Y'))
-            bm.to_mesh(mesh)
-        elif self.msfs_gizmo_type == "box":
-            bmesh.ops.create_cube(bm, size=2)
-        elif self.msfs_gizmo_type == "cylinder":
-            bmesh.ops.create_cone(bm, cap_ends=True, segments=32, radius1=1, radius2=1, depth=2) # Create cone with both ends having the same diameter - this creates a cylinder
-
-        bm.to_mesh(mesh)
-        bm.free()
-
-        edges = []
-        for edge in mesh.edges:
-            edge_verts = []
-            for vert in edge.vertices:
-                edge_verts.append(mesh.vertices[vert])
-            edges.append(edge_verts)
-
-        self.custom_shape_edges = edges
+        # The unit shapes are shared by every gizmo of the same type
+        self.custom_shape_edges = get_unit_shape(self.msfs_gizmo_type)
 
     def get_matrix(self):
-        # Re-calculate matrix without rotation
+        # Re-calculate matrix without rotation. The radius is computed from the round axes scales as in the export
+        legacy_radius = bpy.context.scene.msfs_exporter_properties.gizmo_radius_mode == "PRODUCT"
         if self.empty.msfs_gizmo_type == "sphere":
-            scale = self.empty.scale[0] * self.empty.scale[1] * self.empty.scale[2]
+            if legacy_radius:
+                scale = abs(self.empty.scale[0] * self.empty.scale[1] * self.empty.scale[2])
+            else:
+                scale = max(abs(self.empty.scale[0]), abs(self.empty.scale[1]), abs(self.empty.scale[2]))
             scale_matrix = Matrix.Scale(scale, 3, (1, 0, 0)) @ Matrix.Scale(scale, 3, (0, 1, 0)) @ Matrix.Scale(scale, 3, (0, 0, 1))
         elif self.empty.msfs_gizmo_type == "cylinder":
-            scale_xy = self.empty.scale[0] * self.empty.scale[1]
+            if legacy_radius:
+                scale_xy = abs(self.empty.scale[0] * self.empty.scale[1])
+            else:
+                scale_xy = max(abs(self.empty.scale[0]), abs(self.empty.scale[1]))
             scale_matrix = Matrix.Scale(scale_xy, 3, (1, 0, 0)) @ Matrix.Scale(scale_xy, 3, (0, 1, 0)) @ Matrix.Scale(self.empty.scale[2], 3, (0, 0, 1))
         else:
             scale_matrix = Matrix.Scale(self.empty.scale[0], 3, (1, 0, 0)) @ Matrix.Scale(self.empty.scale[1], 3, (0, 1, 0)) @ Matrix.Scale(self.empty.scale[2], 3, (0, 0, 1))
@@ -145,7 +192,7 @@ class MSFSCollisionGizmo(bpy.types.Gizmo):
         return matrix
 
     def draw(self, context):
-        if self.custom_shape_edges and not self.empty.hide_get():
+        if self.custom_shape_edges is not None and len(self.custom_shape_edges) > 0 and not self.empty.hide_get():
             matrix = self.get_matrix()
 
             bgl.glEnable(bgl.GL_BLEND)
@@ -159,26 +206,13 @@ class MSFSCollisionGizmo(bpy.types.Gizmo):
 
             draw_color.append(1) # Add alpha (there isn't any functions in the Color class to add an alpha, so we have to convert to a list)
 
-            vertex_pos = []
-            for edge in self.custom_shape_edges:
-                line_start = self.apply_vert_transforms(edge[0], matrix=matrix)
-                line_end = self.apply_vert_transforms(edge[1], matrix=matrix)
-
-                vertex_pos.extend([line_start, line_end])
-
-            self.draw_line_3d(draw_color, 2, context.region, vertex_pos)
+            self.draw_line_3d(draw_color, 2, context.region, self.get_batch(), matrix)
 
             # Restore OpenGL defaults
             bgl.glLineWidth(1)
             bgl.glDisable(bgl.GL_BLEND)
             bgl.glDisable(bgl.GL_LINE_SMOOTH)
 
-    def apply_vert_transforms(self, vert, matrix):
-        vert = list(vert.co)
-        vert.append(1)
-        multiplied_matrix = np.array(matrix).dot(np.array(vert))
-        return multiplied_matrix[:-1].tolist()
-
 class MSFSCollisionGizmoGroup(bpy.types.GizmoGroup):
     bl_idname = "VIEW3D_GT_msfs_collision_gizmo_group"
     bl_label = "MSFS Collision Gizmo Group"
@@ -186,44 +220,102 @@ class MSFSCollisionGizmoGroup(bpy.types.GizmoGroup):
     bl_region_type = "WINDOW"
     bl_options = {'3D', 'PERSISTENT', 'SHOW_MODAL_ALL', 'SELECT'}
 
+    # Gizmos by the name of their empty
     empties = {}
+    # Names of the empties with a gizmo type, kept up to date by the type update callback and the handlers below so
+    # the view layer doesn't have to be scanned on every refresh. None until it is built from the file.
+    registry = None
+
+    @staticmethod
+    def is_gizmo_empty(object):
+        return object.type == 'EMPTY' and object.msfs_gizmo_type != "NONE"
+
+    @staticmethod
+    def get_registry():
+        if MSFSCollisionGizmoGroup.registry is None:
+            MSFSCollisionGizmoGroup.rebuild_registry()
+        return MSFSCollisionGizmoGroup.registry
+
+    @staticmethod
+    def rebuild_registry():
+        MSFSCollisionGizmoGroup.registry = {
+            object.name for object in bpy.data.objects if MSFSCollisionGizmoGroup.is_gizmo_empty(object)
+        }
+
+    @staticmethod
+    def update_registry(object):
+        registry = MSFSCollisionGizmoGroup.get_registry()
+        if MSFSCollisionGizmoGroup.is_gizmo_empty(object):
+            registry.add(object.name)
+        else:
+            registry.discard(object.name)
 
     @classmethod
     def poll(cls, context):
-        for object in context.view_layer.objects:
-            if object.type == 'EMPTY' and object.msfs_gizmo_type != "NONE":
-                return True
-        return False
+        return len(cls.get_registry()) > 0
 
-    def setup(self, context):
-        for object in context.view_layer.objects:
-            if object.type == 'EMPTY' and object.msfs_gizmo_type != "NONE" and object not in self.__class__.empties.keys():
-                gz = self.gizmos.new(MSFSCollisionGizmo.bl_idname)
+    def add_gizmo(self, object):
+        gz = self.gizmos.new(MSFSCollisionGizmo.bl_idname)
+
+        gz.msfs_gizmo_type = object.msfs_gizmo_type
+        gz.empty = object
 
-                gz.msfs_gizmo_type = object.msfs_gizmo_type
-                gz.empty = object
+        gz.create_custom_shape()
 
-                gz.create_custom_shape()
+        self.__class__.empties[object.name] = gz
 
-                self.__class__.empties[object] = gz
+    def setup(self, context):
+        view_layer_objects = context.view_layer.objects
+        for name in self.get_registry():
+            object = view_layer_objects.get(name)
+            if object is not None and name not in self.__class__.empties:
+                self.add_gizmo(object)
 
     def refresh(self, context):
-        # We have to get a list of gizmo empties in the scene first in order to avoid a crash due to referencing a removed object
-        found_empties = []
-        for object in context.view_layer.objects:
-            if object.type == 'EMPTY' and object.msfs_gizmo_type != "NONE":
-                found_empties.append(object)
-
-        for _, (empty, gizmo) in enumerate(self.__class__.empties.copy().items()):
-            if empty not in found_empties:
+        # Objects are looked up by name, a reference to a removed object would crash
+        registry = self.get_registry()
+        view_layer_objects = context.view_layer.objects
+        for name, gizmo in list(self.__class__.empties.items()):
+            object = view_layer_objects.get(name)
+            if object is None or not self.is_gizmo_empty(object):
                 self.gizmos.remove(gizmo)
-                del self.__class__.empties[empty]
+                del self.__class__.empties[name]
+            else:
+                # The empty may have been replaced by another object with the same name
+                gizmo.empty = object
+
+        # Names of removed or renamed empties are dropped from the registry here
+        for name in list(registry):
+            if name in self.__class__.empties:
+                continue
+
+            object = bpy.data.objects.get(name)
+            if object is None or not self.is_gizmo_empty(object):
+                registry.discard(name)
+            elif view_layer_objects.get(name) is not None:
+                self.add_gizmo(view_layer_objects[name])
+
+
+@persistent
+def rebuild_gizmo_registry(dummy):
+    # Undoing replaces every object
+    MSFSCollisionGizmoGroup.rebuild_registry()
+
+@persistent
+def reset_gizmo_registry(dummy):
+    # The gizmos of the previous file are gone, the empties of the new file may have the same names
+    MSFSCollisionGizmoGroup.empties.clear()
+    MSFSCollisionGizmoGroup.rebuild_registry()
+
+@persistent
+def update_gizmo_registry(scene, depsgraph):
+    # Catches new, duplicated, appended and renamed empties
+    if MSFSCollisionGizmoGroup.registry is None:
+        return
 
-        # Check if there are any new gizmo empties, and if so create new gizmo. We can't do this in the above loop due to the crash mentioned above
-        for object in context.view_layer.objects:
-            if object.type == 'EMPTY' and object.msfs_gizmo_type != "NONE":
-                if object not in self.__class__.empties.keys():
-                    self.setup(context)
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Object) and update.id.type == 'EMPTY':
+            MSFSCollisionGizmoGroup.update_registry(update.id.original)
 
 
 class MSFSCollisionAddMenu(bpy.types.Menu):
@@ -240,6 +332,19 @@ def draw_menu(self, context):
 
 def register():
     bpy.types.VIEW3D_MT_add.append(draw_menu)
+    bpy.app.handlers.load_post.append(reset_gizmo_registry)
+    bpy.app.handlers.undo_post.append(rebuild_gizmo_registry)
+    bpy.app.handlers.redo_post.append(rebuild_gizmo_registry)
+    bpy.app.handlers.depsgraph_update_post.append(update_gizmo_registry)
 
 def unregister():
     bpy.types.VIEW3D_MT_add.remove(draw_menu)
+    for handlers, handler in (
+        (bpy.app.handlers.load_post, reset_gizmo_registry),
+        (bpy.app.handlers.undo_post, rebuild_gizmo_registry),
+        (bpy.app.handlers.redo_post, rebuild_gizmo_registry),
+        (bpy.app.handlers.depsgraph_update_post, update_gizmo_registry),
+    ):
+        if handler in handlers:
+            handlers.remove(handler)
+    MSFSCollisionGizmoGroup.registry = None
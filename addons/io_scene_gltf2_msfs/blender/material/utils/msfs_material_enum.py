@@ -63,6 +63,8 @@ class MSFS_ShaderNodesTypes(Enum):
     shaderNodeVectorMath = "ShaderNodeVectorMath"
     shaderNodeSeparateRGB = "ShaderNodeSeparateRGB"
     shaderNodeSeparateColor = "ShaderNodeSeparateColor"
+    shaderNodeCombineRGB = "ShaderNodeCombineRGB"
+    shaderNodeCombineColor = "ShaderNodeCombineColor"
     shaderNodeNormalMap = "ShaderNodeNormalMap"
     shaderNodeRGB = "ShaderNodeRGB"
     shaderNodeValue = "ShaderNodeValue"
@@ -115,6 +117,9 @@ class MSFS_ShaderNodes(Enum):
     combineUVOffset = "Combine UV Offset"
     mulUVScale = "Multiply UV Scale"
     addUVOffset = "Multiply UV Offset"
+    detailUV = "Detail UV"
+    sharedDetailUV = "MSFS Detail UV"
+    sharedFlipGreen = "MSFS Flip Green"
     detailNormalMapSampler = "Detail Normal Map Sampler"
     blendNormalMap = "Blend Normal Map"
     blendColorMap = "Blend Color Map"
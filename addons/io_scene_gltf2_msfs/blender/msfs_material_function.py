@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import math
+
 import bpy
 
 from .material.utils.msfs_material_enum import (MSFS_AnisotropicNodes,
@@ -26,14 +28,45 @@ class MSFS_Material:
     bl_label = "MSFS Shader Node Tree"
     bl_icon = "SOUND"
 
+    # Link updates waiting for commitBatch, keyed on the material pointer
+    batches = {}
+
     def __init__(self, material, buildTree=False):
         self.material = material
         self.node_tree = self.material.node_tree
         self.nodes = self.material.node_tree.nodes
         self.links = material.node_tree.links
         if buildTree:
-            self.__buildShaderTree()
-            self.force_update_properties()
+            self.beginBatch()
+            try:
+                self.__buildShaderTree()
+                self.force_update_properties()
+            finally:
+                self.commitBatch()
+
+    def beginBatch(self):
+        # Until the matching commitBatch, the update*Links methods only record what needs relinking
+        batch = MSFS_Material.batches.setdefault(self.material.as_pointer(), {"depth": 0, "updates": {}})
+        batch["depth"] += 1
+
+    def commitBatch(self):
+        key = self.material.as_pointer()
+        batch = MSFS_Material.batches[key]
+        batch["depth"] -= 1
+        if batch["depth"] > 0:
+            return
+
+        # Relink each group once, in the order they were first updated
+        del MSFS_Material.batches[key]
+        for update in batch["updates"]:
+            getattr(self, update)()
+
+    def deferLinks(self, update):
+        batch = MSFS_Material.batches.get(self.material.as_pointer())
+        if batch is None:
+            return False
+        batch["updates"][update] = None
+        return True
         
     def revertToPBRShaderTree(self):
         self.cleanNodeTree()
@@ -44,6 +77,13 @@ class MSFS_Material:
         self.createNodetree()
 
     def force_update_properties(self):
+        self.beginBatch()
+        try:
+            self.__update_properties()
+        finally:
+            self.commitBatch()
+
+    def __update_properties(self):
         from .msfs_material_prop_update import MSFS_Material_Property_Update
 
         MSFS_Material_Property_Update.update_base_color_texture(self.material, bpy.context)
@@ -72,7 +112,7 @@ class MSFS_Material:
 
     def cleanNodeTree(self):
         nodes = self.material.node_tree.nodes
-        for idx, node in enumerate(nodes):
+        for idx, node in enumerate(list(nodes)):
             print("Deleting: %s | %s" % (node.name, node.type))
             nodes.remove(node)
 
@@ -130,6 +170,105 @@ class MSFS_Material:
     def customShaderTree(self):
         raise NotImplementedError()
 
+    @staticmethod
+    def useSharedNodeGroups():
+        # Add-on preference, read from the add-on package this module belongs to
+        addon = bpy.context.preferences.addons.get(__package__.rpartition(".")[0])
+        return addon is not None and addon.preferences.use_shared_node_groups
+
+    # The shared groups only hold nodes the exporter never reads. Textures, mixes and the Principled BSDF stay in each
+    # material so the exported sockets are unchanged.
+    @staticmethod
+    def getDetailUVNodeTree():
+        nodeTree = bpy.data.node_groups.get(MSFS_ShaderNodes.sharedDetailUV.value)
+        if nodeTree is not None:
+            return nodeTree
+
+        nodeTree = bpy.data.node_groups.new(MSFS_ShaderNodes.sharedDetailUV.value, MSFS_ShaderNodesTypes.shaderNodeTree.value)
+        nodeTree.inputs.new("NodeSocketFloat", "Scale").default_value = 1.0
+        nodeTree.inputs.new("NodeSocketFloat", "Offset U")
+        nodeTree.inputs.new("NodeSocketFloat", "Offset V")
+        nodeTree.outputs.new("NodeSocketVector", "Vector")
+
+        nodes = nodeTree.nodes
+        groupInput = nodes.new(MSFS_ShaderNodesTypes.nodeGroupInput.value)
+        groupInput.location = (-600.0, 0.0)
+        uvMap = nodes.new(MSFS_ShaderNodesTypes.shaderNodeUVMap.value)
+        uvMap.location = (-400.0, 200.0)
+        combineScale = nodes.new(MSFS_ShaderNodesTypes.shaderNodeCombineXYZ.value)
+        combineScale.location = (-400.0, 0.0)
+        combineOffset = nodes.new(MSFS_ShaderNodesTypes.shaderNodeCombineXYZ.value)
+        combineOffset.location = (-400.0, -200.0)
+        mulScale = nodes.new(MSFS_ShaderNodesTypes.shaderNodeVectorMath.value)
+        mulScale.operation = "MULTIPLY"
+        mulScale.location = (-200.0, 100.0)
+        addOffset = nodes.new(MSFS_ShaderNodesTypes.shaderNodeVectorMath.value)
+        addOffset.operation = "ADD"
+        addOffset.location = (0.0, 0.0)
+        groupOutput = nodes.new(MSFS_ShaderNodesTypes.nodeGroupOutput.value)
+        groupOutput.location = (200.0, 0.0)
+
+        links = nodeTree.links
+        for i in range(3):
+            links.new(groupInput.outputs[0], combineScale.inputs[i])
+        links.new(groupInput.outputs[1], combineOffset.inputs[0])
+        links.new(groupInput.outputs[2], combineOffset.inputs[1])
+        links.new(uvMap.outputs[0], mulScale.inputs[0])
+        links.new(combineScale.outputs[0], mulScale.inputs[1])
+        links.new(mulScale.outputs[0], addOffset.inputs[0])
+        links.new(combineOffset.outputs[0], addOffset.inputs[1])
+        links.new(addOffset.outputs[0], groupOutput.inputs[0])
+        return nodeTree
+
+    @staticmethod
+    def getFlipGreenNodeTree():
+        # Same result as the RGB Curves node reversing the green channel of the normal textures
+        nodeTree = bpy.data.node_groups.get(MSFS_ShaderNodes.sharedFlipGreen.value)
+        if nodeTree is not None:
+            return nodeTree
+
+        nodeTree = bpy.data.node_groups.new(MSFS_ShaderNodes.sharedFlipGreen.value, MSFS_ShaderNodesTypes.shaderNodeTree.value)
+        fac = nodeTree.inputs.new("NodeSocketFloatFactor", "Fac")
+        fac.default_value = 1.0
+        fac.min_value = 0.0
+        fac.max_value = 1.0
+        nodeTree.inputs.new("NodeSocketColor", "Color").default_value = (0.5, 0.5, 1.0, 1.0)
+        nodeTree.outputs.new("NodeSocketColor", "Color")
+
+        nodes = nodeTree.nodes
+        groupInput = nodes.new(MSFS_ShaderNodesTypes.nodeGroupInput.value)
+        groupInput.location = (-600.0, 0.0)
+        if(bpy.app.version < (3, 3, 0)):
+            separate = nodes.new(MSFS_ShaderNodesTypes.shaderNodeSeparateRGB.value)
+            combine = nodes.new(MSFS_ShaderNodesTypes.shaderNodeCombineRGB.value)
+        else:
+            separate = nodes.new(MSFS_ShaderNodesTypes.shaderNodeSeparateColor.value)
+            combine = nodes.new(MSFS_ShaderNodesTypes.shaderNodeCombineColor.value)
+        separate.location = (-400.0, 0.0)
+        combine.location = (0.0, 0.0)
+        flipGreen = nodes.new(MSFS_ShaderNodesTypes.shaderNodeMath.value)
+        flipGreen.operation = "SUBTRACT"
+        flipGreen.use_clamp = True
+        flipGreen.inputs[0].default_value = 1.0
+        flipGreen.location = (-200.0, 0.0)
+        mix = nodes.new(MSFS_ShaderNodesTypes.shaderNodeMixRGB.value)
+        mix.blend_type = "MIX"
+        mix.location = (200.0, 0.0)
+        groupOutput = nodes.new(MSFS_ShaderNodesTypes.nodeGroupOutput.value)
+        groupOutput.location = (400.0, 0.0)
+
+        links = nodeTree.links
+        links.new(groupInput.outputs[1], separate.inputs[0])
+        links.new(separate.outputs[0], combine.inputs[0])
+        links.new(separate.outputs[1], flipGreen.inputs[1])
+        links.new(flipGreen.outputs[0], combine.inputs[1])
+        links.new(separate.outputs[2], combine.inputs[2])
+        links.new(groupInput.outputs[0], mix.inputs[0])
+        links.new(groupInput.outputs[1], mix.inputs[1])
+        links.new(combine.outputs[0], mix.inputs[2])
+        links.new(mix.outputs[0], groupOutput.inputs[0])
+        return nodeTree
+
     def defaultShadersTree(self):
         principledBSDFNode = self.getNodesByClassName(MSFS_ShaderNodesTypes.shadeNodeBsdfPrincipled.value)[0]
         ################## Textures
@@ -336,15 +475,6 @@ class MSFS_Material:
             color = (0.3, 0.3, 0.5)
         )
         
-        ## UV Map
-        # Out[0] : Multiply UV Scale -> In[0]
-        uvMapNode = self.addNode(
-            name = MSFS_ShaderNodes.uvMap.value,
-            typeNode = MSFS_ShaderNodesTypes.shaderNodeUVMap.value,
-            location = (-2000.0, 500.0),
-            frame = uvFrame
-        )
-
         ## Detail UV scale
         # Out[0] : Combine UV Scale -> In[0][1][2]
         detailUVScaleNode = self.addNode(
@@ -372,68 +502,99 @@ class MSFS_Material:
             frame = uvFrame
         )
 
-        ## Combine UV Scale
-        # In[0] : Detail UV Scale -> Out[0]
-        # In[1] : Detail UV Scale -> Out[0]
-        # In[2] : Detail UV Scale -> Out[0]
-        combineUVScaleNode = self.addNode(
-            name = MSFS_ShaderNodes.combineUVScale.value,
-            typeNode = MSFS_ShaderNodesTypes.shaderNodeCombineXYZ.value,
-            location = (-1750.0, 400.0),
-            frame = uvFrame
-        )
+        if self.useSharedNodeGroups():
+            ## Detail UV
+            # In[0] : Detail UV Scale -> Out[0]
+            # In[1] : Detail UV Offset U -> Out[0]
+            # In[2] : Detail UV Offset V -> Out[0]
+            # Out[0] : Detail Textures -> In[0]
+            detailUVNode = self.addNode(
+                name = MSFS_ShaderNodes.detailUV.value,
+                typeNode = MSFS_ShaderNodesTypes.shaderNodeGroup.value,
+                location = (-1500.0, 350.0),
+                frame = uvFrame
+            )
+            detailUVNode.node_tree = MSFS_Material.getDetailUVNodeTree()
+
+            ## Links
+            self.link(detailUVNode.inputs[0], detailUVScaleNode.outputs[0])
+            self.link(detailUVNode.inputs[1], detailUVOffsetUNode.outputs[0])
+            self.link(detailUVNode.inputs[2], detailUVOffsetVNode.outputs[0])
+            self.link(detailCompTexNode.inputs[0], detailUVNode.outputs[0])
+            self.link(detailColorTexNode.inputs[0], detailUVNode.outputs[0])
+            self.link(detailNormalTexNode.inputs[0], detailUVNode.outputs[0])
+        else:
+            ## UV Map
+            # Out[0] : Multiply UV Scale -> In[0]
+            uvMapNode = self.addNode(
+                name = MSFS_ShaderNodes.uvMap.value,
+                typeNode = MSFS_ShaderNodesTypes.shaderNodeUVMap.value,
+                location = (-2000.0, 500.0),
+                frame = uvFrame
+            )
+
+            ## Combine UV Scale
+            # In[0] : Detail UV Scale -> Out[0]
+            # In[1] : Detail UV Scale -> Out[0]
+            # In[2] : Detail UV Scale -> Out[0]
+            combineUVScaleNode = self.addNode(
+                name = MSFS_ShaderNodes.combineUVScale.value,
+                typeNode = MSFS_ShaderNodesTypes.shaderNodeCombineXYZ.value,
+                location = (-1750.0, 400.0),
+                frame = uvFrame
+            )
         
-        ## Links
-        self.link(combineUVScaleNode.inputs[0], detailUVScaleNode.outputs[0])
-        self.link(combineUVScaleNode.inputs[1], detailUVScaleNode.outputs[0])
-        self.link(combineUVScaleNode.inputs[2], detailUVScaleNode.outputs[0])
-        
-        ## Combine UV offset
-        # In[0] : Detail UV Offset U -> Out[0]
-        # In[1] : Detail UV Offset V -> Out[0]
-        combineUVOffsetNode = self.addNode(
-            name = MSFS_ShaderNodes.combineUVOffset.value,
-            typeNode = MSFS_ShaderNodesTypes.shaderNodeCombineXYZ.value,
-            location = (-1750.0, 300.0),
-            frame = uvFrame
-        )
+            ## Links
+            self.link(combineUVScaleNode.inputs[0], detailUVScaleNode.outputs[0])
+            self.link(combineUVScaleNode.inputs[1], detailUVScaleNode.outputs[0])
+            self.link(combineUVScaleNode.inputs[2], detailUVScaleNode.outputs[0])
         
-        ## Links
-        self.link(combineUVOffsetNode.inputs[0], detailUVOffsetUNode.outputs[0])
-        self.link(combineUVOffsetNode.inputs[1], detailUVOffsetVNode.outputs[0])
-        
-        ## Multiply UV Scale
-        # In[0] : UV Map -> Out[0]
-        # In[1] : Combine UV Offset -> Out[0]
-        mulUVScaleNode = self.addNode(
-            name = MSFS_ShaderNodes.mulUVScale.value,
-            typeNode = MSFS_ShaderNodesTypes.shaderNodeVectorMath.value,
-            operation = "MULTIPLY",
-            location = (-1500.0, 400.0),
-            frame = uvFrame
-        )
+            ## Combine UV offset
+            # In[0] : Detail UV Offset U -> Out[0]
+            # In[1] : Detail UV Offset V -> Out[0]
+            combineUVOffsetNode = self.addNode(
+                name = MSFS_ShaderNodes.combineUVOffset.value,
+                typeNode = MSFS_ShaderNodesTypes.shaderNodeCombineXYZ.value,
+                location = (-1750.0, 300.0),
+                frame = uvFrame
+            )
+        
+            ## Links
+            self.link(combineUVOffsetNode.inputs[0], detailUVOffsetUNode.outputs[0])
+            self.link(combineUVOffsetNode.inputs[1], detailUVOffsetVNode.outputs[0])
+        
+            ## Multiply UV Scale
+            # In[0] : UV Map -> Out[0]
+            # In[1] : Combine UV Offset -> Out[0]
+            mulUVScaleNode = self.addNode(
+                name = MSFS_ShaderNodes.mulUVScale.value,
+                typeNode = MSFS_ShaderNodesTypes.shaderNodeVectorMath.value,
+                operation = "MULTIPLY",
+                location = (-1500.0, 400.0),
+                frame = uvFrame
+            )
 
-        ## Links
-        self.link(mulUVScaleNode.inputs[0], uvMapNode.outputs[0])
-        self.link(mulUVScaleNode.inputs[1], combineUVScaleNode.outputs[0])
-        
-        ## Add UV Offset
-        # In[0] : Multiply UV Scale -> Out[0]
-        # In[1] : Combine UV Offset -> Out[0]
-        addUVOffsetNode = self.addNode(
-            name = MSFS_ShaderNodes.addUVOffset.value,
-            typeNode = MSFS_ShaderNodesTypes.shaderNodeVectorMath.value,
-            operation = "ADD",
-            location = (-1250.0, 300.0),
-            frame = uvFrame
-        )
+            ## Links
+            self.link(mulUVScaleNode.inputs[0], uvMapNode.outputs[0])
+            self.link(mulUVScaleNode.inputs[1], combineUVScaleNode.outputs[0])
+        
+            ## Add UV Offset
+            # In[0] : Multiply UV Scale -> Out[0]
+            # In[1] : Combine UV Offset -> Out[0]
+            addUVOffsetNode = self.addNode(
+                name = MSFS_ShaderNodes.addUVOffset.value,
+                typeNode = MSFS_ShaderNodesTypes.shaderNodeVectorMath.value,
+                operation = "ADD",
+                location = (-1250.0, 300.0),
+                frame = uvFrame
+            )
 
-        ## Links
-        self.link(addUVOffsetNode.inputs[0], mulUVScaleNode.outputs[0])
-        self.link(addUVOffsetNode.inputs[1], combineUVOffsetNode.outputs[0])
-        self.link(detailCompTexNode.inputs[0], addUVOffsetNode.outputs[0])
-        self.link(detailColorTexNode.inputs[0], addUVOffsetNode.outputs[0])
-        self.link(detailNormalTexNode.inputs[0], addUVOffsetNode.outputs[0])
+            ## Links
+            self.link(addUVOffsetNode.inputs[0], mulUVScaleNode.outputs[0])
+            self.link(addUVOffsetNode.inputs[1], combineUVOffsetNode.outputs[0])
+            self.link(detailCompTexNode.inputs[0], addUVOffsetNode.outputs[0])
+            self.link(detailColorTexNode.inputs[0], addUVOffsetNode.outputs[0])
+            self.link(detailNormalTexNode.inputs[0], addUVOffsetNode.outputs[0])
 
         ################## 
         ## OMR Frame
@@ -603,14 +764,23 @@ class MSFS_Material:
         
         # Fix the normal view by reversing the green channel
         # since blender can only render openGL normal textures
-        RGBCurvesNode = self.addNode(
-            name = MSFS_ShaderNodes.RGBCurves.value,
-            typeNode = MSFS_ShaderNodesTypes.shaderNodeRGBCurve.value,
-            location = (-300.0, -400.0)
-        )
-        curveMapping = RGBCurvesNode.mapping.curves[1]
-        curveMapping.points[0].location = (0.0, 1.0)
-        curveMapping.points[1].location = (1.0, 0.0)
+        # The shared group has the same sockets as the RGB Curves node: In[0] Fac, In[1] Color, Out[0] Color
+        if self.useSharedNodeGroups():
+            RGBCurvesNode = self.addNode(
+                name = MSFS_ShaderNodes.RGBCurves.value,
+                typeNode = MSFS_ShaderNodesTypes.shaderNodeGroup.value,
+                location = (-300.0, -400.0)
+            )
+            RGBCurvesNode.node_tree = MSFS_Material.getFlipGreenNodeTree()
+        else:
+            RGBCurvesNode = self.addNode(
+                name = MSFS_ShaderNodes.RGBCurves.value,
+                typeNode = MSFS_ShaderNodesTypes.shaderNodeRGBCurve.value,
+                location = (-300.0, -400.0)
+            )
+            curveMapping = RGBCurvesNode.mapping.curves[1]
+            curveMapping.points[0].location = (0.0, 1.0)
+            curveMapping.points[1].location = (1.0, 0.0)
 
         ## Normal Map Sampler
         # In[1] : Normal Texture -> Out[0]
@@ -676,7 +846,7 @@ class MSFS_Material:
 
     def setAnisotropicTex(self, tex):
         nodeAnisotropicTex = self.getNodeByName(MSFS_AnisotropicNodes.anisotropicTex.value)
-        nodeAnisotropicTex.image = tex
+        self.setIfChanged(nodeAnisotropicTex, "image", tex)
 
         nodeSeparateAnisotropic = self.getNodeByName(MSFS_AnisotropicNodes.separateAnisotropic.value)
         nodePrincipledBSDF = self.getNodeByName(MSFS_ShaderNodes.principledBSDF.value)
@@ -692,89 +862,85 @@ class MSFS_Material:
         nodeBaseColorRGB = self.getNodeByName(MSFS_ShaderNodes.baseColorRGB.value)
         nodeBaseColorA = self.getNodeByName(MSFS_ShaderNodes.baseColorA.value)
 
-        nodeBaseColorRGB.outputs[0].default_value[0] = color[0]
-        nodeBaseColorRGB.outputs[0].default_value[1] = color[1]
-        nodeBaseColorRGB.outputs[0].default_value[2] = color[2]
-        nodeBaseColorA.outputs[0].default_value = color[3]
+        baseColorValue = nodeBaseColorRGB.outputs[0].default_value
+        self.setIfChanged(nodeBaseColorRGB.outputs[0], "default_value", (color[0], color[1], color[2], baseColorValue[3]))
+        self.setIfChanged(nodeBaseColorA.outputs[0], "default_value", color[3])
         self.updateColorLinks()
 
     def setBaseColorTex(self, tex):
         nodeBaseColorTex = self.getNodeByName(MSFS_ShaderNodes.baseColorTex.value)
-        nodeBaseColorTex.image = tex
+        self.setIfChanged(nodeBaseColorTex, "image", tex)
         self.updateColorLinks()
 
     def setDetailColorTex(self, tex):
         nodeDetailColor = self.getNodeByName(MSFS_ShaderNodes.detailColorTex.value)
-        nodeDetailColor.image = tex
+        self.setIfChanged(nodeDetailColor, "image", tex)
         self.updateColorLinks()
 
     def setCompTex(self, tex):
         nodeCompTex = self.getNodeByName(MSFS_ShaderNodes.compTex.value)
-        nodeCompTex.image = tex
+        self.setIfChanged(nodeCompTex, "image", tex)
         if tex is not None:
-            nodeCompTex.image.colorspace_settings.name = "Non-Color"
+            self.setIfChanged(nodeCompTex.image.colorspace_settings, "name", "Non-Color")
         self.updateCompLinks()
 
     def setDetailCompTex(self, tex):
         nodeDetailCompTex = self.getNodeByName(MSFS_ShaderNodes.detailCompTex.value)
-        nodeDetailCompTex.image = tex
+        self.setIfChanged(nodeDetailCompTex, "image", tex)
         if tex is not None:
-            nodeDetailCompTex.image.colorspace_settings.name = "Non-Color"
+            self.setIfChanged(nodeDetailCompTex.image.colorspace_settings, "name", "Non-Color")
         self.updateCompLinks()
 
     def setRoughnessScale(self, scale):
         nodeRoughnessScale = self.getNodeByName(MSFS_ShaderNodes.roughnessScale.value)
-        nodeRoughnessScale.outputs[0].default_value = scale
+        self.setIfChanged(nodeRoughnessScale.outputs[0], "default_value", scale)
         self.updateCompLinks()
 
     def setMetallicScale(self, scale):
         nodeMetallicScale = self.getNodeByName(MSFS_ShaderNodes.metallicScale.value)
-        nodeMetallicScale.outputs[0].default_value = scale
+        self.setIfChanged(nodeMetallicScale.outputs[0], "default_value", scale)
         self.updateCompLinks()
 
     def setEmissiveTexture(self, tex):
         nodeEmissiveTex = self.getNodeByName(MSFS_ShaderNodes.emissiveTex.value)
-        nodeEmissiveTex.image = tex
+        self.setIfChanged(nodeEmissiveTex, "image", tex)
         if tex is not None:
-            nodeEmissiveTex.image.colorspace_settings.name = "Non-Color"
+            self.setIfChanged(nodeEmissiveTex.image.colorspace_settings, "name", "Non-Color")
         self.updateEmissiveLinks()
 
     def setEmissiveScale(self, scale):
         nodeEmissiveScale = self.getNodeByName(MSFS_ShaderNodes.emissiveScale.value)
-        nodeEmissiveScale.outputs[0].default_value = scale
+        self.setIfChanged(nodeEmissiveScale.outputs[0], "default_value", scale)
         self.updateEmissiveLinks()
 
     def setEmissiveColor(self, color):
         nodeEmissiveColor = self.getNodeByName(MSFS_ShaderNodes.emissiveColor.value)
         emissiveValue = nodeEmissiveColor.outputs[0].default_value
-        emissiveValue[0] = color[0]
-        emissiveValue[1] = color[1]
-        emissiveValue[2] = color[2]
-        nodeEmissiveColor.outputs[0].default_value = emissiveValue
+        self.setIfChanged(nodeEmissiveColor.outputs[0], "default_value", (color[0], color[1], color[2], emissiveValue[3]))
         self.updateEmissiveLinks()
 
     def setNormalScale(self, scale):
         nodeNormalMapSampler = self.getNodeByName(MSFS_ShaderNodes.normalMapSampler.value)
-        nodeNormalMapSampler.inputs[0].default_value = scale
+        self.setIfChanged(nodeNormalMapSampler.inputs[0], "default_value", scale)
         self.updateNormalLinks()
 
     def setDetailNormalTex(self, tex):
         nodeDetailNormalTex = self.getNodeByName(MSFS_ShaderNodes.detailNormalTex.value)
-        nodeDetailNormalTex.image = tex
+        self.setIfChanged(nodeDetailNormalTex, "image", tex)
         if tex is not None:
-            nodeDetailNormalTex.image.colorspace_settings.name = "Non-Color"
+            self.setIfChanged(nodeDetailNormalTex.image.colorspace_settings, "name", "Non-Color")
         self.updateNormalLinks()
 
     def setNormalTex(self, tex):
         nodeNormalTex = self.getNodeByName(MSFS_ShaderNodes.normalTex.value)
-        nodeNormalTex.image = tex
+        self.setIfChanged(nodeNormalTex, "image", tex)
         if tex is not None:
-            nodeNormalTex.image.colorspace_settings.name = "Non-Color"
+            self.setIfChanged(nodeNormalTex.image.colorspace_settings, "name", "Non-Color")
         self.updateNormalLinks()
 
     def setBlendMaskTex(self, tex):
         nodeBlendMaskTex = self.getNodeByName(MSFS_ShaderNodes.blendMaskTex.value)
-        nodeBlendMaskTex.image = tex
+        self.setIfChanged(nodeBlendMaskTex, "image", tex)
 
     def setUV(self, uvScale, offset_u, offset_v, normalScale):
         nodeDetailUvScale = self.getNodeByName(MSFS_ShaderNodes.detailUVScale.value)
@@ -787,13 +953,16 @@ class MSFS_Material:
             and nodeDetailUvOffsetV
             and nodeDetailNormalScale):
 
-            nodeDetailNormalScale.outputs[0].default_value = normalScale
-            nodeDetailUvScale.outputs[0].default_value = uvScale
-            nodeDetailUvOffsetU.outputs[0].default_value = offset_u
-            nodeDetailUvOffsetV.outputs[0].default_value = offset_v
+            self.setIfChanged(nodeDetailNormalScale.outputs[0], "default_value", normalScale)
+            self.setIfChanged(nodeDetailUvScale.outputs[0], "default_value", uvScale)
+            self.setIfChanged(nodeDetailUvOffsetU.outputs[0], "default_value", offset_u)
+            self.setIfChanged(nodeDetailUvOffsetV.outputs[0], "default_value", offset_v)
     
     ##############################################
     def updateColorLinks(self):
+        if self.deferLinks("updateColorLinks"):
+            return
+
         # relink nodes
         nodeBaseColorRGB = self.getNodeByName(MSFS_ShaderNodes.baseColorRGB.value)
         nodeBaseColorA = self.getNodeByName(MSFS_ShaderNodes.baseColorA.value)
@@ -819,23 +988,26 @@ class MSFS_Material:
             self.link(nodeBaseColorA.outputs[0], nodePrincipledBSDF.inputs[MSFS_PrincipledBSDFInputs.alpha.value])
 
         elif nodeBaseColorTex.image and not nodeDetailColorTex.image:
-            nodeBlendColorMap.blend_type = "ADD"
+            self.setIfChanged(nodeBlendColorMap, "blend_type", "ADD")
             self.link(nodeMulBaseColorRGB.outputs[0], nodePrincipledBSDF.inputs[MSFS_PrincipledBSDFInputs.baseColor.value])
             self.link(nodeBaseColorTex.outputs[1], nodeMulBaseColorA.inputs[0])
             self.link(nodeMulBaseColorA.outputs[0], nodePrincipledBSDF.inputs[MSFS_PrincipledBSDFInputs.alpha.value])
 
         elif not nodeBaseColorTex.image and nodeDetailColorTex.image:
-            nodeBlendColorMap.blend_type = "ADD"
+            self.setIfChanged(nodeBlendColorMap, "blend_type", "ADD")
             self.link(nodeMulBaseColorRGB.outputs[0], nodePrincipledBSDF.inputs[MSFS_PrincipledBSDFInputs.baseColor.value])
             self.link(nodeDetailColorTex.outputs[1],nodeMulBaseColorA.inputs[0])
             self.link(nodeMulBaseColorA.outputs[0], nodePrincipledBSDF.inputs[MSFS_PrincipledBSDFInputs.alpha.value])
 
         else:
-            nodeBlendColorMap.blend_type = "MULTIPLY"
+            self.setIfChanged(nodeBlendColorMap, "blend_type", "MULTIPLY")
             self.link(nodeMulBaseColorRGB.outputs[0], nodePrincipledBSDF.inputs[MSFS_PrincipledBSDFInputs.baseColor.value])
             self.link(nodeBlendAlphaMap.outputs[0], nodeMulBaseColorA.inputs[0])
 
     def updateNormalLinks(self):
+        if self.deferLinks("updateNormalLinks"):
+            return
+
         nodeNormalTex = self.getNodeByName(MSFS_ShaderNodes.normalTex.value)
         nodeDetailNormalTex = self.getNodeByName(MSFS_ShaderNodes.detailNormalTex.value)
         nodeNormalMapSampler = self.getNodeByName(MSFS_ShaderNodes.normalMapSampler.value)
@@ -863,6 +1035,9 @@ class MSFS_Material:
             self.unLinkNodeInput(nodePrincipledBSDF, MSFS_PrincipledBSDFInputs.normal.value)
 
     def updateEmissiveLinks(self):
+        if self.deferLinks("updateEmissiveLinks"):
+            return
+
         nodeEmissiveTex = self.getNodeByName(MSFS_ShaderNodes.emissiveTex.value)
         nodeEmissiveScale = self.getNodeByName(MSFS_ShaderNodes.emissiveScale.value)
         nodeEmissiveColor = self.getNodeByName(MSFS_ShaderNodes.emissiveColor.value)
@@ -881,6 +1056,9 @@ class MSFS_Material:
         self.link(nodeEmissiveScale.outputs[0], nodePrincipledBSDF.inputs[MSFS_PrincipledBSDFInputs.emissionStrength.value])
 
     def updateCompLinks(self):
+        if self.deferLinks("updateCompLinks"):
+            return
+
         nodeCompTex = self.getNodeByName(MSFS_ShaderNodes.compTex.value)
         nodeDetailCompTex = self.getNodeByName(MSFS_ShaderNodes.detailCompTex.value)
         nodeRoughnessScale = self.getNodeByName(MSFS_ShaderNodes.roughnessScale.value)
@@ -911,17 +1089,17 @@ class MSFS_Material:
             self.link(nodeMetallicScale.outputs[0], nodePrincipledBSDF.inputs[MSFS_PrincipledBSDFInputs.metallic.value])
 
         elif nodeCompTex.image and not nodeDetailCompTex.image:
-            nodeBlendCompMap.blend_type = "ADD"
+            self.setIfChanged(nodeBlendCompMap, "blend_type", "ADD")
             self.link(nodeRoughnessScale.outputs[0], nodePrincipledBSDF.inputs[MSFS_PrincipledBSDFInputs.roughness.value])
             self.link(nodeMulMetallic.outputs[0], nodePrincipledBSDF.inputs[MSFS_PrincipledBSDFInputs.metallic.value])
 
         elif not nodeCompTex.image and nodeDetailCompTex.image:
-            nodeBlendCompMap.blend_type = "ADD"
+            self.setIfChanged(nodeBlendCompMap, "blend_type", "ADD")
             self.link(nodeMulRoughness.outputs[0], nodePrincipledBSDF.inputs[MSFS_PrincipledBSDFInputs.roughness.value])
             self.link(nodeMetallicScale.outputs[0], nodePrincipledBSDF.inputs[MSFS_PrincipledBSDFInputs.metallic.value])
 
         else:
-            nodeBlendCompMap.blend_type = "MULTIPLY"
+            self.setIfChanged(nodeBlendCompMap, "blend_type", "MULTIPLY")
             self.link(nodeMulRoughness.outputs[0], nodePrincipledBSDF.inputs[MSFS_PrincipledBSDFInputs.roughness.value])
             self.link(nodeMulMetallic.outputs[0], nodePrincipledBSDF.inputs[MSFS_PrincipledBSDFInputs.metallic.value])
 
@@ -991,24 +1169,48 @@ class MSFS_Material:
         return None
     
     def getNodeByName(self, nodename):
-        if self.node_tree.nodes.find(nodename) > -1:
-            return self.node_tree.nodes[nodename]
-        return None
+        # One lookup by name in Blender, instead of find followed by a second lookup
+        return self.node_tree.nodes.get(nodename)
 
     def getNodesByClassName(self, className):
         res = []
-        for n in  self.node_tree.nodes:
+        for n in self.node_tree.nodes:
             if n.__class__.__name__ == className:
                 res.append(n)
         return res
 
     def link(self, out_node, in_node):
-        self.links.new(out_node, in_node)
+        # Sockets are passed in either order, links.new swaps them the same way
+        if out_node.is_output:
+            from_socket, to_socket = out_node, in_node
+        else:
+            from_socket, to_socket = in_node, out_node
+
+        # Creating a link that already exists still triggers a depsgraph update and a shader recompile. Socket.links scans
+        # every link of the tree, only read it for a linked input, which has a single link in a shader tree
+        if to_socket.is_linked and to_socket.links[0].from_socket == from_socket:
+            return
+
+        self.links.new(from_socket, to_socket)
 
     def unLinkNodeInput(self, node, inputIndex):
         for link in node.inputs[inputIndex].links:
             self.node_tree.links.remove(link)
 
+    @staticmethod
+    def setIfChanged(struct, attribute, value):
+        # Assigning a property tags the material for a shader recompile, even when the value is the same
+        current = getattr(struct, attribute)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            changed = not math.isclose(current, value, abs_tol=1e-6)
+        elif isinstance(value, (tuple, list)):
+            changed = len(current) != len(value) or any(not math.isclose(a, b, abs_tol=1e-6) for a, b in zip(current, value))
+        else:
+            changed = current != value
+
+        if changed:
+            setattr(struct, attribute, value)
+
     def free(self):
         if self.node_tree.users == 1:
             bpy.data.node_groups.remove(self.node_tree, do_unlink=True)
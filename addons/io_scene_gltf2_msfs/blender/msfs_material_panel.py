@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import time
+
 import bpy
 
 from .msfs_material_prop_update import MSFS_Material_Property_Update
@@ -139,6 +141,186 @@ class MSFS_OT_MigrateMaterialData(bpy.types.Operator): # TODO: Remove eventually
         return {"FINISHED"}
 
 
+class MSFS_OT_ApplyMaterialType(bpy.types.Operator):
+    """Set the MSFS material type of several materials at once. For materials whose MSFS type is Disabled, the textures and factors of their Principled BSDF are copied to the MSFS material properties"""
+
+    bl_idname = "msfs.apply_material_type"
+    bl_label = "Apply Material Type"
+    bl_options = {"REGISTER", "UNDO"}
+
+    # Blender doesn't keep the strings of dynamic enum items alive, the items have to be referenced here
+    material_type_items = []
+
+    def get_material_type_items(self, context):
+        MSFS_OT_ApplyMaterialType.material_type_items = [
+            (item.identifier, item.name, item.description)
+            for item in bpy.types.Material.bl_rna.properties["msfs_material_type"].enum_items
+        ]
+        return MSFS_OT_ApplyMaterialType.material_type_items
+
+    material_type: bpy.props.EnumProperty(
+        name="Type",
+        description="MSFS material type to apply",
+        items=get_material_type_items,
+    )
+
+    scope: bpy.props.EnumProperty(
+        name="Materials",
+        items=(
+            ("SELECTED", "Selected Objects", "Materials of the selected objects"),
+            ("ALL", "All", "All materials of the file"),
+        ),
+        default="SELECTED",
+    )
+
+    map_principled: bpy.props.BoolProperty(
+        name="Map Principled BSDF",
+        description="Copy the textures and factors of the Principled BSDF of materials whose MSFS type is Disabled",
+        default=True,
+    )
+
+    @staticmethod
+    def get_linked_node(socket, node_types):
+        # Node plugged into the socket, if it has one of the node types
+        if socket is None or not socket.is_linked:
+            return None
+        node = socket.links[0].from_node
+        return node if node.type in node_types else None
+
+    @staticmethod
+    def get_linked_image(socket):
+        node = MSFS_OT_ApplyMaterialType.get_linked_node(socket, {"TEX_IMAGE"})
+        return node.image if node is not None else None
+
+    @staticmethod
+    def read_principled(mat):
+        # Returns the MSFS properties matching the Principled BSDF of the material
+        if mat.node_tree is None:
+            return {}
+
+        principled = None
+        for node in mat.node_tree.nodes:
+            if node.type == "BSDF_PRINCIPLED":
+                principled = node
+                break
+        if principled is None:
+            return {}
+
+        get_linked_image = MSFS_OT_ApplyMaterialType.get_linked_image
+        get_linked_node = MSFS_OT_ApplyMaterialType.get_linked_node
+        inputs = principled.inputs
+        values = {}
+
+        base_color = inputs.get("Base Color")
+        alpha = inputs.get("Alpha")
+        values["msfs_base_color_texture"] = get_linked_image(base_color)
+        if base_color is not None and not base_color.is_linked:
+            values["msfs_base_color_factor"] = (
+                list(base_color.default_value[0:3])
+                + [alpha.default_value if alpha is not None and not alpha.is_linked else 1.0]
+            )
+
+        # glTF occlusion (R), roughness (G) and metallic (B) texture, split by a separate node
+        for name, factor in (("Metallic", "msfs_metallic_factor"), ("Roughness", "msfs_roughness_factor")):
+            socket = inputs.get(name)
+            if socket is None:
+                continue
+            separate = get_linked_node(socket, {"SEPARATE_COLOR", "SEPRGB"})
+            image = get_linked_image(separate.inputs[0]) if separate is not None else None
+            if image is not None:
+                values["msfs_occlusion_metallic_roughness_texture"] = image
+                values[factor] = 1.0
+            elif not socket.is_linked:
+                values[factor] = socket.default_value
+
+        normal_map = get_linked_node(inputs.get("Normal"), {"NORMAL_MAP"})
+        if normal_map is not None:
+            values["msfs_normal_texture"] = get_linked_image(normal_map.inputs.get("Color"))
+            values["msfs_normal_scale"] = normal_map.inputs["Strength"].default_value
+
+        # Renamed to "Emission Color" in Blender 4.0
+        emission = inputs.get("Emission Color") or inputs.get("Emission")
+        image = get_linked_image(emission)
+        if image is not None:
+            values["msfs_emissive_texture"] = image
+            values["msfs_emissive_factor"] = [1.0, 1.0, 1.0]
+        elif emission is not None and not emission.is_linked:
+            values["msfs_emissive_factor"] = list(emission.default_value[0:3])
+        emission_strength = inputs.get("Emission Strength")
+        if emission_strength is not None and not emission_strength.is_linked:
+            values["msfs_emissive_scale"] = emission_strength.default_value
+
+        if mat.blend_method == "BLEND":
+            values["msfs_alpha_mode"] = "BLEND"
+        elif mat.blend_method == "CLIP":
+            values["msfs_alpha_mode"] = "MASK"
+            values["msfs_alpha_cutoff"] = mat.alpha_threshold
+        values["msfs_double_sided"] = not mat.use_backface_culling
+
+        return {key: value for key, value in values.items() if value is not None}
+
+    def get_materials(self, context):
+        if self.scope == "ALL":
+            return list(bpy.data.materials)
+
+        materials = {}
+        for obj in context.selected_objects:
+            for slot in obj.material_slots:
+                if slot.material is not None:
+                    materials[slot.material.name_full] = slot.material
+        return list(materials.values())
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        materials = [mat for mat in self.get_materials(context) if mat.msfs_material_type != self.material_type and mat.library is None]
+        if not materials:
+            self.report({'WARNING'}, "No materials to convert")
+            return {"CANCELLED"}
+
+        start_time = time.perf_counter()
+
+        # Every node tree is built once, when the deferred updates end
+        MSFS_Material_Property_Update.begin_deferred_updates()
+        try:
+            for mat in materials:
+                values = {}
+                if self.map_principled and mat.msfs_material_type == "NONE":
+                    values = MSFS_OT_ApplyMaterialType.read_principled(mat)
+
+                mat.use_nodes = True
+                mat.msfs_material_type = self.material_type
+
+                # Set after the type, which resets some properties to the defaults of the type
+                for prop, value in values.items():
+                    setattr(mat, prop, value)
+        finally:
+            MSFS_Material_Property_Update.end_deferred_updates()
+
+        elapsed = time.perf_counter() - start_time
+        message = "Converted %d material(s) in %.2f s (%.0f materials/s)" % (len(materials), elapsed, len(materials) / max(elapsed, 1e-6))
+        print("[ASOBO] " + message)
+        self.report({'INFO'}, message)
+        return {"FINISHED"}
+
+
+class MSFS_OT_RebuildMaterialNodeTrees(bpy.types.Operator):
+    """Rebuild the node trees of all MSFS materials, to apply the "Use Shared Node Groups" preference to existing materials.\nWARNING: Changes made by hand to their shader nodes are lost"""
+
+    bl_idname = "msfs.rebuild_material_node_trees"
+    bl_label = "Rebuild MSFS Material Node Trees"
+    bl_options = {"REGISTER", "UNDO"}
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_confirm(self, event)
+
+    def execute(self, context):
+        count = MSFS_Material_Property_Update.rebuild_node_trees(bpy.data.materials)
+        self.report({'INFO'}, "Rebuilt " + str(count) + " material(s)")
+        return {"FINISHED"}
+
+
 class MSFS_PT_Material(bpy.types.Panel):
     bl_label = "MSFS Material Params"
     bl_space_type = "PROPERTIES"
@@ -182,6 +364,7 @@ class MSFS_PT_Material(bpy.types.Panel):
                 layout.operator(MSFS_OT_MigrateMaterialData.bl_idname)
 
             self.draw_prop(layout, mat, "msfs_material_type")
+            layout.operator(MSFS_OT_ApplyMaterialType.bl_idname, text="Apply Type to Several Materials")
 
             if mat.msfs_material_type != "NONE":
                 self.draw_prop(layout, mat, "msfs_base_color_factor")
@@ -34,104 +34,123 @@ from .msfs_material_function import MSFS_Material
 
 class MSFS_Material_Property_Update:
 
+    material_classes = {
+        "msfs_standard": MSFS_Standard,
+        "msfs_geo_decal": MSFS_Geo_Decal,
+        "msfs_geo_decal_frosted": MSFS_Geo_Decal_Frosted,
+        "msfs_windshield": MSFS_Windshield,
+        "msfs_porthole": MSFS_Porthole,
+        "msfs_glass": MSFS_Glass,
+        "msfs_clearcoat": MSFS_Clearcoat,
+        "msfs_parallax": MSFS_Parallax,
+        "msfs_anisotropic": MSFS_Anisotropic,
+        "msfs_hair": MSFS_Hair,
+        "msfs_sss": MSFS_SSS,
+        "msfs_invisible": MSFS_Invisible,
+        "msfs_fake_terrain": MSFS_Fake_Terrain,
+        "msfs_fresnel_fade": MSFS_Fresnel_Fade,
+        "msfs_environment_occluder": MSFS_Environment_Occluder,
+        "msfs_ghost": MSFS_Ghost,
+    }
+
+    # Materials updated while the updates are deferred, keyed on their pointer, with whether their material type changed
+    deferred_materials = None
+    deferred_depth = 0
+
+    @staticmethod
+    def begin_deferred_updates():
+        # Property updates only record the material until end_deferred_updates, which builds each node tree once
+        if MSFS_Material_Property_Update.deferred_depth == 0:
+            MSFS_Material_Property_Update.deferred_materials = {}
+        MSFS_Material_Property_Update.deferred_depth += 1
+
+    @staticmethod
+    def end_deferred_updates():
+        MSFS_Material_Property_Update.deferred_depth -= 1
+        if MSFS_Material_Property_Update.deferred_depth > 0:
+            return
+
+        deferred_materials = MSFS_Material_Property_Update.deferred_materials
+        MSFS_Material_Property_Update.deferred_materials = None
+
+        for mat, type_changed in deferred_materials.values():
+            if type_changed:
+                MSFS_Material_Property_Update.build_shader_tree(mat)
+            else:
+                msfs = MSFS_Material_Property_Update.getMaterial(mat)
+                if msfs is not None:
+                    msfs.force_update_properties()
+                else:
+                    # Materials without an MSFS type are only deferred by an alpha mode update
+                    MSFS_Material(mat).setBlendMode(mat.msfs_alpha_mode)
+
+    @staticmethod
+    def defer(mat, type_changed=False):
+        deferred_materials = MSFS_Material_Property_Update.deferred_materials
+        if deferred_materials is None:
+            return False
+
+        key = mat.as_pointer()
+        if key in deferred_materials:
+            type_changed = type_changed or deferred_materials[key][1]
+        deferred_materials[key] = (mat, type_changed)
+        return True
+
     @staticmethod
     def getMaterial(mat):
-        if mat.msfs_material_type == "msfs_standard":
-            return MSFS_Standard(mat)
-        elif mat.msfs_material_type == "msfs_geo_decal":
-            return MSFS_Geo_Decal(mat)
-        elif mat.msfs_material_type == "msfs_geo_decal_frosted":
-            return MSFS_Geo_Decal_Frosted(mat)
-        elif mat.msfs_material_type == "msfs_windshield":
-            return MSFS_Windshield(mat)
-        elif mat.msfs_material_type == "msfs_porthole":
-            return MSFS_Porthole(mat)
-        elif mat.msfs_material_type == "msfs_glass":
-            return MSFS_Glass(mat)
-        elif mat.msfs_material_type == "msfs_clearcoat":
-            return MSFS_Clearcoat(mat)
-        elif mat.msfs_material_type == "msfs_parallax":
-            return MSFS_Parallax(mat)
-        elif mat.msfs_material_type == "msfs_anisotropic":
-            return MSFS_Anisotropic(mat)
-        elif mat.msfs_material_type == "msfs_hair":
-            return MSFS_Hair(mat)
-        elif mat.msfs_material_type == "msfs_sss":
-            return MSFS_SSS(mat)
-        elif mat.msfs_material_type == "msfs_invisible":
-            return MSFS_Invisible(mat)
-        elif mat.msfs_material_type == "msfs_fake_terrain":
-            return MSFS_Fake_Terrain(mat)
-        elif mat.msfs_material_type == "msfs_fresnel_fade":
-            return MSFS_Fresnel_Fade(mat)
-        elif mat.msfs_material_type == "msfs_environment_occluder":
-            return MSFS_Environment_Occluder(mat)
-        elif mat.msfs_material_type == "msfs_ghost":
-            return MSFS_Ghost(mat)
+        material_class = MSFS_Material_Property_Update.material_classes.get(mat.msfs_material_type)
+        if material_class is None or MSFS_Material_Property_Update.defer(mat):
+            return None
+        return material_class(mat)
 
     @staticmethod
-    def update_msfs_material_type(self, context):
-        msfs_mat = None
-        if self.msfs_material_type == "msfs_standard":
-            msfs_mat = MSFS_Standard(self, buildTree=True)
+    def build_shader_tree(mat):
+        material_class = MSFS_Material_Property_Update.material_classes.get(mat.msfs_material_type)
+        if material_class is not None:
+            material_class(mat, buildTree=True)
+        else:
+            msfs_mat = MSFS_Material(mat)
+            msfs_mat.revertToPBRShaderTree()
+
+    @staticmethod
+    def set_material_type_defaults(self):
+        if self.msfs_material_type in ("msfs_standard", "msfs_porthole", "msfs_clearcoat", "msfs_anisotropic", "msfs_hair", "msfs_sss", "msfs_fake_terrain"):
             self.msfs_alpha_mode = "OPAQUE"
-        elif self.msfs_material_type == "msfs_geo_decal":
-            msfs_mat = MSFS_Geo_Decal(self, buildTree=True)
-            self.msfs_alpha_mode = "BLEND"
-        elif self.msfs_material_type == "msfs_geo_decal_frosted":
-            msfs_mat = MSFS_Geo_Decal_Frosted(self, buildTree=True)
+        elif self.msfs_material_type in ("msfs_geo_decal", "msfs_geo_decal_frosted", "msfs_fresnel_fade"):
             self.msfs_alpha_mode = "BLEND"
-        elif self.msfs_material_type == "msfs_windshield":
-            msfs_mat = MSFS_Windshield(self, buildTree=True)
+        elif self.msfs_material_type in ("msfs_windshield", "msfs_glass"):
             self.msfs_alpha_mode = "BLEND"
             self.msfs_metallic_factor = 0.0
-        elif self.msfs_material_type == "msfs_porthole":
-            msfs_mat = MSFS_Porthole(self, buildTree=True)
-            self.msfs_alpha_mode = "OPAQUE"
-        elif self.msfs_material_type == "msfs_glass":
-            msfs_mat = MSFS_Glass(self, buildTree=True)
-            self.msfs_alpha_mode = "BLEND"
-            self.msfs_metallic_factor = 0.0
-        elif self.msfs_material_type == "msfs_clearcoat":
-            msfs_mat = MSFS_Clearcoat(self, buildTree=True)
-            self.msfs_alpha_mode = "OPAQUE"
         elif self.msfs_material_type == "msfs_parallax":
-            msfs_mat = MSFS_Parallax(self, buildTree=True)
             self.msfs_alpha_mode = "MASK"
-        elif self.msfs_material_type == "msfs_anisotropic":
-            msfs_mat = MSFS_Anisotropic(self, buildTree=True)
-            self.msfs_alpha_mode = "OPAQUE"
-        elif self.msfs_material_type == "msfs_hair":
-            msfs_mat = MSFS_Hair(self, buildTree=True)
-            self.msfs_alpha_mode = "OPAQUE"
-        elif self.msfs_material_type == "msfs_sss":
-            msfs_mat = MSFS_SSS(self, buildTree=True)
-            self.msfs_alpha_mode = "OPAQUE"
-        elif self.msfs_material_type == "msfs_invisible":
-            msfs_mat = MSFS_Invisible(self, buildTree=True)
-            self.msfs_no_cast_shadow = True
-            self.msfs_alpha_mode = "BLEND"
-        elif self.msfs_material_type == "msfs_fake_terrain":
-            msfs_mat = MSFS_Fake_Terrain(self, buildTree=True)
-            self.msfs_alpha_mode = "OPAQUE"
-        elif self.msfs_material_type == "msfs_fresnel_fade":
-            msfs_mat = MSFS_Fresnel_Fade(self, buildTree=True)
-            self.msfs_alpha_mode = "BLEND"
-        elif self.msfs_material_type == "msfs_environment_occluder":
-            msfs_mat = MSFS_Environment_Occluder(self, buildTree=True)
-            self.msfs_no_cast_shadow = True
-            self.msfs_alpha_mode = "BLEND"
-        elif self.msfs_material_type == "msfs_ghost":
-            msfs_mat = MSFS_Ghost(self, buildTree=True)
+        elif self.msfs_material_type in ("msfs_invisible", "msfs_environment_occluder", "msfs_ghost"):
             self.msfs_no_cast_shadow = True
             self.msfs_alpha_mode = "BLEND"
         else:
             MSFS_Material_Property_Update.reset_material_prop_object(self)
-            msfs_mat = MSFS_Material(self)
-            msfs_mat.revertToPBRShaderTree()
             self.msfs_alpha_mode = "OPAQUE"
-            return
+
+    @staticmethod
+    def update_msfs_material_type(self, context):
+        # While updates are deferred only the property defaults are set, the node tree is built afterwards
+        if not MSFS_Material_Property_Update.defer(self, type_changed=True):
+            MSFS_Material_Property_Update.build_shader_tree(self)
+        MSFS_Material_Property_Update.set_material_type_defaults(self)
     
+    @staticmethod
+    def rebuild_node_trees(materials):
+        # Build the node tree of the MSFS materials again from their properties, in one deferred batch
+        count = 0
+        MSFS_Material_Property_Update.begin_deferred_updates()
+        try:
+            for mat in materials:
+                if mat.library is None and mat.msfs_material_type in MSFS_Material_Property_Update.material_classes:
+                    MSFS_Material_Property_Update.defer(mat, type_changed=True)
+                    count += 1
+        finally:
+            MSFS_Material_Property_Update.end_deferred_updates()
+        return count
+
     @staticmethod
     def reset_material_prop_object(self):
         self.msfs_alpha_cutoff = 0.5
@@ -266,6 +285,8 @@ class MSFS_Material_Property_Update:
 
     @staticmethod
     def update_alpha_mode(self, context):
+        if MSFS_Material_Property_Update.defer(self):
+            return
         msfs_mat = MSFS_Material(self)
         msfs_mat.setBlendMode(self.msfs_alpha_mode)
 
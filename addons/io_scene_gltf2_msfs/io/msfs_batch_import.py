@@ -0,0 +1,377 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import contextlib
+import json
+import logging
+import os
+import struct
+import urllib.parse
+import xml.etree.ElementTree as etree
+from concurrent.futures import ThreadPoolExecutor
+
+import bpy
+from bpy_extras.io_utils import ImportHelper
+from io_scene_gltf2.io.imp.gltf2_io_gltf import glTFImporter
+
+from .msfs_multi_export_objects import MSFS_OT_ReloadLODGroups
+
+
+class MSFS_BatchImportUtility:
+    """
+    Finds the glTF files of an MSFS package, and checks and decodes them before they are imported.
+    Files are decoded in worker threads, a few files ahead of the one being imported. The glTF importer then creates the
+    Blender data from the decoded JSON and buffers on the main thread instead of reading the file again.
+    """
+
+    # Number of files decoded ahead of the import
+    prefetch_count = 4
+
+    def __new__(cls, *args, **kwargs):
+        raise RuntimeError("%s should not be instantiated" % cls)
+
+    @staticmethod
+    def read_model_info(xml_path):
+        # Returns the LOD files of a ModelInfo XML with their minimum size, the last LOD has none
+        lods = []
+        root = etree.parse(xml_path).getroot()
+        if root.tag != "ModelInfo":
+            return lods
+
+        for lod_element in root.iter("LOD"):
+            model_file = lod_element.get("ModelFile")
+            if not model_file:
+                continue
+
+            min_size = lod_element.get("minSize")
+            lods.append((
+                os.path.normpath(os.path.join(os.path.dirname(xml_path), model_file)),
+                int(float(min_size)) if min_size is not None else None
+            ))
+        return lods
+
+    @staticmethod
+    def gather_models(file_paths):
+        # Group the files to import by model, the LODs of a ModelInfo XML make one model and other files are imported on their own
+        models = []
+        gltf_paths = []
+        for file_path in file_paths:
+            if file_path.lower().endswith(".xml"):
+                try:
+                    lods = MSFS_BatchImportUtility.read_model_info(file_path)
+                except (OSError, etree.ParseError) as e:
+                    print("[ASOBO] Skipping " + file_path + ": " + str(e))
+                    continue
+
+                if lods:
+                    models.append({"xml_path": file_path, "lods": lods})
+            elif file_path.lower().endswith((".gltf", ".glb")):
+                gltf_paths.append(os.path.normpath(file_path))
+
+        in_model = {os.path.normcase(path) for model in models for path, _ in model["lods"]}
+        for gltf_path in gltf_paths:
+            if os.path.normcase(gltf_path) not in in_model:
+                models.append({"xml_path": None, "lods": [(gltf_path, None)]})
+
+        return models
+
+    @staticmethod
+    def read_gltf_json(file_path):
+        with open(file_path, "rb") as f:
+            if not file_path.lower().endswith(".glb"):
+                return json.loads(f.read().decode("utf-8")), None
+
+            magic, version, _ = struct.unpack("<4sII", f.read(12))
+            if magic != b"glTF" or version != 2:
+                raise ValueError("not a glTF 2.0 binary file")
+
+            chunk_length, chunk_type = struct.unpack("<II", f.read(8))
+            if chunk_type != 0x4E4F534A:
+                raise ValueError("the first chunk of the file isn't JSON")
+            gltf = json.loads(f.read(chunk_length).decode("utf-8"))
+
+            binary_length = 0
+            header = f.read(8)
+            if len(header) == 8:
+                binary_length = struct.unpack("<II", header)[0]
+            return gltf, binary_length
+
+    @staticmethod
+    def validate_gltf(file_path):
+        try:
+            gltf, binary_length = MSFS_BatchImportUtility.read_gltf_json(file_path)
+            if gltf.get("asset", {}).get("version", "").split(".")[0] != "2":
+                return "unsupported glTF version"
+
+            for i, buffer in enumerate(gltf.get("buffers", [])):
+                uri = buffer.get("uri")
+                if uri is None:
+                    if binary_length is None or binary_length < buffer.get("byteLength", 0):
+                        return "buffer " + str(i) + " is missing from the binary chunk"
+                    continue
+                if uri.startswith("data:"):
+                    continue
+
+                buffer_path = os.path.join(os.path.dirname(file_path), urllib.parse.unquote(uri))
+                if not os.path.isfile(buffer_path):
+                    return "missing buffer " + uri
+                if os.path.getsize(buffer_path) < buffer.get("byteLength", 0):
+                    return "buffer " + uri + " is smaller than its byteLength"
+        except (OSError, ValueError, struct.error) as e:
+            return str(e)
+
+        return None
+
+    @staticmethod
+    def decode_gltf(file_path):
+        # Runs in a worker thread, only reads files and doesn't touch Blender data. Returns an error, or the file read
+        # by the glTF importer with all its buffers loaded
+        error = MSFS_BatchImportUtility.validate_gltf(file_path)
+        if error is not None:
+            return error, None
+
+        try:
+            decoded = glTFImporter(file_path, {"import_user_extensions": [], "loglevel": logging.CRITICAL})
+            decoded.read()
+            for i in range(len(decoded.data.buffers or [])):
+                decoded.load_buffer(i)
+        except Exception as e:
+            # The importer reads the file again by itself and reports what is wrong with it
+            print("[ASOBO] Couldn't decode " + file_path + " ahead of the import: " + str(e))
+            decoded = None
+
+        return None, decoded
+
+    @staticmethod
+    def decode_files(file_paths):
+        # Yields the results of decode_gltf in order, while the next files are decoded
+        worker_count = min(MSFS_BatchImportUtility.prefetch_count, os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=worker_count) as executor:
+            futures = collections.deque()
+            paths = iter(file_paths)
+
+            for file_path in paths:
+                futures.append(executor.submit(MSFS_BatchImportUtility.decode_gltf, file_path))
+                if len(futures) >= MSFS_BatchImportUtility.prefetch_count:
+                    break
+
+            while futures:
+                result = futures.popleft().result()
+                next_path = next(paths, None)
+                if next_path is not None:
+                    futures.append(executor.submit(MSFS_BatchImportUtility.decode_gltf, next_path))
+                yield result
+
+    @staticmethod
+    @contextlib.contextmanager
+    def use_decoded_file(decoded):
+        # The glTF importer reads the file in glTFImporter.read, give it the decoded data instead
+        if decoded is None:
+            yield
+            return
+
+        read = glTFImporter.read
+        file_path = os.path.normcase(os.path.abspath(decoded.filename))
+
+        def read_decoded(importer):
+            if os.path.normcase(os.path.abspath(importer.filename)) != file_path:
+                return read(importer)
+
+            importer.data = decoded.data
+            importer.glb_buffer = decoded.glb_buffer
+            importer.buffers.update(decoded.buffers)
+
+        glTFImporter.read = read_decoded
+        try:
+            yield
+        finally:
+            glTFImporter.read = read
+
+    @staticmethod
+    def get_image_key(image):
+        if image.packed_file is not None or image.source != "FILE":
+            return None
+        return os.path.normcase(os.path.abspath(bpy.path.abspath(image.filepath, library=image.library)))
+
+    @staticmethod
+    def merge_images(images_by_path, new_images):
+        # Images with the same file as an image that was already imported are replaced by it
+        for image in new_images:
+            key = MSFS_BatchImportUtility.get_image_key(image)
+            if key is None:
+                continue
+
+            existing_image = images_by_path.get(key)
+            if existing_image is None:
+                images_by_path[key] = image
+            else:
+                image.user_remap(existing_image)
+                bpy.data.images.remove(image)
+
+    @staticmethod
+    def remove_collection(collection):
+        # Also removes what a failed import left in the collection, which would otherwise stay orphaned.
+        # Collection.children_recursive is only available from Blender 3.2
+        found = []
+        stack = [collection]
+        while stack:
+            child = stack.pop()
+            if child not in found:
+                found.append(child)
+                stack.extend(child.children)
+
+        for obj in list(collection.all_objects):
+            bpy.data.objects.remove(obj, do_unlink=True)
+        for child in found:
+            bpy.data.collections.remove(child)
+
+    @staticmethod
+    def find_layer_collection(layer_collection, collection):
+        stack = [layer_collection]
+        while stack:
+            layer_collection = stack.pop()
+            if layer_collection.collection == collection:
+                return layer_collection
+            stack.extend(layer_collection.children)
+        return None
+
+
+class MSFS_OT_BatchImportGLTF2(bpy.types.Operator, ImportHelper):
+    bl_idname = "msfs.batch_import_gltf"
+    bl_label = "Import MSFS Package"
+    bl_description = "Import several glTF files, the LODs of ModelInfo XML files or a whole folder, and create their LOD groups"
+    bl_options = {"REGISTER", "UNDO"}
+
+    filter_glob: bpy.props.StringProperty(default="*.gltf;*.glb;*.xml", options={"HIDDEN"})
+
+    files: bpy.props.CollectionProperty(type=bpy.types.OperatorFileListElement, options={"HIDDEN", "SKIP_SAVE"})
+
+    directory: bpy.props.StringProperty(subtype="DIR_PATH")
+
+    def get_file_paths(self):
+        file_paths = [os.path.join(self.directory, file.name) for file in self.files if file.name]
+
+        # Nothing selected, import the whole folder
+        if not file_paths and os.path.isdir(self.directory):
+            file_paths = [
+                os.path.join(self.directory, file_name)
+                for file_name in sorted(os.listdir(self.directory))
+                if file_name.lower().endswith((".gltf", ".glb", ".xml"))
+            ]
+        return file_paths
+
+    def execute(self, context):
+        models = MSFS_BatchImportUtility.gather_models(self.get_file_paths())
+        if not models:
+            self.report({'ERROR'}, "[IMPORT][ERROR] No glTF files or ModelInfo XML files to import")
+            return {"CANCELLED"}
+
+        lods = [(model, file_path, min_size) for model in models for file_path, min_size in model["lods"]]
+        gltf_paths = [file_path for _, file_path, _ in lods]
+
+        images_by_path = {}
+        for image in bpy.data.images:
+            key = MSFS_BatchImportUtility.get_image_key(image)
+            if key is not None:
+                images_by_path.setdefault(key, image)
+
+        imported = {}
+        wm = context.window_manager
+        wm.progress_begin(0, len(gltf_paths))
+
+        # The LOD groups are created once at the end instead of being reloaded after every imported file. The depsgraph
+        # updates of the import are only sent once the operator returns, the automatic reload resumes after them
+        MSFS_OT_ReloadLODGroups.suspend_auto_reload()
+        try:
+            for (model, file_path, min_size), (error, decoded) in zip(lods, MSFS_BatchImportUtility.decode_files(gltf_paths)):
+                if error is not None:
+                    self.report({'ERROR'}, "[IMPORT][ERROR] " + os.path.basename(file_path) + ": " + error)
+                    continue
+
+                # Each file is imported in its own collection, which becomes a LOD of the multi-exporter
+                collection = bpy.data.collections.new(os.path.splitext(os.path.basename(file_path))[0])
+                context.scene.collection.children.link(collection)
+                context.view_layer.active_layer_collection = MSFS_BatchImportUtility.find_layer_collection(
+                    context.view_layer.layer_collection, collection
+                )
+
+                images = set(bpy.data.images)
+                try:
+                    with MSFS_BatchImportUtility.use_decoded_file(decoded):
+                        bpy.ops.import_scene.gltf(filepath=file_path)
+                except RuntimeError as e:
+                    self.report({'ERROR'}, "[IMPORT][ERROR] " + os.path.basename(file_path) + ": " + str(e))
+                    MSFS_BatchImportUtility.remove_collection(collection)
+                    continue
+                MSFS_BatchImportUtility.merge_images(images_by_path, [image for image in bpy.data.images if image not in images])
+
+                imported[collection.name] = (model, min_size)
+                wm.progress_update(len(imported))
+                print("[ASOBO] Imported " + file_path + " (" + str(len(imported)) + "/" + str(len(gltf_paths)) + ")")
+        finally:
+            wm.progress_end()
+
+        context.view_layer.active_layer_collection = context.view_layer.layer_collection
+        self.create_lod_groups(context, imported)
+
+        self.report({'INFO'}, "Imported " + str(len(imported)) + " of " + str(len(gltf_paths)) + " file(s)")
+        return {"FINISHED"}
+
+    @staticmethod
+    def create_lod_groups(context, imported):
+        # The LODs are added in the grouping mode chosen by the user, without reloading their other LOD groups
+        sort_by_collection = context.scene.multi_exporter_grouped_by_collections
+
+        lod_items = {}
+        for collection_name, model_info in imported.items():
+            collection = bpy.data.collections.get(collection_name)
+            if collection is None:
+                continue
+            if sort_by_collection:
+                lod_items[collection] = model_info
+            else:
+                for obj in collection.objects:
+                    if obj.parent is None:
+                        lod_items[obj] = model_info
+
+        # The automatic reload is still suspended by execute
+        MSFS_OT_ReloadLODGroups.add_lods(context, list(lod_items.keys()))
+
+        for lod_group in context.scene.msfs_multi_exporter_lod_groups:
+            for lod in lod_group.lods:
+                item = lod.collection if sort_by_collection else lod.object
+                if item is None or item not in lod_items:
+                    continue
+
+                model, min_size = lod_items[item]
+                lod.enabled = True
+                if min_size is not None:
+                    lod.lod_value = min(999, max(0, min_size))
+
+                if model["xml_path"] is not None:
+                    lod_group.folder_name = os.path.dirname(model["xml_path"])
+                    lod_group.generate_xml = True
+
+
+def menu_func_import(self, context):
+    self.layout.operator(MSFS_OT_BatchImportGLTF2.bl_idname, text="MSFS Package (.gltf/.xml)")
+
+
+def register():
+    bpy.types.TOPBAR_MT_file_import.append(menu_func_import)
+
+
+def unregister():
+    bpy.types.TOPBAR_MT_file_import.remove(menu_func_import)
@@ -12,60 +12,89 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import contextlib
 import os
 import urllib
 
 from .. import get_version_string
 from .msfs_gizmo import MSFSGizmo
+from .msfs_image_pool import MSFSImagePool
 from .msfs_light import MSFSLight
 from .msfs_material import MSFSMaterial
 from .msfs_unique_id import MSFS_unique_id
 
 
 class Export:
-    
+    profiler = None
+
+    def measure(self, name):
+        if self.profiler is None:
+            return contextlib.nullcontext()
+        return self.profiler.measure(name)
+
     def gather_asset_hook(self, gltf2_asset, export_settings):
-        if self.properties.enabled == True:
-            if gltf2_asset.extensions is None:
-                gltf2_asset.extensions = {}
-            gltf2_asset.extensions["ASOBO_normal_map_convention"] = self.Extension(
-                name="ASOBO_normal_map_convention",
-                extension={"tangent_space_convention": "DirectX"},
-                required=False
-            )
+        with self.measure("gather_asset_hook"):
+            if self.properties.enabled == True:
+                if gltf2_asset.extensions is None:
+                    gltf2_asset.extensions = {}
+                gltf2_asset.extensions["ASOBO_normal_map_convention"] = self.Extension(
+                    name="ASOBO_normal_map_convention",
+                    extension={"tangent_space_convention": "DirectX"},
+                    required=False
+                )
 
-            gltf2_asset.generator += " and Asobo Studio MSFS Blender I/O v" + get_version_string()
+                gltf2_asset.generator += " and Asobo Studio MSFS Blender I/O v" + get_version_string()
 
     def gather_gltf_extensions_hook(self, gltf2_plan, export_settings):
-        if self.properties.enabled:
-            for i, image in enumerate(gltf2_plan.images):
-                image.uri = os.path.basename(urllib.parse.unquote(image.uri))
+        with self.measure("gather_gltf_extensions_hook"):
+            if self.properties.enabled:
+                for i, image in enumerate(gltf2_plan.images):
+                    image.uri = os.path.basename(urllib.parse.unquote(image.uri))
+
+                texture_cache = export_settings.get("msfs_texture_cache")
+                if texture_cache is not None:
+                    texture_cache.save()
+
+        # This is the last hook called by the exporter, write the profiling report
+        if self.profiler is not None:
+            report_path = self.profiler.write_report(export_settings["gltf_filepath"], self.properties.profiler_report_format)
+            print("[ASOBO] Export profile written to " + report_path)
 
     def gather_node_hook(self, gltf2_object, blender_object, export_settings):
-        if self.properties.enabled:
+        with self.measure("gather_node_hook"):
+            if self.properties.enabled:
+
+                if gltf2_object.extensions is None:
+                    gltf2_object.extensions = {}
 
-            if gltf2_object.extensions is None:
-                gltf2_object.extensions = {}
+                if self.properties.use_unique_id:
+                    MSFS_unique_id.export(gltf2_object, blender_object)
 
-            if self.properties.use_unique_id:
-                MSFS_unique_id.export(gltf2_object, blender_object)
+                if blender_object.type == 'LIGHT':
+                    MSFSLight.export(gltf2_object, blender_object)
 
-            if blender_object.type == 'LIGHT':
-                MSFSLight.export(gltf2_object, blender_object)
-    
     def gather_joint_hook(self, gltf2_node, blender_bone, export_settings):
-        if self.properties.enabled:
+        with self.measure("gather_joint_hook"):
+            if self.properties.enabled:
 
-            if gltf2_node.extensions is None:
-                gltf2_node.extensions = {}
+                if gltf2_node.extensions is None:
+                    gltf2_node.extensions = {}
 
-            if self.properties.use_unique_id:
-                MSFS_unique_id.export(gltf2_node, blender_bone)
+                if self.properties.use_unique_id:
+                    MSFS_unique_id.export(gltf2_node, blender_bone)
 
     def gather_scene_hook(self, gltf2_scene, blender_scene, export_settings):
-        if self.properties.enabled:
-            MSFSGizmo.export(gltf2_scene.nodes, blender_scene, export_settings)
+        with self.measure("gather_scene_hook"):
+            if self.properties.enabled:
+                MSFSGizmo.export(gltf2_scene.nodes, blender_scene, export_settings)
+
+    # The arguments of this hook changed across glTF exporter versions, the export settings are always last
+    def gather_image_hook(self, gltf2_image, *args):
+        with self.measure("gather_image_hook"):
+            if self.properties.enabled:
+                MSFSImagePool.pool_image(gltf2_image, args[-1])
 
     def gather_material_hook(self, gltf2_material, blender_material, export_settings):
-        if self.properties.enabled:
-            MSFSMaterial.export(gltf2_material, blender_material, export_settings)
+        with self.measure("gather_material_hook"):
+            if self.properties.enabled:
+                MSFSMaterial.export(gltf2_material, blender_material, export_settings, self.profiler)
@@ -13,16 +13,20 @@
 # limitations under the License.
 
 import bpy
-import math
+from bpy.app.handlers import persistent
 
 from io_scene_gltf2.io.com.gltf2_io import Node
 from io_scene_gltf2.io.com.gltf2_io_extensions import Extension
 
+from .msfs_gizmo_scale import get_export_params, get_import_scales
+
 
 class MSFSGizmo:
     bl_options = {"UNDO"}
 
     extension_name = "ASOBO_gizmo_object"
+    # Scenes saved with an older version keep the gizmo radius rule they were authored with when loaded
+    radius_version = 1
 
     def __new__(cls, *args, **kwargs):
         raise RuntimeError("%s should not be instantiated" % cls)
@@ -32,6 +36,7 @@ class MSFSGizmo:
         """
         Create a "fake" node in the glTF scene to let the gizmo TRS get applied properly relative to the parent
         """
+        gizmos = []
         nodes = gltf_scene.nodes
         for node_idx in nodes:
             node = import_settings.data.nodes[node_idx]
@@ -44,56 +49,48 @@ class MSFSGizmo:
                 continue
 
             for gizmo_object in extension.get("gizmo_objects"):
-                gizmo_type = gizmo_object.get("type")
-                params = gizmo_object.get("params", {})
-
-                scale = [1.0, 1.0, 1.0]
-                if gizmo_type == "sphere":
-                    scale[0] = params.get("radius")
-                    scale[1] = params.get("radius")
-                    scale[2] = params.get("radius")
-                elif gizmo_type == "box":
-                    scale[0] = params.get("length") / 2
-                    scale[1] = params.get("width") / 2
-                    scale[2] = params.get("height") / 2
-                elif gizmo_type == "cylinder":
-                    scale[0] = params.get("radius")
-                    scale[1] = params.get("radius")
-                    scale[2] = params.get("height")
-
-                # Flip scale to convert from MSFS gizmo scale system
-                scale = [scale[1], scale[2], scale[0]]
-
-                placeholder_extension = {
-                    "gizmo_blender_data": {
-                        "road_collider": "Road"
-                        in gizmo_object.get("extensions", {})
-                        .get("ASOBO_tags", {})
-                        .get("tags", {}),
-                        "gizmo_type": gizmo_type,
-                    }
-                }
+                gizmos.append((node, gizmo_object))
 
-                # Create new placeholder node
-                placeholder_node = Node(
-                    camera=None,
-                    children=None,
-                    extensions=placeholder_extension,
-                    extras=None,
-                    matrix=None,
-                    mesh=None,
-                    name="Gizmo",
-                    rotation=gizmo_object.get("rotation"),
-                    scale=scale,
-                    skin=None,
-                    translation=gizmo_object.get("translation"),
-                    weights=None,
-                )
+        if not gizmos:
+            return
 
-                import_settings.data.nodes.append(placeholder_node)
-                if node.children is None:
-                    node.children = []
-                node.children.append(len(import_settings.data.nodes) - 1)
+        scales = get_import_scales(
+            [gizmo_object.get("type") for _, gizmo_object in gizmos],
+            [gizmo_object.get("params", {}) for _, gizmo_object in gizmos],
+            MSFSGizmo.uses_legacy_radius(bpy.context.scene),
+        )
+
+        for (node, gizmo_object), scale in zip(gizmos, scales.tolist()):
+            placeholder_extension = {
+                "gizmo_blender_data": {
+                    "road_collider": "Road"
+                    in gizmo_object.get("extensions", {})
+                    .get("ASOBO_tags", {})
+                    .get("tags", {}),
+                    "gizmo_type": gizmo_object.get("type"),
+                }
+            }
+
+            # Create new placeholder node
+            placeholder_node = Node(
+                camera=None,
+                children=None,
+                extensions=placeholder_extension,
+                extras=None,
+                matrix=None,
+                mesh=None,
+                name="Gizmo",
+                rotation=gizmo_object.get("rotation"),
+                scale=scale,
+                skin=None,
+                translation=gizmo_object.get("translation"),
+                weights=None,
+            )
+
+            import_settings.data.nodes.append(placeholder_node)
+            if node.children is None:
+                node.children = []
+            node.children.append(len(import_settings.data.nodes) - 1)
 
     @staticmethod
     def set_blender_data(gltf2_node, blender_object, import_settings):
@@ -127,70 +124,124 @@ class MSFSGizmo:
         Let the Khronos exporter gather the gizmo to calculate the proper TRS with the parent to make sure everything is correct,
         then remove the gizmo from the collected nodes and set the proper mesh extensions
         """
-        for node in nodes:
-            collisions = []  # TODO: make sure node is mesh?
-            for child in list(node.children):
-                blender_object = blender_scene.objects.get(
-                    child.name
-                )  # The glTF exporter will ALWAYS set the node name as the blender name
-
-                if blender_object is None: # However, there are cases where the exporter creates fake nodes that don't exist in the scene
-                    continue
+        # The glTF exporter will ALWAYS set the node name as the blender name. We only need the collision gizmos that are parented to a mesh
+        gizmo_objects = {
+            blender_object.name: blender_object
+            for blender_object in blender_scene.objects
+            if blender_object.msfs_gizmo_type != "NONE" and blender_object.parent is not None and blender_object.parent.type == "MESH"
+        }
+        if not gizmo_objects:
+            return
+
+        # Walk the node tree with a stack, deep hierarchies would hit the recursion limit
+        gizmos = []
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            if not node.children:
+                continue
+
+            children = []
+            found = False
+            for child in node.children:
+                blender_object = gizmo_objects.get(child.name)
 
-                if (
-                    blender_object.parent is None or blender_object.parent.type != "MESH"
-                ):  # We only need the collision gizmos that are parented to a mesh
+                # There are also cases where the exporter creates fake nodes that don't exist in the scene
+                if blender_object is None:
+                    children.append(child)
                     continue
 
-                if blender_object.msfs_gizmo_type != "NONE":
-                    result = {}
-                    result["type"] = blender_object.msfs_gizmo_type
-                    result["translation"] = child.translation
-                    if child.rotation:
-                        result["rotation"] = child.rotation
-
-                    if child.scale is None: # If the scale is default, it will be exported as None which will raise an error here
-                        child.scale = [1.0, 1.0, 1.0]
-
-                    # Flip scale to match MSFS gizmo scale system
-                    if export_settings["gltf_yup"]:
-                        child.scale = [child.scale[2], child.scale[0], child.scale[1]]
-                    else:
-                        child.scale = [child.scale[1], child.scale[0], child.scale[2]]
-
-                    # Calculate scale per gizmo type
-                    scale = {}
-                    if blender_object.msfs_gizmo_type == "sphere":
-                        scale["radius"] = abs(child.scale[0] * child.scale[1] * child.scale[2])
-                    elif blender_object.msfs_gizmo_type == "box":
-                        scale["length"] = abs(child.scale[0]) * 2
-                        scale["width"] = abs(child.scale[1]) * 2
-                        scale["height"] = abs(child.scale[2]) * 2
-                    elif blender_object.msfs_gizmo_type == "cylinder":
-                        scale["radius"] = abs(child.scale[0] * child.scale[1])
-                        scale["height"] = abs(child.scale[2])
-
-                    result["params"] = scale
-
-                    # Collision type
-                    tags = ["Collision"]
-                    if blender_object.msfs_collision_is_road_collider:
-                        tags.append("Road")
-
-                    result["extensions"] = {
-                        "ASOBO_tags": Extension(
-                            name="ASOBO_tags", extension={"tags": tags}, required=False
-                        )
-                    }
-
-                    collisions.append(result)
-                    node.children.remove(child)
-
-            if collisions:
-                node.mesh.extensions[MSFSGizmo.extension_name] = Extension(
-                    name=MSFSGizmo.extension_name,
-                    extension={"gizmo_objects": collisions},
-                    required=False,
+                gizmos.append((node, child, blender_object))
+                found = True
+
+            # Remove the gizmos in one pass instead of one list.remove per gizmo
+            if found:
+                node.children = children
+
+            stack.extend(children)
+
+        if not gizmos:
+            return
+
+        # If the scale is default, it will be exported as None
+        scales = [child.scale if child.scale is not None else [1.0, 1.0, 1.0] for _, child, _ in gizmos]
+        params = get_export_params(
+            [blender_object.msfs_gizmo_type for _, _, blender_object in gizmos],
+            scales,
+            export_settings["gltf_yup"],
+            MSFSGizmo.uses_legacy_radius(blender_scene),
+        )
+
+        collisions = {}
+        for (node, child, blender_object), scale in zip(gizmos, params):
+            result = {}
+            result["type"] = blender_object.msfs_gizmo_type
+            result["translation"] = child.translation
+            if child.rotation:
+                result["rotation"] = child.rotation
+            result["params"] = scale
+
+            # Collision type
+            tags = ["Collision"]
+            if blender_object.msfs_collision_is_road_collider:
+                tags.append("Road")
+
+            result["extensions"] = {
+                "ASOBO_tags": Extension(
+                    name="ASOBO_tags", extension={"tags": tags}, required=False
                 )
+            }
+
+            collisions.setdefault(id(node), (node, []))[1].append(result)
+
+        for node, node_collisions in collisions.values():  # TODO: make sure node is mesh?
+            node.mesh.extensions[MSFSGizmo.extension_name] = Extension(
+                name=MSFSGizmo.extension_name,
+                extension={"gizmo_objects": node_collisions},
+                required=False,
+            )
+
+    @staticmethod
+    def uses_legacy_radius(blender_scene):
+        return blender_scene.msfs_exporter_properties.gizmo_radius_mode == "PRODUCT"
+
+    @staticmethod
+    def migrate_radius_mode(blender_scene):
+        """
+        Keep exporting the same radius for the sphere and cylinder gizmos of a scene saved before the largest scale rule
+        """
+        props = blender_scene.msfs_exporter_properties
+        if props.gizmo_radius_version >= MSFSGizmo.radius_version:
+            return
+
+        if any(blender_object.msfs_gizmo_type in ("sphere", "cylinder") for blender_object in blender_scene.objects):
+            props.gizmo_radius_mode = "PRODUCT"
+            print("[ASOBO] Scene " + blender_scene.name + " keeps the legacy collision gizmo radius, see the MSFS Extensions export settings")
+        props.gizmo_radius_version = MSFSGizmo.radius_version
+
+
+@persistent
+def migrate_gizmo_radius(dummy):
+    for scene in bpy.data.scenes:
+        MSFSGizmo.migrate_radius_mode(scene)
+
+
+@persistent
+def stamp_gizmo_radius_version(dummy):
+    # Scenes created in this session use the current rule, only files saved before it existed are migrated on load
+    for scene in bpy.data.scenes:
+        scene.msfs_exporter_properties.gizmo_radius_version = MSFSGizmo.radius_version
+
+
+def register():
+    bpy.app.handlers.load_post.append(migrate_gizmo_radius)
+    bpy.app.handlers.save_pre.append(stamp_gizmo_radius_version)
+
 
-            MSFSGizmo.export(node.children, blender_scene, export_settings)
+def unregister():
+    for handlers, handler in (
+        (bpy.app.handlers.load_post, migrate_gizmo_radius),
+        (bpy.app.handlers.save_pre, stamp_gizmo_radius_version),
+    ):
+        if handler in handlers:
+            handlers.remove(handler)
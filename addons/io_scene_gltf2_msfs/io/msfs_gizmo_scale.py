@@ -0,0 +1,83 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Conversions between the node scale of the collision gizmos and their ASOBO_gizmo_object params. This module doesn't
+# use bpy so it can be tested outside of Blender.
+
+import numpy as np
+
+
+def get_import_scales(gizmo_types, params, legacy_radius=False):
+    """
+    Convert the params of the gizmos to glTF node scales, the inverse of get_export_params with gltf_yup
+    """
+    gizmo_types = np.array(gizmo_types)
+    radius = np.array([p.get("radius", 1.0) for p in params], dtype=np.float64)
+    length = np.array([p.get("length", 2.0) for p in params], dtype=np.float64)
+    width = np.array([p.get("width", 2.0) for p in params], dtype=np.float64)
+    height = np.array([p.get("height", 2.0 if gizmo_type == "box" else 1.0) for gizmo_type, p in zip(gizmo_types, params)], dtype=np.float64)
+
+    scales = np.ones((len(gizmo_types), 3))
+
+    # With the legacy radius, the product of the round axes scales is the radius
+    sphere_scale = np.cbrt(radius) if legacy_radius else radius
+    cylinder_scale = np.sqrt(np.abs(radius)) if legacy_radius else radius
+
+    sphere = gizmo_types == "sphere"
+    scales[sphere] = sphere_scale[sphere][:, None]
+
+    box = gizmo_types == "box"
+    scales[box] = np.stack((length[box], width[box], height[box]), axis=1) / 2
+
+    cylinder = gizmo_types == "cylinder"
+    scales[cylinder, 0] = cylinder_scale[cylinder]
+    scales[cylinder, 1] = cylinder_scale[cylinder]
+    scales[cylinder, 2] = height[cylinder]
+
+    # Flip scale to convert from MSFS gizmo scale system
+    return scales[:, [1, 2, 0]]
+
+
+def get_export_params(gizmo_types, scales, yup, legacy_radius=False):
+    """
+    Calculate the params of each gizmo from its glTF node scale. legacy_radius uses the product of the round axes scales as
+    the radius, like the add-on versions up to 1.3.1
+    """
+    gizmo_types = np.array(gizmo_types)
+    scales = np.abs(np.array(scales, dtype=np.float64).reshape(-1, 3))
+
+    # Flip scale to match MSFS gizmo scale system
+    scales = scales[:, [2, 0, 1]] if yup else scales[:, [1, 0, 2]]
+
+    # The radius is the largest scale of the round axes, which is also the radius the gizmo is drawn with
+    if legacy_radius:
+        sphere_radius = scales.prod(axis=1).tolist()
+        cylinder_radius = scales[:, :2].prod(axis=1).tolist()
+    else:
+        sphere_radius = scales.max(axis=1).tolist()
+        cylinder_radius = scales[:, :2].max(axis=1).tolist()
+    dimensions = (scales * 2).tolist()
+    heights = scales[:, 2].tolist()
+
+    params = []
+    for i, gizmo_type in enumerate(gizmo_types.tolist()):
+        if gizmo_type == "sphere":
+            params.append({"radius": sphere_radius[i]})
+        elif gizmo_type == "box":
+            params.append({"length": dimensions[i][0], "width": dimensions[i][1], "height": dimensions[i][2]})
+        elif gizmo_type == "cylinder":
+            params.append({"radius": cylinder_radius[i], "height": heights[i]})
+        else:
+            params.append({})
+    return params
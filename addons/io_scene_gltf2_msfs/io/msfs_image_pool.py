@@ -0,0 +1,122 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import os
+import shutil
+import urllib.parse
+import uuid
+
+from io_scene_gltf2.io.exp.gltf2_io_image_data import ImageData
+
+
+class MSFSImagePool:
+    """
+    Writes each unique texture once per multi-export run.
+    Images are keyed on their encoded content and format, when a later file of the run uses the same texture in the
+    same texture folder it references the file that was already written instead of writing it again.
+    """
+
+    # Written images of the current run, keyed on (texture folder, content hash), or None outside of a run
+    images = None
+    # Content hash of every path written during the current run
+    paths = None
+
+    def __new__(cls, *args, **kwargs):
+        raise RuntimeError("%s should not be instantiated" % cls)
+
+    @staticmethod
+    def begin():
+        MSFSImagePool.images = {}
+        MSFSImagePool.paths = {}
+
+    @staticmethod
+    def end():
+        MSFSImagePool.images = None
+        MSFSImagePool.paths = None
+
+    @staticmethod
+    def is_active():
+        return MSFSImagePool.images is not None
+
+    @staticmethod
+    def get_content_hash(image_data):
+        content_hash = hashlib.sha1(image_data.mime_type.encode())
+        content_hash.update(image_data.data)
+        return content_hash.hexdigest()
+
+    @staticmethod
+    def write_image(image_data, texture_dir, content_hash):
+        name = image_data.adjusted_name()
+        path = os.path.join(texture_dir, name + image_data.file_extension)
+
+        # Another texture with the same name was already written to this folder during the run
+        if MSFSImagePool.paths.get(path, content_hash) != content_hash:
+            path = os.path.join(texture_dir, name + "_" + content_hash[:8] + image_data.file_extension)
+
+        MSFSImagePool.write_file(path, image_data.data)
+
+        MSFSImagePool.paths[path] = content_hash
+        return path
+
+    @staticmethod
+    def write_file(path, data):
+        def write(temp_path):
+            with open(temp_path, "xb") as f:
+                f.write(data)
+
+        MSFSImagePool.replace_file(path, write)
+
+    @staticmethod
+    def copy_file(source_path, path):
+        MSFSImagePool.replace_file(path, lambda temp_path: shutil.copyfile(source_path, temp_path))
+
+    @staticmethod
+    def replace_file(path, write):
+        # Parallel export workers may write the same file at the same time. Each writer uses its own temporary file in
+        # the same folder, so that the file is replaced with complete content whichever writer finishes last
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        temp_path = "%s.%d.%s.tmp" % (path, os.getpid(), uuid.uuid4().hex)
+        try:
+            write(temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    @staticmethod
+    def pool_image(gltf2_image, export_settings):
+        if not MSFSImagePool.is_active():
+            return
+
+        # Only images that are still to be written have their data as uri, embedded GLB images are left alone
+        if not isinstance(gltf2_image.uri, ImageData) or export_settings["gltf_format"] == "GLB":
+            return
+
+        texture_dir = export_settings["gltf_texturedirectory"]
+        content_hash = MSFSImagePool.get_content_hash(gltf2_image.uri)
+
+        key = (os.path.normcase(os.path.abspath(texture_dir)), content_hash)
+        path = MSFSImagePool.images.get(key)
+        if path is None or not os.path.exists(path):
+            path = MSFSImagePool.write_image(gltf2_image.uri, texture_dir, content_hash)
+            MSFSImagePool.images[key] = path
+
+        # A string uri isn't written again by the glTF exporter
+        relative_path = os.path.relpath(path, start=export_settings["gltf_filedirectory"])
+        gltf2_image.uri = urllib.parse.quote(relative_path.replace(os.sep, "/"))
@@ -12,13 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import urllib.parse
+
 import bpy
 from io_scene_gltf2.blender.exp.gltf2_blender_gather_texture_info import (
     gather_material_normal_texture_info_class,
     gather_material_occlusion_texture_info_class, gather_texture_info)
 from io_scene_gltf2.blender.imp.gltf2_blender_image import BlenderImage
+from io_scene_gltf2.io.com import gltf2_io
+from io_scene_gltf2.io.exp.gltf2_io_image_data import ImageData
 
+from ..blender.msfs_material_prop_update import MSFS_Material_Property_Update
 from ..com import msfs_material_props as MSFSMaterialExtensions
+from .msfs_texture_cache import MSFSTextureCache
 
 
 class MSFSMaterial:
@@ -51,24 +58,92 @@ class MSFSMaterial:
         MSFSMaterialExtensions.AsoboMaterialCode,
     ]
 
+    # Names of the images created by the previous imports, keyed on the absolute path of their file
+    imported_images = {}
+
     def __new__(cls, *args, **kwargs):
         raise RuntimeError("%s should not be instantiated" % cls)
 
+    @staticmethod
+    def get_image_path(import_settings, pyimg):
+        # Embedded images can't be shared between files
+        if pyimg.uri is None or pyimg.uri.startswith("data:"):
+            return None
+
+        image_path = os.path.join(os.path.dirname(import_settings.filename), urllib.parse.unquote(pyimg.uri))
+        return os.path.normcase(os.path.abspath(image_path))
+
+    @staticmethod
+    def find_imported_image(image_path):
+        image_name = MSFSMaterial.imported_images.get(image_path)
+        if image_name is None:
+            return None
+
+        # The image may have been deleted, renamed or replaced since it was imported
+        blender_image = bpy.data.images.get(image_name)
+        if blender_image is None or os.path.normcase(os.path.abspath(bpy.path.abspath(blender_image.filepath))) != image_path:
+            del MSFSMaterial.imported_images[image_path]
+            return None
+        return blender_image
+
     @staticmethod
     def create_image(index, import_settings):
+        if index is None:
+            return None
+
+        # Several extensions and materials of a file use the same textures, only look them up once per import
+        images = getattr(import_settings, "msfs_images", None)
+        if images is None:
+            images = import_settings.msfs_images = {}
+        if index in images:
+            return images[index]
+
         pytexture = import_settings.data.textures[index]
-        BlenderImage.create(import_settings, pytexture.source)
+        if pytexture.source is None:
+            return None
         pyimg = import_settings.data.images[pytexture.source]
 
-        # Find image created
-        blender_image_name = pyimg.blender_image_name
-        if blender_image_name:
-            return bpy.data.images[blender_image_name]
+        # Reuse the image loaded by a previous import of the same package instead of loading it again
+        image_path = MSFSMaterial.get_image_path(import_settings, pyimg)
+        blender_image = MSFSMaterial.find_imported_image(image_path) if image_path is not None else None
+        if blender_image is not None:
+            pyimg.blender_image_name = blender_image.name
+        else:
+            BlenderImage.create(import_settings, pytexture.source)
+
+            # Find image created
+            if pyimg.blender_image_name:
+                blender_image = bpy.data.images.get(pyimg.blender_image_name)
+                if blender_image is not None and image_path is not None:
+                    MSFSMaterial.imported_images[image_path] = blender_image.name
+
+        images[index] = blender_image
+        return blender_image
 
     @staticmethod
     def export_image(
         blender_material, blender_image, type, export_settings, normal_scale=None
     ):
+        # The gathered texture info only depends on the image and how it is plugged in, so it can be shared by every
+        # material using the same texture. The cache lives in the export settings, which are created for each export.
+        cache = export_settings.setdefault("msfs_texture_info_cache", {})
+        cache_key = (blender_image.name_full, type, normal_scale)
+        if cache_key in cache:
+            return cache[cache_key]
+
+        # Reuse the texture encoded by a previous export session if the image hasn't changed since
+        texture_cache = MSFSTextureCache.get(export_settings)
+        if texture_cache is not None:
+            texture_key = MSFSTextureCache.get_key(blender_image, type, export_settings)
+            cached_texture = texture_cache.load(texture_key)
+            if cached_texture is not None:
+                texture_info = MSFSMaterial.create_cached_texture_info(
+                    type, texture_cache, texture_key, cached_texture, export_settings, normal_scale
+                )
+                if texture_info is not None:
+                    cache[cache_key] = texture_info
+                    return texture_info
+
         nodes = blender_material.node_tree.nodes
         links = blender_material.node_tree.links
 
@@ -121,14 +196,103 @@ class MSFSMaterial:
         if isinstance(texture_info, tuple):
             texture_info = texture_info[0]
 
+        if texture_cache is not None and texture_info is not None:
+            image = texture_info.index.source
+            if isinstance(image.uri, ImageData):
+                sampler = texture_info.index.sampler
+                if sampler is not None:
+                    sampler = {
+                        "mag_filter": sampler.mag_filter,
+                        "min_filter": sampler.min_filter,
+                        "name": sampler.name,
+                        "wrap_s": sampler.wrap_s,
+                        "wrap_t": sampler.wrap_t,
+                    }
+                texture_cache.store(
+                    texture_key, image.uri.data, image.uri.mime_type, image.uri.name, sampler, texture_info.tex_coord
+                )
+
+        cache[cache_key] = texture_info
+
         return texture_info
 
+    @staticmethod
+    def create_sampler(sampler, export_settings):
+        if sampler is None:
+            return None
+
+        # Textures sharing a sampler reference the same object, so that it is only written once to the glTF
+        cache = export_settings.setdefault("msfs_sampler_cache", {})
+        key = tuple(sorted(sampler.items()))
+        if key not in cache:
+            cache[key] = gltf2_io.Sampler(extensions=None, extras=None, **sampler)
+        return cache[key]
+
+    @staticmethod
+    def create_cached_texture_info(type, texture_cache, texture_key, cached_texture, export_settings, normal_scale=None):
+        # Same file name as the glTF exporter would give the image. Another image of this export already using the name
+        # gets the start of the cache key appended
+        image_data = ImageData(b"", cached_texture["mime_type"], cached_texture["name"])
+        texture_dir = export_settings["gltf_texturedirectory"]
+        path = os.path.join(texture_dir, image_data.adjusted_name() + image_data.file_extension)
+
+        paths = export_settings.setdefault("msfs_texture_cache_paths", {})
+        if paths.get(path, texture_key) != texture_key:
+            path = os.path.join(texture_dir, image_data.adjusted_name() + "_" + texture_key[:8] + image_data.file_extension)
+
+        # Copy the encoded file from the cache, it is written once for the export instead of being encoded again
+        if paths.get(path) != texture_key:
+            if not texture_cache.export_file(texture_key, path):
+                return None
+            paths[path] = texture_key
+
+        # A string uri isn't written again by the glTF exporter
+        relative_path = os.path.relpath(path, start=export_settings["gltf_filedirectory"])
+        uri = urllib.parse.quote(relative_path.replace(os.sep, "/"))
+
+        sampler = MSFSMaterial.create_sampler(cached_texture["sampler"], export_settings)
+        return MSFSMaterial.create_texture_info(
+            type, uri, cached_texture["mime_type"], cached_texture["name"], sampler, cached_texture["tex_coord"], normal_scale
+        )
+
+    @staticmethod
+    def create_texture_info(type, uri, mime_type, name, sampler, tex_coord, normal_scale=None):
+        # Same texture info as the one gathered from the temporary nodes of export_image, with the image file from the cache
+        image = gltf2_io.Image(
+            buffer_view=None,
+            extensions=None,
+            extras=None,
+            mime_type=mime_type,
+            name=name,
+            uri=uri
+        )
+        texture = gltf2_io.Texture(extensions=None, extras=None, name=None, sampler=sampler, source=image)
+
+        if type == "NORMAL":
+            return gltf2_io.MaterialNormalTextureInfoClass(
+                extensions=None, extras=None, index=texture, scale=normal_scale, tex_coord=tex_coord
+            )
+        elif type == "OCCLUSION":
+            return gltf2_io.MaterialOcclusionTextureInfoClass(
+                extensions=None, extras=None, index=texture, strength=None, tex_coord=tex_coord
+            )
+        return gltf2_io.TextureInfo(extensions=None, extras=None, index=texture, tex_coord=tex_coord)
+
     @staticmethod
     def create(gltf2_material, blender_material, import_settings):
-        for extension in MSFSMaterial.extensions:
-            extension.from_dict(blender_material, gltf2_material, import_settings)
+        # Set every property first and build the node tree once, instead of rebuilding it on each property update
+        MSFS_Material_Property_Update.begin_deferred_updates()
+        try:
+            for extension in MSFSMaterial.extensions:
+                extension.from_dict(blender_material, gltf2_material, import_settings)
+        finally:
+            MSFS_Material_Property_Update.end_deferred_updates()
 
     @staticmethod
-    def export(gltf2_material, blender_material, export_settings):
+    def export(gltf2_material, blender_material, export_settings, profiler=None):
         for extension in MSFSMaterial.extensions:
-            extension.to_extension(blender_material, gltf2_material, export_settings)
+            if profiler is None:
+                extension.to_extension(blender_material, gltf2_material, export_settings)
+            else:
+                with profiler.measure(extension.__name__ + ".to_extension"):
+                    extension.to_extension(blender_material, gltf2_material, export_settings)
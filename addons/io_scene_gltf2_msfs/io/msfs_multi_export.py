@@ -13,12 +13,15 @@
 # limitations under the License.
 
 import os
+import time
 import uuid
 import xml.dom.minidom
 import xml.etree.ElementTree as etree
 
 import bpy
 
+from .msfs_image_pool import MSFSImagePool
+
 
 # Scene Properties
 class MSFSMultiExporterProperties:
@@ -36,6 +39,13 @@ class MSFS_OT_MultiExportGLTF2(bpy.types.Operator):
     bl_idname = "export_scene.multi_export_gltf"
     bl_label = "Multi-Export glTF 2.0"
 
+    # Results of the last export, displayed in the multi-export panel
+    job_results = []
+
+    # State of the export running from the UI
+    progress = None
+    cancel_requested = False
+
     @staticmethod
     def export(file_path):
         settings = bpy.context.scene.msfs_multi_exporter_settings
@@ -137,113 +147,453 @@ class MSFS_OT_MultiExportGLTF2(bpy.types.Operator):
         if gltf is None:
                 print("[ASOBO] Export failed.")
 
-    def execute(self, context):
-        if context.scene.msfs_multi_exporter_current_tab == "OBJECTS":
-            from .msfs_multi_export_objects import MSFS_LODGroupUtility
+        return gltf
 
-            lod_groups = context.scene.msfs_multi_exporter_lod_groups
-            sort_by_collection = context.scene.multi_exporter_grouped_by_collections
+    @staticmethod
+    def write_lod_group_xml(context, lod_group):
+        from .msfs_multi_export_objects import MSFS_LODGroupUtility
 
-            for lod_group in lod_groups:
-                # Generate XML if needed
-                if lod_group.generate_xml:
-                    xml_path = bpy.path.abspath(os.path.join(lod_group.folder_name, lod_group.group_name + ".xml"))
-                    found_guid = None
+        xml_path = bpy.path.abspath(os.path.join(lod_group.folder_name, lod_group.group_name + ".xml"))
+        found_guid = None
 
-                    if os.path.exists(xml_path):
-                        tree = etree.parse(xml_path)
-                        found_guid = tree.getroot().attrib.get("guid")
+        if os.path.exists(xml_path):
+            tree = etree.parse(xml_path)
+            found_guid = tree.getroot().attrib.get("guid")
 
-                    if lod_group.overwrite_guid or found_guid is None:
-                        root = etree.Element(
-                            "ModelInfo",
-                            guid="{" + str(uuid.uuid4()) + "}",
-                            version="1.1",
-                        )
-                    else:
-                        root = etree.Element("ModelInfo", guid=found_guid, version="1.1")
+        if lod_group.overwrite_guid or found_guid is None:
+            root = etree.Element(
+                "ModelInfo",
+                guid="{" + str(uuid.uuid4()) + "}",
+                version="1.1",
+            )
+        else:
+            root = etree.Element("ModelInfo", guid=found_guid, version="1.1")
 
-                    lods = etree.SubElement(root, "LODS")
+        lods = etree.SubElement(root, "LODS")
 
-                    lod_files = {}
+        lod_files = {}
 
-                    for lod in lod_group.lods:
-                        if not MSFS_LODGroupUtility.lod_is_visible(context, lod):
-                            continue
+        for lod in lod_group.lods:
+            if not MSFS_LODGroupUtility.lod_is_visible(context, lod):
+                continue
 
-                        if lod.enabled:
-                            lod_files[lod.file_name] = lod.lod_value
+            if lod.enabled:
+                lod_files[lod.file_name] = lod.lod_value
 
-                    lod_files = sorted(lod_files.items())
-                    last_lod = list(lod_files)[-1:]
+        lod_files = sorted(lod_files.items())
+        last_lod = list(lod_files)[-1:]
 
-                    for file_name, lod_value in lod_files:
-                        lod_element = etree.SubElement(lods, "LOD")
+        for file_name, lod_value in lod_files:
+            lod_element = etree.SubElement(lods, "LOD")
 
-                        if file_name != last_lod[0]:
-                            lod_element.set("minSize", str(lod_value))
+            if file_name != last_lod[0]:
+                lod_element.set("minSize", str(lod_value))
 
-                        lod_element.set("ModelFile", os.path.splitext(file_name)[0] + ".gltf")
+            lod_element.set("ModelFile", os.path.splitext(file_name)[0] + ".gltf")
 
-                    if lod_files:
-                        # Format XML
-                        dom = xml.dom.minidom.parseString(etree.tostring(root))
-                        xml_string = dom.toprettyxml(encoding="utf-8")
+        if lod_files:
+            # Format XML
+            dom = xml.dom.minidom.parseString(etree.tostring(root))
+            xml_string = dom.toprettyxml(encoding="utf-8")
 
-                        with open(xml_path,"wb") as f:
-                            f.write(xml_string)
-                            f.close()
+            with open(xml_path,"wb") as f:
+                f.write(xml_string)
+                f.close()
+
+    @staticmethod
+    def gather_jobs(context, mode):
+        # Build the list of files to export. Each job only stores names and paths so it can be
+        # handed over to a background worker process as is.
+        jobs = []
+
+        if mode == "OBJECTS":
+            from .msfs_multi_export_objects import MSFS_LODGroupUtility
+
+            lod_groups = context.scene.msfs_multi_exporter_lod_groups
+            sort_by_collection = context.scene.multi_exporter_grouped_by_collections
+
+            # Index the view layer once, membership tests are then O(1) for every object of every LOD
+            view_layer_objects = set(context.view_layer.objects)
+
+            for lod_group in lod_groups:
+                # Generate XML if needed
+                if lod_group.generate_xml:
+                    MSFS_OT_MultiExportGLTF2.write_lod_group_xml(context, lod_group)
 
-                # Export glTF
                 for lod in lod_group.lods:
                     if not MSFS_LODGroupUtility.lod_is_visible(context, lod):
                         continue
 
                     if lod.enabled:
-                        # Use selected objects in order to specify what to export
-                        for obj in bpy.context.selected_objects:
-                            obj.select_set(False)
-
-                        def select_recursive(obj):
-                            if obj in list(bpy.context.window.view_layer.objects):
-                                obj.select_set(True)
-                                for child in obj.children:
-                                    select_recursive(child)
-
                         if sort_by_collection:
-                            for obj in lod.collection.all_objects:
-                                obj.select_set(True)
+                            objects = [obj for obj in lod.collection.all_objects if obj in view_layer_objects]
                         else:
-                            select_recursive(lod.object)
-                        
+                            objects = []
+                            stack = [lod.object]
+                            while stack:
+                                obj = stack.pop()
+                                if obj in view_layer_objects:
+                                    objects.append(obj)
+                                    stack.extend(reversed(obj.children))
+
+                        file_path = ""
                         if lod_group.folder_name != "":
-                            exportPath = bpy.path.ensure_ext(os.path.join(bpy.path.abspath(lod_group.folder_name), os.path.splitext(lod.file_name)[0]), ".gltf")
-                            MSFS_OT_MultiExportGLTF2.export(exportPath)
-                        else:
-                            self.report({'ERROR'}, "[EXPORT][ERROR] Object : " + lod.file_name + " does not have an export path set.")
+                            file_path = bpy.path.ensure_ext(os.path.join(bpy.path.abspath(lod_group.folder_name), os.path.splitext(lod.file_name)[0]), ".gltf")
+
+                        jobs.append({
+                            "kind": "Object",
+                            "name": lod.file_name,
+                            "file_path": file_path,
+                            "objects": [obj.name for obj in objects]
+                        })
+
+        elif mode == "PRESETS":
+            presets = context.scene.msfs_multi_exporter_presets
+            view_layer_objects = set(context.view_layer.objects)
 
-        elif context.scene.msfs_multi_exporter_current_tab == "PRESETS":
-            presets = bpy.context.scene.msfs_multi_exporter_presets
             for preset in presets:
                 if preset.enabled:
-                    # Clear currently selected objects
-                    for obj in bpy.context.selected_objects:
-                        obj.select_set(False)
+                    objects = []
+                    found_objects = set()
 
                     # Loop through all enabled layers and select all objects
                     for layer in preset.layers:
                         if layer.enabled:
                             for obj in layer.collection.all_objects:
-                                if obj in list(bpy.context.window.view_layer.objects):
-                                    obj.select_set(True)
+                                if obj in view_layer_objects and obj not in found_objects:
+                                    found_objects.add(obj)
+                                    objects.append(obj)
+
+                    file_path = ""
                     if preset.file_path != "":
-                        exportPath = bpy.path.ensure_ext(os.path.join(bpy.path.abspath(preset.file_path), preset.name), ".gltf")
-                        MSFS_OT_MultiExportGLTF2.export(exportPath)
-                    else:
-                        self.report({'ERROR'}, "[EXPORT][ERROR] Preset : " + preset.name + " does not have an export path set.")
+                        file_path = bpy.path.ensure_ext(os.path.join(bpy.path.abspath(preset.file_path), preset.name), ".gltf")
+
+                    jobs.append({
+                        "kind": "Preset",
+                        "name": preset.name,
+                        "file_path": file_path,
+                        "objects": [obj.name for obj in objects]
+                    })
+
+        return jobs
+
+    @staticmethod
+    def export_job(context, job, objects_by_name):
+        result = {
+            "name": job["name"],
+            "file_path": job["file_path"],
+            "status": "FAILED",
+            "message": ""
+        }
+
+        if job["file_path"] == "":
+            result["message"] = job["kind"] + " : " + job["name"] + " does not have an export path set."
+            return result
+
+        # Use selected objects in order to specify what to export
+        for obj in context.selected_objects:
+            obj.select_set(False)
+
+        for name in job["objects"]:
+            obj = objects_by_name.get(name)
+            if obj is not None:
+                obj.select_set(True)
+
+        # A failing file shouldn't stop the other files of the batch
+        try:
+            gltf = MSFS_OT_MultiExportGLTF2.export(job["file_path"])
+        except Exception as e:
+            result["message"] = str(e).strip() or type(e).__name__
+            return result
+
+        if gltf is None or "FINISHED" not in gltf:
+            result["message"] = "Export failed."
+            return result
+
+        result["status"] = "DONE"
+        return result
+
+    @staticmethod
+    def prepare_run(context, jobs):
+        settings = context.scene.msfs_multi_exporter_settings
+
+        run = {
+            "jobs": jobs,
+            "results": [None] * len(jobs),
+            "manifests": None,
+            "objects_by_name": {obj.name: obj for obj in context.view_layer.objects}
+        }
+
+        # Skip the files whose content hasn't changed since the last export
+        if settings.use_incremental_export:
+            from .msfs_multi_export_manifest import MSFS_ExportManifest
+
+            run["manifests"], skipped = MSFS_ExportManifest.filter_jobs(context, jobs, run["objects_by_name"])
+            for index, result in skipped.items():
+                run["results"][index] = result
+
+        run["pending"] = [i for i, result in enumerate(run["results"]) if result is None]
+        run["parallel"] = settings.use_parallel_export and len(run["pending"]) > 1
+
+        # Textures shared by several files of the run are only written once. Parallel runs pool their textures in each
+        # worker process
+        if not run["parallel"]:
+            MSFSImagePool.begin()
+        return run
+
+    @staticmethod
+    def finish_run(run):
+        MSFSImagePool.end()
+
+        # Jobs that never ran because the export was cancelled
+        for index, job in enumerate(run["jobs"]):
+            if run["results"][index] is None:
+                run["results"][index] = {
+                    "name": job["name"],
+                    "file_path": job["file_path"],
+                    "status": "CANCELLED",
+                    "message": "Cancelled"
+                }
+
+        if run["manifests"] is not None:
+            from .msfs_multi_export_manifest import MSFS_ExportManifest
+            MSFS_ExportManifest.record_results(run["manifests"], run["jobs"], run["results"])
+
+        MSFS_OT_MultiExportGLTF2.job_results = run["results"]
+        return run["results"]
+
+    @staticmethod
+    def run_jobs(context, jobs):
+        # Blocks until every file is exported, only used when there is no UI to keep responsive
+        settings = context.scene.msfs_multi_exporter_settings
+        run = MSFS_OT_MultiExportGLTF2.prepare_run(context, jobs)
+        pending = run["pending"]
+
+        if run["parallel"]:
+            from .msfs_multi_export_parallel import MSFS_ParallelExport
+
+            pending_results = MSFS_ParallelExport.run(context, [jobs[i] for i in pending], settings.parallel_worker_count)
+            for index, result in zip(pending, pending_results):
+                run["results"][index] = result
+        else:
+            wm = context.window_manager
+            wm.progress_begin(0, len(pending))
+            for i, index in enumerate(pending):
+                job = jobs[index]
+                run["results"][index] = MSFS_OT_MultiExportGLTF2.export_job(context, job, run["objects_by_name"])
+                wm.progress_update(i + 1)
+                print("[ASOBO] Exported " + job["name"] + " (" + str(i + 1) + "/" + str(len(pending)) + ")")
+            wm.progress_end()
+
+        return MSFS_OT_MultiExportGLTF2.finish_run(run)
+
+    def report_results(self, results):
+        failed = [result for result in results if result["status"] == "FAILED"]
+        for result in failed:
+            self.report({'ERROR'}, "[EXPORT][ERROR] " + result["message"])
+
+        cancelled = sum(1 for result in results if result["status"] == "CANCELLED")
+        if cancelled:
+            self.report({'WARNING'}, "Export cancelled, " + str(cancelled) + " file(s) not exported")
+        elif results and not failed:
+            skipped = sum(1 for result in results if result["status"] == "SKIPPED")
+            self.report({'INFO'}, "Exported " + str(len(results) - skipped) + " file(s), " + str(skipped) + " up to date")
+
+    def execute(self, context):
+        # Scripts calling the operator from the UI get the same modal export as the panel
+        if not bpy.app.background and context.window is not None:
+            return self.start(context)
+
+        jobs = MSFS_OT_MultiExportGLTF2.gather_jobs(context, context.scene.msfs_multi_exporter_current_tab)
+        results = MSFS_OT_MultiExportGLTF2.run_jobs(context, jobs)
+        self.report_results(results)
 
         return {"FINISHED"}
 
+    def invoke(self, context, event):
+        return self.start(context)
+
+    # When started from the UI, export one file per timer tick so Blender stays responsive and the export can be cancelled
+    def start(self, context):
+        if MSFS_OT_MultiExportGLTF2.progress is not None:
+            self.report({'WARNING'}, "An export is already running")
+            return {"CANCELLED"}
+
+        settings = context.scene.msfs_multi_exporter_settings
+        jobs = MSFS_OT_MultiExportGLTF2.gather_jobs(context, context.scene.msfs_multi_exporter_current_tab)
+        self.run = MSFS_OT_MultiExportGLTF2.prepare_run(context, jobs)
+        self.next_pending = 0
+        self.current_index = None
+
+        self.parallel_handle = None
+        if self.run["parallel"]:
+            from .msfs_multi_export_parallel import MSFS_ParallelExport
+            self.parallel_handle = MSFS_ParallelExport.start([jobs[i] for i in self.run["pending"]], settings.parallel_worker_count)
+
+        MSFS_OT_MultiExportGLTF2.cancel_requested = False
+        MSFS_OT_MultiExportGLTF2.progress = {
+            "done": 0,
+            "total": len(self.run["pending"]),
+            "current": "",
+            "eta": None,
+            "start_time": time.perf_counter()
+        }
+
+        wm = context.window_manager
+        wm.progress_begin(0, max(1, len(self.run["pending"])))
+        self.timer = wm.event_timer_add(0.05, window=context.window)
+        wm.modal_handler_add(self)
+        self.update_progress(context)
+
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        if event.type == "ESC" and event.value == "PRESS":
+            MSFS_OT_MultiExportGLTF2.cancel_requested = True
+            return {"RUNNING_MODAL"}
+
+        if event.type != "TIMER" or event.timer != self.timer:
+            return {"PASS_THROUGH"}
+
+        if MSFS_OT_MultiExportGLTF2.cancel_requested:
+            return self.finish(context)
+
+        # An unexpected error must still end the export, or the timer, the progress and the image pool would stay active
+        try:
+            return self.tick(context)
+        except Exception as e:
+            print("[ASOBO] Multi-export failed: " + repr(e))
+            # The file being exported failed, or every unfinished file of a parallel export. The others are reported as
+            # cancelled by finish_run
+            if self.parallel_handle is not None:
+                failed = self.run["pending"]
+            else:
+                failed = [self.current_index] if self.current_index is not None else []
+            for index in failed:
+                if self.run["results"][index] is None:
+                    job = self.run["jobs"][index]
+                    self.run["results"][index] = {
+                        "name": job["name"],
+                        "file_path": job["file_path"],
+                        "status": "FAILED",
+                        "message": job["name"] + " : " + (str(e).strip() or type(e).__name__)
+                    }
+            return self.finish(context)
+
+    def tick(self, context):
+        progress = MSFS_OT_MultiExportGLTF2.progress
+        pending = self.run["pending"]
+
+        if self.parallel_handle is not None:
+            from .msfs_multi_export_parallel import MSFS_ParallelExport
+
+            MSFS_ParallelExport.poll(self.parallel_handle)
+            for index, result in zip(pending, self.parallel_handle["results"]):
+                self.run["results"][index] = result
+
+            progress["done"] = sum(1 for result in self.parallel_handle["results"] if result is not None)
+            progress["current"] = str(len(self.parallel_handle["workers"])) + " workers"
+            finished = MSFS_ParallelExport.is_finished(self.parallel_handle)
+        else:
+            if self.next_pending < len(pending):
+                index = pending[self.next_pending]
+                job = self.run["jobs"][index]
+                self.current_index = index
+
+                # Objects may have been edited between two files, index them again
+                objects_by_name = {obj.name: obj for obj in context.view_layer.objects}
+                self.run["results"][index] = MSFS_OT_MultiExportGLTF2.export_job(context, job, objects_by_name)
+                self.next_pending += 1
+                self.current_index = None
+
+            progress["done"] = self.next_pending
+            if self.next_pending < len(pending):
+                progress["current"] = self.run["jobs"][pending[self.next_pending]]["name"]
+            finished = self.next_pending >= len(pending)
+
+        if finished:
+            return self.finish(context)
+
+        self.update_progress(context)
+        return {"RUNNING_MODAL"}
+
+    def update_progress(self, context):
+        progress = MSFS_OT_MultiExportGLTF2.progress
+
+        elapsed = time.perf_counter() - progress["start_time"]
+        if progress["done"] > 0:
+            progress["eta"] = elapsed / progress["done"] * (progress["total"] - progress["done"])
+
+        context.window_manager.progress_update(progress["done"])
+        context.workspace.status_text_set(MSFS_OT_MultiExportGLTF2.get_progress_text() + " - Press Esc to cancel")
+
+        for area in context.screen.areas:
+            if area.type == "VIEW_3D":
+                area.tag_redraw()
+
+    @staticmethod
+    def get_progress_text():
+        progress = MSFS_OT_MultiExportGLTF2.progress
+
+        text = "Exporting " + str(min(progress["done"] + 1, progress["total"])) + " of " + str(progress["total"])
+        if progress["current"]:
+            text += ": " + progress["current"]
+        if progress["eta"] is not None:
+            minutes, seconds = divmod(int(progress["eta"]), 60)
+            text += " (ETA " + str(minutes) + ":" + str(seconds).zfill(2) + ")"
+        return text
+
+    def finish(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self.timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+        try:
+            self.stop_workers()
+        except Exception as e:
+            print("[ASOBO] Couldn't stop the export workers: " + repr(e))
+
+        try:
+            results = MSFS_OT_MultiExportGLTF2.finish_run(self.run)
+        finally:
+            # Always allow a new export, even if the results couldn't be recorded
+            MSFS_OT_MultiExportGLTF2.progress = None
+            MSFSImagePool.end()
+        self.report_results(results)
+
+        for area in context.screen.areas:
+            if area.type == "VIEW_3D":
+                area.tag_redraw()
+
+        return {"FINISHED"}
+
+    def stop_workers(self):
+        if self.parallel_handle is not None:
+            from .msfs_multi_export_parallel import MSFS_ParallelExport
+
+            # Stops the workers still running when the export was cancelled, their jobs are reported as cancelled
+            MSFS_ParallelExport.cancel(self.parallel_handle)
+            for i, index in enumerate(self.run["pending"]):
+                if self.run["results"][index] is None:
+                    job = self.run["jobs"][index]
+                    self.parallel_handle["results"][i] = {
+                        "name": job["name"],
+                        "file_path": job["file_path"],
+                        "status": "CANCELLED",
+                        "message": "Cancelled"
+                    }
+            MSFS_ParallelExport.cleanup(self.parallel_handle)
+
+
+class MSFS_OT_CancelMultiExport(bpy.types.Operator):
+    bl_idname = "msfs.cancel_multi_export"
+    bl_label = "Cancel export"
+
+    def execute(self, context):
+        MSFS_OT_MultiExportGLTF2.cancel_requested = True
+        return {"FINISHED"}
+
 
 class MSFS_OT_ChangeTab(bpy.types.Operator):
     bl_idname = "msfs.multi_export_change_tab"
@@ -279,6 +629,37 @@ class MSFS_PT_MultiExporter(bpy.types.Panel):
         row.operator(MSFS_OT_ChangeTab.bl_idname, text="Presets", depress=(current_tab == "PRESETS")).current_tab = "PRESETS"
         row.operator(MSFS_OT_ChangeTab.bl_idname, text="Settings", depress=(current_tab == "SETTINGS")).current_tab = "SETTINGS"
 
+        if MSFS_OT_MultiExportGLTF2.progress is not None:
+            progress = MSFS_OT_MultiExportGLTF2.progress
+
+            box = layout.box()
+            box.label(text=MSFS_OT_MultiExportGLTF2.get_progress_text(), icon="EXPORT")
+            # Progress bars in layouts are only available from Blender 4.0
+            if hasattr(box, "progress"):
+                box.progress(factor=progress["done"] / max(1, progress["total"]))
+            box.operator(MSFS_OT_CancelMultiExport.bl_idname, text="Cancel", icon="CANCEL")
+            return
+
+        job_results = MSFS_OT_MultiExportGLTF2.job_results
+        if job_results:
+            failed = sum(1 for result in job_results if result["status"] == "FAILED")
+            skipped = sum(1 for result in job_results if result["status"] == "SKIPPED")
+
+            box = layout.box()
+            box.label(
+                text="Last export: " + str(len(job_results) - failed - skipped) + " done, " + str(skipped) + " up to date, " + str(failed) + " failed",
+                icon="ERROR" if failed else "CHECKMARK"
+            )
+
+            col = box.column(align=True)
+            for result in job_results:
+                if result["status"] == "FAILED":
+                    col.label(text=result["name"] + ": " + result["message"], icon="CANCEL")
+                elif result["status"] in ("SKIPPED", "CANCELLED"):
+                    col.label(text=result["name"] + ": " + result["message"], icon="LINKED" if result["status"] == "SKIPPED" else "PAUSE")
+                else:
+                    col.label(text=result["name"], icon="CHECKMARK")
+
 
 def register_panel():
     # Register the panel on demand, we need to be sure to only register it once
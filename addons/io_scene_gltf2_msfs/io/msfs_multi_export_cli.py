@@ -0,0 +1,112 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Command line entry point of the multi-exporter, for exporting without the UI:
+#
+#   blender -b scene.blend --python-expr "import io_scene_gltf2_msfs.io.msfs_multi_export_cli as cli; cli.main()" -- --mode all --summary summary.json
+#
+# The LOD groups and presets stored in the file are exported with the multi-exporter settings of the scene.
+# Blender exits with 0 when every file was exported, 1 when an export failed and 2 when the export could not run.
+
+import argparse
+import json
+import sys
+import time
+import traceback
+
+import bpy
+
+from .msfs_multi_export import MSFS_OT_MultiExportGLTF2
+
+SUMMARY_PREFIX = "MSFS_EXPORT_SUMMARY "
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(
+        prog="msfs_multi_export",
+        description="Export the LOD groups and presets of a Blender file with the MSFS multi-exporter"
+    )
+    parser.add_argument("--mode", choices=("objects", "presets", "all"), default="all", help="What to export (default: all)")
+    parser.add_argument("--summary", help="Write the JSON summary to this file. It is always printed to stdout, prefixed by " + SUMMARY_PREFIX.strip())
+    parser.add_argument("--reload-lods", action="store_true", help="Reload the LOD groups from the scene before exporting")
+    parser.add_argument("--parallel", type=int, metavar="WORKERS", help="Export in parallel with this many background processes")
+    parser.add_argument("--incremental", action="store_true", help="Skip the files that haven't changed since the last export")
+    parser.add_argument("--profile", choices=("JSON", "CSV"), help="Write an export profiling report next to each exported file")
+    return parser.parse_args(argv)
+
+
+def run_batch_export(context, modes):
+    start = time.perf_counter()
+
+    results = []
+    for mode in modes:
+        jobs = MSFS_OT_MultiExportGLTF2.gather_jobs(context, mode)
+        results.extend(MSFS_OT_MultiExportGLTF2.run_jobs(context, jobs))
+
+    MSFS_OT_MultiExportGLTF2.job_results = results
+
+    failed = [result for result in results if result["status"] == "FAILED"]
+    return {
+        "file": bpy.data.filepath,
+        "status": "FAILED" if failed else "DONE",
+        "exported": sum(1 for result in results if result["status"] == "DONE"),
+        "skipped": sum(1 for result in results if result["status"] == "SKIPPED"),
+        "failed": len(failed),
+        "duration": time.perf_counter() - start,
+        "results": results
+    }
+
+
+def main(argv=None):
+    # Arguments meant for the script come after "--" on the Blender command line
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    arguments = parse_arguments(argv)
+    context = bpy.context
+
+    try:
+        settings = context.scene.msfs_multi_exporter_settings
+        if arguments.parallel is not None:
+            settings.use_parallel_export = arguments.parallel > 1
+            settings.parallel_worker_count = max(1, arguments.parallel)
+        if arguments.incremental:
+            settings.use_incremental_export = True
+        if arguments.profile is not None:
+            context.scene.msfs_exporter_properties.enable_profiler = True
+            context.scene.msfs_exporter_properties.profiler_report_format = arguments.profile
+
+        if arguments.reload_lods:
+            from .msfs_multi_export_objects import MSFS_OT_ReloadLODGroups
+            MSFS_OT_ReloadLODGroups.reload_lod_groups(None, context)
+
+        modes = ["OBJECTS", "PRESETS"] if arguments.mode == "all" else [arguments.mode.upper()]
+        summary = run_batch_export(context, modes)
+        exit_code = 1 if summary["failed"] else 0
+    except Exception as e:
+        traceback.print_exc()
+        summary = {
+            "file": bpy.data.filepath,
+            "status": "ERROR",
+            "error": str(e),
+            "results": []
+        }
+        exit_code = 2
+
+    print(SUMMARY_PREFIX + json.dumps(summary))
+    if arguments.summary:
+        with open(arguments.summary, "w") as f:
+            json.dump(summary, f, indent=4)
+
+    sys.exit(exit_code)
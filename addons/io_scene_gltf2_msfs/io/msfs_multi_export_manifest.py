@@ -0,0 +1,376 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import os
+import urllib.parse
+from array import array
+
+import bpy
+
+
+class MSFS_ExportManifest:
+    """
+    Content-hash manifest stored in each export folder.
+    Every exported file is keyed on a fingerprint of the objects it contains (mesh, materials, modifiers, transforms, animation)
+    and of the export settings, so files whose inputs have not changed can be skipped on the next export. The buffers and
+    textures the file references are recorded too, the file is exported again if one of them is missing.
+    """
+
+    file_name = ".msfs_export_manifest.json"
+
+    # Settings that don't change the exported files
+    ignored_settings = {"use_parallel_export", "parallel_worker_count", "use_incremental_export"}
+
+    attribute_layouts = {
+        "FLOAT": ("value", 1, "f"),
+        "INT": ("value", 1, "i"),
+        "INT8": ("value", 1, "i"),
+        "FLOAT2": ("vector", 2, "f"),
+        "FLOAT_VECTOR": ("vector", 3, "f"),
+        "FLOAT_COLOR": ("color", 4, "f"),
+        "BYTE_COLOR": ("color", 4, "f"),
+    }
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, MSFS_ExportManifest.file_name)
+        self.files = {}
+
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    self.files = json.load(f).get("files", {})
+            except (OSError, ValueError):
+                print("[ASOBO] Ignoring unreadable export manifest " + self.path)
+
+    def is_up_to_date(self, file_path, fingerprint):
+        # Entries of older manifests only held the fingerprint, they don't list the files to check
+        entry = self.files.get(os.path.basename(file_path))
+        if not isinstance(entry, dict) or entry.get("fingerprint") != fingerprint or not os.path.exists(file_path):
+            return False
+
+        directory = os.path.dirname(file_path)
+        return all(os.path.exists(os.path.join(directory, dependency)) for dependency in entry.get("dependencies", []))
+
+    def update(self, file_path, fingerprint):
+        self.files[os.path.basename(file_path)] = {
+            "fingerprint": fingerprint,
+            "dependencies": MSFS_ExportManifest.get_dependencies(file_path)
+        }
+
+    @staticmethod
+    def get_dependencies(file_path):
+        # The .bin files and textures referenced by an exported glTF, relative to its folder
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                gltf = json.load(f)
+        except (OSError, ValueError):
+            return []
+
+        dependencies = []
+        for item in gltf.get("buffers", []) + gltf.get("images", []):
+            uri = item.get("uri")
+            if uri and not uri.startswith("data:"):
+                dependencies.append(urllib.parse.unquote(uri))
+        return dependencies
+
+    def save(self):
+        with open(self.path, "w") as f:
+            json.dump({"files": self.files}, f, indent=4, sort_keys=True)
+
+    @staticmethod
+    def get_manifest(manifests, file_path):
+        directory = os.path.dirname(file_path)
+        if directory not in manifests:
+            manifests[directory] = MSFS_ExportManifest(directory)
+        return manifests[directory]
+
+    @staticmethod
+    def filter_jobs(context, jobs, objects_by_name):
+        # Fingerprint every job and return the results of the jobs that can be skipped, keyed by job index
+        manifests = {}
+        skipped = {}
+
+        for i, job in enumerate(jobs):
+            if job["file_path"] == "":
+                continue
+
+            job["fingerprint"] = MSFS_ExportManifest.get_fingerprint(context, job, objects_by_name)
+
+            manifest = MSFS_ExportManifest.get_manifest(manifests, job["file_path"])
+            if manifest.is_up_to_date(job["file_path"], job["fingerprint"]):
+                skipped[i] = {
+                    "name": job["name"],
+                    "file_path": job["file_path"],
+                    "status": "SKIPPED",
+                    "message": "Up to date"
+                }
+
+        return manifests, skipped
+
+    @staticmethod
+    def record_results(manifests, jobs, results):
+        for job, result in zip(jobs, results):
+            if result["status"] == "DONE" and "fingerprint" in job:
+                MSFS_ExportManifest.get_manifest(manifests, job["file_path"]).update(job["file_path"], job["fingerprint"])
+
+        for manifest in manifests.values():
+            if os.path.isdir(os.path.dirname(manifest.path)):
+                manifest.save()
+
+    # Fingerprinting
+    @staticmethod
+    def get_fingerprint(context, job, objects_by_name):
+        from .. import get_version_string
+
+        hasher = hashlib.sha1()
+        visited = set()
+
+        MSFS_ExportManifest.hash_value(hasher, get_version_string())
+
+        scene = context.scene
+        MSFS_ExportManifest.hash_value(hasher, (scene.frame_start, scene.frame_end, scene.frame_current, scene.render.fps))
+        MSFS_ExportManifest.hash_struct(hasher, scene.msfs_multi_exporter_settings, visited, MSFS_ExportManifest.ignored_settings)
+        MSFS_ExportManifest.hash_struct(hasher, scene.msfs_exporter_properties, visited)
+
+        for name in sorted(job["objects"]):
+            obj = objects_by_name.get(name)
+            if obj is None:
+                continue
+
+            MSFS_ExportManifest.hash_id(hasher, obj, visited)
+
+        return hasher.hexdigest()
+
+    @staticmethod
+    def hash_value(hasher, value):
+        hasher.update(repr(value).encode())
+
+    @staticmethod
+    def hash_array(hasher, collection, attribute, size, typecode):
+        data = array(typecode, [0]) * (len(collection) * size)
+        collection.foreach_get(attribute, data)
+        hasher.update(data.tobytes())
+
+    @staticmethod
+    def to_hashable(value):
+        if isinstance(value, bpy.types.ID):
+            return value.name_full
+        if isinstance(value, (str, bytes, bool, int, float)) or value is None:
+            return value
+        if isinstance(value, (set, frozenset)):
+            return tuple(sorted(value))
+        try:
+            return tuple(MSFS_ExportManifest.to_hashable(item) for item in value)
+        except TypeError:
+            return repr(value)
+
+    @staticmethod
+    def hash_struct(hasher, struct, visited, ignored=()):
+        for prop in struct.bl_rna.properties:
+            identifier = prop.identifier
+            if identifier in ("rna_type", "select") or identifier in ignored or prop.is_readonly:
+                continue
+
+            if prop.type in ("BOOLEAN", "INT", "FLOAT", "STRING", "ENUM"):
+                try:
+                    value = getattr(struct, identifier)
+                except AttributeError:
+                    continue
+                MSFS_ExportManifest.hash_value(hasher, (identifier, MSFS_ExportManifest.to_hashable(value)))
+            elif prop.type == "POINTER":
+                value = getattr(struct, identifier, None)
+                if isinstance(value, bpy.types.ID):
+                    MSFS_ExportManifest.hash_value(hasher, (identifier, value.name_full))
+                    MSFS_ExportManifest.hash_id(hasher, value, visited)
+
+    @staticmethod
+    def hash_id(hasher, id, visited):
+        # Only follow the datablocks that end up in the exported file, or change it when edited. Each datablock is hashed
+        # once, which also stops reference cycles
+        if id in visited:
+            return
+        visited.add(id)
+
+        if isinstance(id, bpy.types.Object):
+            MSFS_ExportManifest.hash_object(hasher, id, visited)
+        elif isinstance(id, bpy.types.Collection):
+            MSFS_ExportManifest.hash_collection(hasher, id, visited)
+        elif isinstance(id, bpy.types.Mesh):
+            MSFS_ExportManifest.hash_mesh(hasher, id, visited)
+        elif isinstance(id, bpy.types.Material):
+            MSFS_ExportManifest.hash_struct(hasher, id, visited)
+            # The node tree is a read only property, hash_struct doesn't follow it
+            if id.node_tree is not None:
+                MSFS_ExportManifest.hash_id(hasher, id.node_tree, visited)
+        elif isinstance(id, bpy.types.NodeTree):
+            MSFS_ExportManifest.hash_node_tree(hasher, id, visited)
+        elif isinstance(id, bpy.types.Image):
+            MSFS_ExportManifest.hash_image(hasher, id)
+        elif isinstance(id, bpy.types.Action):
+            MSFS_ExportManifest.hash_action(hasher, id)
+        elif isinstance(id, bpy.types.Armature):
+            MSFS_ExportManifest.hash_armature(hasher, id)
+        elif isinstance(id, (bpy.types.Light, bpy.types.Camera)):
+            MSFS_ExportManifest.hash_struct(hasher, id, visited)
+
+    @staticmethod
+    def hash_object(hasher, obj, visited):
+        MSFS_ExportManifest.hash_value(hasher, (obj.name, obj.type, obj.parent.name if obj.parent else None, obj.parent_bone))
+        MSFS_ExportManifest.hash_value(hasher, MSFS_ExportManifest.to_hashable(obj.matrix_world))
+        MSFS_ExportManifest.hash_struct(hasher, obj, visited)
+
+        for modifier in obj.modifiers:
+            MSFS_ExportManifest.hash_value(hasher, (modifier.name, modifier.type))
+            MSFS_ExportManifest.hash_struct(hasher, modifier, visited)
+
+        for constraint in obj.constraints:
+            MSFS_ExportManifest.hash_value(hasher, (constraint.name, constraint.type))
+            MSFS_ExportManifest.hash_struct(hasher, constraint, visited)
+
+        for slot in obj.material_slots:
+            MSFS_ExportManifest.hash_value(hasher, (slot.link, slot.material.name_full if slot.material else None))
+            if slot.material is not None:
+                MSFS_ExportManifest.hash_id(hasher, slot.material, visited)
+
+        MSFS_ExportManifest.hash_value(hasher, [group.name for group in obj.vertex_groups])
+        MSFS_ExportManifest.hash_animation_data(hasher, obj.animation_data, visited)
+
+        if obj.pose is not None:
+            for pose_bone in obj.pose.bones:
+                MSFS_ExportManifest.hash_value(hasher, pose_bone.name)
+                MSFS_ExportManifest.hash_struct(hasher, pose_bone, visited)
+
+    @staticmethod
+    def hash_collection(hasher, collection, visited):
+        # Collections are referenced by modifiers and instancing
+        for obj in sorted(collection.all_objects, key=lambda obj: obj.name):
+            MSFS_ExportManifest.hash_value(hasher, obj.name)
+            MSFS_ExportManifest.hash_id(hasher, obj, visited)
+
+    @staticmethod
+    def hash_mesh(hasher, mesh, visited):
+        MSFS_ExportManifest.hash_struct(hasher, mesh, visited)
+
+        MSFS_ExportManifest.hash_array(hasher, mesh.vertices, "co", 3, "f")
+        MSFS_ExportManifest.hash_array(hasher, mesh.loops, "vertex_index", 1, "i")
+        MSFS_ExportManifest.hash_array(hasher, mesh.polygons, "loop_total", 1, "i")
+        MSFS_ExportManifest.hash_array(hasher, mesh.polygons, "material_index", 1, "i")
+        MSFS_ExportManifest.hash_array(hasher, mesh.edges, "vertices", 2, "i")
+
+        use_smooth = [False] * len(mesh.polygons)
+        mesh.polygons.foreach_get("use_smooth", use_smooth)
+        MSFS_ExportManifest.hash_value(hasher, use_smooth)
+
+        for uv_layer in mesh.uv_layers:
+            MSFS_ExportManifest.hash_value(hasher, uv_layer.name)
+            MSFS_ExportManifest.hash_array(hasher, uv_layer.data, "uv", 2, "f")
+
+        for attribute in mesh.attributes:
+            layout = MSFS_ExportManifest.attribute_layouts.get(attribute.data_type)
+            MSFS_ExportManifest.hash_value(hasher, (attribute.name, attribute.domain, attribute.data_type))
+            if layout is not None:
+                MSFS_ExportManifest.hash_array(hasher, attribute.data, *layout)
+
+        # Vertex weights
+        for vertex in mesh.vertices:
+            if vertex.groups:
+                MSFS_ExportManifest.hash_value(hasher, [(group.group, group.weight) for group in vertex.groups])
+
+        if mesh.shape_keys is not None:
+            for key_block in mesh.shape_keys.key_blocks:
+                MSFS_ExportManifest.hash_value(hasher, (key_block.name, key_block.value, key_block.mute))
+                MSFS_ExportManifest.hash_array(hasher, key_block.data, "co", 3, "f")
+            MSFS_ExportManifest.hash_animation_data(hasher, mesh.shape_keys.animation_data, visited)
+
+    @staticmethod
+    def hash_node_tree(hasher, node_tree, visited):
+        for node in node_tree.nodes:
+            MSFS_ExportManifest.hash_value(hasher, (node.name, node.bl_idname))
+            MSFS_ExportManifest.hash_struct(hasher, node, visited)
+
+            for socket in node.inputs:
+                if hasattr(socket, "default_value"):
+                    MSFS_ExportManifest.hash_value(hasher, (socket.identifier, MSFS_ExportManifest.to_hashable(socket.default_value)))
+
+            # Group and image nodes, in case the pointer isn't editable on this node type
+            for attribute in ("node_tree", "image"):
+                value = getattr(node, attribute, None)
+                if value is not None:
+                    MSFS_ExportManifest.hash_value(hasher, (attribute, value.name_full))
+                    MSFS_ExportManifest.hash_id(hasher, value, visited)
+
+        for link in node_tree.links:
+            MSFS_ExportManifest.hash_value(hasher, (
+                link.from_node.name,
+                link.from_socket.identifier,
+                link.to_node.name,
+                link.to_socket.identifier
+            ))
+
+    @staticmethod
+    def hash_image(hasher, image):
+        MSFS_ExportManifest.hash_value(hasher, (
+            image.filepath_raw,
+            image.source,
+            image.file_format,
+            image.colorspace_settings.name,
+            image.alpha_mode,
+            image.is_dirty,
+            image.packed_file.size if image.packed_file else None,
+            tuple(image.size)
+        ))
+
+        # Edited image files are picked up through their modification time
+        path = bpy.path.abspath(image.filepath_raw, library=image.library)
+        if image.packed_file is None and os.path.isfile(path):
+            stat = os.stat(path)
+            MSFS_ExportManifest.hash_value(hasher, (stat.st_size, stat.st_mtime_ns))
+
+    @staticmethod
+    def hash_action(hasher, action):
+        for fcurve in action.fcurves:
+            MSFS_ExportManifest.hash_value(hasher, (fcurve.data_path, fcurve.array_index, fcurve.mute))
+            MSFS_ExportManifest.hash_array(hasher, fcurve.keyframe_points, "co", 2, "f")
+            MSFS_ExportManifest.hash_array(hasher, fcurve.keyframe_points, "handle_left", 2, "f")
+            MSFS_ExportManifest.hash_array(hasher, fcurve.keyframe_points, "handle_right", 2, "f")
+            MSFS_ExportManifest.hash_value(hasher, [keyframe.interpolation for keyframe in fcurve.keyframe_points])
+
+    @staticmethod
+    def hash_armature(hasher, armature):
+        for bone in armature.bones:
+            MSFS_ExportManifest.hash_value(hasher, (
+                bone.name,
+                bone.parent.name if bone.parent else None,
+                bone.use_deform,
+                MSFS_ExportManifest.to_hashable(bone.matrix_local)
+            ))
+
+    @staticmethod
+    def hash_animation_data(hasher, animation_data, visited):
+        if animation_data is None:
+            return
+
+        if animation_data.action is not None:
+            MSFS_ExportManifest.hash_value(hasher, animation_data.action.name_full)
+            MSFS_ExportManifest.hash_id(hasher, animation_data.action, visited)
+
+        for track in animation_data.nla_tracks:
+            MSFS_ExportManifest.hash_value(hasher, (track.name, track.mute))
+            for strip in track.strips:
+                MSFS_ExportManifest.hash_value(hasher, (strip.name, strip.frame_start, strip.frame_end, strip.mute))
+                if strip.action is not None:
+                    MSFS_ExportManifest.hash_value(hasher, strip.action.name_full)
+                    MSFS_ExportManifest.hash_id(hasher, strip.action, visited)
@@ -12,12 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
 import re
 
 import bpy
+from bpy.app.handlers import persistent
 
 from .msfs_multi_export import MSFS_OT_MultiExportGLTF2
 
+msgbus_owner = object()
+
 
 class MultiExporterLOD(bpy.types.PropertyGroup):
     object: bpy.props.PointerProperty(name="", type=bpy.types.Object)
@@ -40,36 +44,141 @@ class MultiExporterLODGroup(bpy.types.PropertyGroup):
 
 
 class MSFS_LODGroupUtility:
+    # LOD visibility is cached until the next depsgraph update, which is triggered by any visibility change.
+    # This keeps redraws of the objects view cheap, as it checks the visibility of every LOD several times
+    visibility_cache = {}
+    view_layer_index = None
+
+    @staticmethod
+    def clear_visibility_cache():
+        MSFS_LODGroupUtility.visibility_cache = {}
+        MSFS_LODGroupUtility.view_layer_index = None
+
+    @staticmethod
+    def get_view_layer_index(context):
+        view_layer = context.view_layer
+        index = MSFS_LODGroupUtility.view_layer_index
+
+        if index is None or index["view_layer"] != view_layer:
+            # Checking visibility from the collection itself won't work, so we have to find the LayerCollection that contains our collection.
+            # Collections can be nested, so the whole layer collection tree is indexed
+            layer_collections = {}
+            stack = [view_layer.layer_collection]
+            while stack:
+                layer_collection = stack.pop()
+                layer_collections[layer_collection.collection] = layer_collection
+                stack.extend(layer_collection.children)
+
+            index = MSFS_LODGroupUtility.view_layer_index = {
+                "view_layer": view_layer,
+                "layer_collections": layer_collections,
+                "collections": set(bpy.data.collections),
+                "objects": set(view_layer.objects)
+            }
+            MSFS_LODGroupUtility.visibility_cache = {}
+
+        return index
+
     @staticmethod
     def lod_is_visible(context, lod):
         sort_by_collection = context.scene.multi_exporter_grouped_by_collections
+        show_hidden_objects = context.scene.multi_exporter_show_hidden_objects
+
+        index = MSFS_LODGroupUtility.get_view_layer_index(context)
+
+        item = lod.collection if sort_by_collection else lod.object
+        key = (item, sort_by_collection, show_hidden_objects)
+
+        visible = MSFS_LODGroupUtility.visibility_cache.get(key)
+        if visible is not None:
+            return visible
 
         if sort_by_collection:
-            # Checking visibility from the collection itself won't work, so we have to find the LayerCollection that contains our collection.
-            collection_hidden = False
-            for layer_collection in bpy.context.window.view_layer.layer_collection.children:
-                if layer_collection.collection == lod.collection:
-                    collection_hidden = not layer_collection.visible_get()
-
-            if (
-                (not context.scene.multi_exporter_show_hidden_objects and collection_hidden) or 
-                (lod.collection is None or lod.collection not in list(bpy.data.collections))
-            ):
-                return False
+            if lod.collection is None or lod.collection not in index["collections"]:
+                visible = False
+            else:
+                layer_collection = index["layer_collections"].get(lod.collection)
+                collection_hidden = layer_collection is not None and not layer_collection.visible_get()
+                visible = show_hidden_objects or not collection_hidden
         else:
-            if (
-                (not context.scene.multi_exporter_show_hidden_objects and lod.object.hide_get()) or 
-                (lod.object is None or lod.object not in list(bpy.context.window.view_layer.objects))
-            ):
-                return False
+            if lod.object is None or lod.object not in index["objects"]:
+                visible = False
+            else:
+                visible = show_hidden_objects or not lod.object.hide_get()
+
+        MSFS_LODGroupUtility.visibility_cache[key] = visible
+        return visible
+
+
+class MSFS_LODNameMatcher:
+    """
+    Finds the LOD group of an object or collection from its name.
+    Names are matched against LOD prefixes (xN_ by default) and suffixes (_LODN by default), separated by commas, where # stands
+    for the LOD number. Compiled patterns and results are cached as the same names are matched on every reload.
+    """
 
-        return True
+    default_prefixes = "x#_"
+    default_suffixes = "_LOD#"
+
+    def __new__(cls, *args, **kwargs):
+        raise RuntimeError("%s should not be instantiated" % cls)
+
+    @staticmethod
+    def get_schemes(scene):
+        return scene.multi_exporter_lod_prefixes, scene.multi_exporter_lod_suffixes
+
+    @staticmethod
+    def token_to_pattern(token):
+        return "[0-9]+".join(re.escape(part) for part in token.split("#"))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def get_pattern(prefixes, suffixes):
+        prefix_patterns = [MSFS_LODNameMatcher.token_to_pattern(token.strip()) for token in prefixes.split(",") if token.strip()]
+        suffix_patterns = [MSFS_LODNameMatcher.token_to_pattern(token.strip()) for token in suffixes.split(",") if token.strip()]
+
+        patterns = []
+        if prefix_patterns:
+            patterns.append("^(?:" + "|".join(prefix_patterns) + ")")
+        if suffix_patterns:
+            patterns.append("(?:" + "|".join(suffix_patterns) + ")")
+
+        if not patterns:
+            return None
+        return re.compile("|".join(patterns), re.IGNORECASE)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)  # Bounded, names of deleted or renamed items would otherwise pile up
+    def get_group_from_name(name, prefixes, suffixes):
+        pattern = MSFS_LODNameMatcher.get_pattern(prefixes, suffixes)
+        if pattern is None:
+            return name
+
+        # If an object starts with a LOD prefix or contains a LOD suffix, remove it to get the group name. Like the
+        # original matcher, only the last match is removed (everywhere it appears in the name).
+        # Otherwise, the object name is used as the group
+        matches = pattern.findall(name)
+        if not matches:
+            return name
+        return name.replace(matches[-1], "")
 
 
 class MSFS_OT_ReloadLODGroups(bpy.types.Operator):
     bl_idname = "msfs.reload_lod_groups"
     bl_label = "Reload LOD groups"
 
+    # Names and number of the objects or collections seen by the last reload of each scene, keyed on the scene pointer. Used
+    # to find the added, renamed and deleted items after an update
+    known_items = {}
+    is_reloading = False
+    # Set by operators that add many items at once and create their LOD groups themselves, until a timer runs once they
+    # are done. Depsgraph updates and rename notifications of the operator are only sent after it returns
+    is_suspended = False
+    # Changes found by the depsgraph handler and the message bus, applied from a timer
+    pending_names = set()
+    pending_check = False
+    pending_full_reload = False
+
     @staticmethod
     def update_grouped_by(self, context):
         context.scene.msfs_multi_exporter_lod_groups.clear()
@@ -77,84 +186,267 @@ class MSFS_OT_ReloadLODGroups(bpy.types.Operator):
 
     @staticmethod
     def get_group_from_name(name):
-        matches = re.findall("^(?i)x[0-9]_|_lod[0-9]+", name)
-        # If an object starts with xN_ or ends with _LODN, treat as an LOD
-        if matches:
-            # Get base object group name from object
-            for match in matches:
-                filtered_string = name.replace(match, "")
-            return filtered_string
-        else:
-            # If prefix or suffix isn't found, use the object name as the group
-            return name
+        prefixes, suffixes = MSFS_LODNameMatcher.get_schemes(bpy.context.scene)
+        return MSFS_LODNameMatcher.get_group_from_name(name, prefixes, suffixes)
+
+    @staticmethod
+    def update_name_schemes(self, context):
+        MSFS_LODNameMatcher.get_group_from_name.cache_clear()
+        context.scene.msfs_multi_exporter_lod_groups.clear()
+        MSFS_OT_ReloadLODGroups.reload_lod_groups(self, context)
 
     @staticmethod
     def get_lod_group_names(lod_groups):
         return [lod_group.group_name for lod_group in lod_groups]
 
     @staticmethod
-    def reload_lod_groups(self, context):
+    def get_lod_candidates(context):
+        if context.scene.multi_exporter_grouped_by_collections:
+            return list(bpy.data.collections)
+        return [obj for obj in context.scene.objects if obj.parent is None]
+
+    @staticmethod
+    def add_lods(context, items):
         lod_groups = context.scene.msfs_multi_exporter_lod_groups
         sort_by_collection = context.scene.multi_exporter_grouped_by_collections
 
-        # Remove deleted LODs
-        for i, lod_group in enumerate(lod_groups):
-            for j, lod in enumerate(lod_group.lods):
-                if sort_by_collection:
-                    if (
-                        not lod.collection in list(bpy.data.collections)
-                        or not MSFS_OT_ReloadLODGroups.get_group_from_name(lod.collection.name) == lod_group.group_name
-                    ):
-                        lod_groups[i].lods.remove(j)
-                        continue
-                else:
-                    if (
-                        not lod.object in list(context.scene.objects)
-                        or not MSFS_OT_ReloadLODGroups.get_group_from_name(lod.object.name) == lod_group.group_name
-                    ):
-                        lod_groups[i].lods.remove(j)
-                        continue
+        # Index the groups by name, and the LODs of each group as they are needed
+        group_indices = {lod_group.group_name: i for i, lod_group in enumerate(lod_groups)}
+        group_items = {}
+        prefixes, suffixes = MSFS_LODNameMatcher.get_schemes(context.scene)
 
-            if len(lod_group.lods) == 0:
-                lod_groups.remove(i)
+        for item in items:
+            group_name = MSFS_LODNameMatcher.get_group_from_name(item.name, prefixes, suffixes)
 
-        # Search for new groups
-        found_lod_groups = {}
-        if sort_by_collection:
-            for collection in bpy.data.collections:
-                lod_group = MSFS_OT_ReloadLODGroups.get_group_from_name(collection.name)
-                if lod_group not in found_lod_groups:
-                    found_lod_groups[lod_group] = []
-                found_lod_groups[lod_group].append(collection)
-        else:
-            for object in context.scene.objects:
-                if object.parent is None:
-                    lod_group = MSFS_OT_ReloadLODGroups.get_group_from_name(object.name)
-                    if lod_group not in found_lod_groups:
-                        found_lod_groups[lod_group] = []
-                    found_lod_groups[lod_group].append(object)
-
-        # Add to object groups
-        for lod_group in found_lod_groups:
-            if lod_group not in MSFS_OT_ReloadLODGroups.get_lod_group_names(lod_groups):
+            lod_group_index = group_indices.get(group_name)
+            if lod_group_index is None:
                 # Create LOD group
                 created_lod_group = lod_groups.add()
-                created_lod_group.group_name = lod_group
+                created_lod_group.group_name = group_name
+                lod_group_index = group_indices[group_name] = len(lod_groups) - 1
+
+            lod_group = lod_groups[lod_group_index]
+            if lod_group_index not in group_items:
+                group_items[lod_group_index] = {
+                    lod.collection if sort_by_collection else lod.object for lod in lod_group.lods
+                }
 
-            lod_group_index = MSFS_OT_ReloadLODGroups.get_lod_group_names(lod_groups).index(lod_group)
+            if item in group_items[lod_group_index]:
+                continue
 
+            lod = lod_group.lods.add()
             if sort_by_collection:
-                for collection in found_lod_groups[lod_group]:
-                    if collection not in [lod.collection for lod in lod_groups[lod_group_index].lods]:
-                        lod = lod_groups[lod_group_index].lods.add()
-                        lod.collection = collection
-                        lod.file_name = collection.name
+                lod.collection = item
+            else:
+                lod.object = item
+            lod.file_name = item.name
+            group_items[lod_group_index].add(item)
+
+        MSFS_OT_ReloadLODGroups.get_known_items(context)["names"].update(item.name for item in items)
+
+    @staticmethod
+    def get_known_items(context, candidates=None):
+        key = context.scene.as_pointer()
+        known_items = MSFS_OT_ReloadLODGroups.known_items.get(key)
+        if known_items is None:
+            # First time the scene is seen since the file was loaded, start from the items it has now
+            if candidates is None:
+                candidates = MSFS_OT_ReloadLODGroups.get_lod_candidates(context)
+            known_items = MSFS_OT_ReloadLODGroups.known_items[key] = {
+                "names": {item.name for item in candidates},
+                "count": MSFS_OT_ReloadLODGroups.get_item_count(context.scene)
+            }
+        return known_items
+
+    @staticmethod
+    def get_item_count(scene):
+        return len(bpy.data.collections if scene.multi_exporter_grouped_by_collections else scene.objects)
+
+    @staticmethod
+    def remove_invalid_lods(context, group_names=None):
+        # Remove the LODs whose item was deleted or doesn't match the group name anymore, in every group or only in the
+        # given ones
+        lod_groups = context.scene.msfs_multi_exporter_lod_groups
+        sort_by_collection = context.scene.multi_exporter_grouped_by_collections
+
+        if sort_by_collection:
+            valid_items = set(bpy.data.collections)
+        else:
+            valid_items = set(context.scene.objects)
+        prefixes, suffixes = MSFS_LODNameMatcher.get_schemes(context.scene)
+
+        # Going backwards so that removing an item doesn't shift the ones left to check
+        for i in reversed(range(len(lod_groups))):
+            lod_group = lod_groups[i]
+            if group_names is not None and lod_group.group_name not in group_names:
+                continue
+
+            for j in reversed(range(len(lod_group.lods))):
+                lod = lod_group.lods[j]
+                item = lod.collection if sort_by_collection else lod.object
+                if (
+                    item not in valid_items
+                    or not MSFS_LODNameMatcher.get_group_from_name(item.name, prefixes, suffixes) == lod_group.group_name
+                ):
+                    lod_group.lods.remove(j)
+
+            if len(lod_group.lods) == 0:
+                lod_groups.remove(i)
+
+    @staticmethod
+    def reload_lod_groups(self, context):
+        MSFS_OT_ReloadLODGroups.is_reloading = True
+        try:
+            MSFS_OT_ReloadLODGroups.remove_invalid_lods(context)
+
+            # Search for new groups
+            candidates = MSFS_OT_ReloadLODGroups.get_lod_candidates(context)
+            MSFS_OT_ReloadLODGroups.known_items.pop(context.scene.as_pointer(), None)
+            MSFS_OT_ReloadLODGroups.get_known_items(context, candidates)
+            MSFS_OT_ReloadLODGroups.add_lods(context, candidates)
+        finally:
+            MSFS_OT_ReloadLODGroups.is_reloading = False
+
+    @staticmethod
+    def update_changed_lods(context):
+        # Compare the items of the scene with the ones it had, only the groups of the renamed or deleted items are checked
+        candidates = MSFS_OT_ReloadLODGroups.get_lod_candidates(context)
+        known_items = MSFS_OT_ReloadLODGroups.get_known_items(context, candidates)
+        known_names = known_items["names"]
+
+        current_items = {item.name: item for item in candidates}
+        removed_names = known_names.difference(current_items)
+        added_items = [item for name, item in current_items.items() if name not in known_names]
+
+        if removed_names:
+            prefixes, suffixes = MSFS_LODNameMatcher.get_schemes(context.scene)
+            group_names = {MSFS_LODNameMatcher.get_group_from_name(name, prefixes, suffixes) for name in removed_names}
+            MSFS_OT_ReloadLODGroups.remove_invalid_lods(context, group_names)
+            known_names.difference_update(removed_names)
+
+        known_items["count"] = MSFS_OT_ReloadLODGroups.get_item_count(context.scene)
+        return added_items
+
+    @staticmethod
+    def depsgraph_update(scene, depsgraph):
+        # Only record what changed, the LOD groups can't be written while the depsgraph is evaluated
+        if (
+            MSFS_OT_ReloadLODGroups.is_reloading
+            or MSFS_OT_ReloadLODGroups.is_suspended
+            or not scene.multi_exporter_auto_reload_lods
+        ):
+            return
+
+        context = bpy.context
+        if context.scene != scene:
+            return
+
+        sort_by_collection = scene.multi_exporter_grouped_by_collections
+        known_items = MSFS_OT_ReloadLODGroups.get_known_items(context)
+        count = MSFS_OT_ReloadLODGroups.get_item_count(scene)
+
+        # Deleted items, find which ones from the timer
+        if count < known_items["count"]:
+            known_items["count"] = count
+            MSFS_OT_ReloadLODGroups.schedule_reload(check=True)
+            return
+
+        # Only look at the updated datablocks that we haven't seen yet
+        id_type = bpy.types.Collection if sort_by_collection else bpy.types.Object
+        known_names = known_items["names"]
+        new_names = []
+        for update in depsgraph.updates:
+            item = update.id
+            if isinstance(item, id_type) and item.name not in known_names:
+                item = item.original
+                if sort_by_collection or (item.parent is None and item.name in scene.objects):
+                    new_names.append(item.name)
+
+        known_items["count"] = count
+        if new_names:
+            MSFS_OT_ReloadLODGroups.pending_names.update(new_names)
+            MSFS_OT_ReloadLODGroups.schedule_reload()
+
+    @staticmethod
+    def schedule_reload(check=False, full=False):
+        if check:
+            MSFS_OT_ReloadLODGroups.pending_check = True
+        if full:
+            MSFS_OT_ReloadLODGroups.pending_full_reload = True
+        if not bpy.app.timers.is_registered(MSFS_OT_ReloadLODGroups.reload_from_timer):
+            bpy.app.timers.register(MSFS_OT_ReloadLODGroups.reload_from_timer, first_interval=0.0)
+
+    @staticmethod
+    def suspend_auto_reload():
+        MSFS_OT_ReloadLODGroups.is_suspended = True
+        if not bpy.app.timers.is_registered(MSFS_OT_ReloadLODGroups.resume_auto_reload):
+            bpy.app.timers.register(MSFS_OT_ReloadLODGroups.resume_auto_reload, first_interval=0.1)
+
+    @staticmethod
+    def resume_auto_reload():
+        MSFS_OT_ReloadLODGroups.is_suspended = False
+
+        # The operator handled the items it added, start again from the current names
+        MSFS_OT_ReloadLODGroups.known_items = {}
+        MSFS_OT_ReloadLODGroups.clear_pending()
+        return None
+
+    @staticmethod
+    def clear_pending():
+        MSFS_OT_ReloadLODGroups.pending_names = set()
+        MSFS_OT_ReloadLODGroups.pending_check = False
+        MSFS_OT_ReloadLODGroups.pending_full_reload = False
+
+    @staticmethod
+    def reload_from_timer():
+        full_reload = MSFS_OT_ReloadLODGroups.pending_full_reload
+        check = MSFS_OT_ReloadLODGroups.pending_check
+        names = MSFS_OT_ReloadLODGroups.pending_names
+        MSFS_OT_ReloadLODGroups.clear_pending()
+
+        context = bpy.context
+        if context.scene is None or not context.scene.multi_exporter_auto_reload_lods:
+            return None
+
+        if full_reload:
+            MSFS_OT_ReloadLODGroups.reload_lod_groups(None, context)
+            return None
+
+        MSFS_OT_ReloadLODGroups.is_reloading = True
+        try:
+            items = []
+            if check:
+                items = MSFS_OT_ReloadLODGroups.update_changed_lods(context)
+
+            # Items are looked up again by name, they may have been removed since the update
+            if context.scene.multi_exporter_grouped_by_collections:
+                items.extend(bpy.data.collections.get(name) for name in names)
             else:
-                for obj in found_lod_groups[lod_group]:
-                    if obj not in [lod.object for lod in lod_groups[lod_group_index].lods]:
-                        lod = lod_groups[lod_group_index].lods.add()
-                        lod.object = obj
-                        lod.file_name = obj.name
+                items.extend(context.scene.objects.get(name) for name in names)
+            items = list({item: None for item in items if item is not None})
+
+            if items:
+                MSFS_OT_ReloadLODGroups.add_lods(context, items)
+        finally:
+            MSFS_OT_ReloadLODGroups.is_reloading = False
+        return None
+
+    @staticmethod
+    def name_changed(*args):
+        # Renames and re-parenting are reported through the message bus, without the item that changed. Find it once the
+        # current operation is done
+        if not MSFS_OT_ReloadLODGroups.is_suspended:
+            MSFS_OT_ReloadLODGroups.schedule_reload(check=True)
+
+    @staticmethod
+    def subscribe_to_renames():
+        for key in ((bpy.types.Object, "name"), (bpy.types.Object, "parent"), (bpy.types.Collection, "name")):
+            bpy.msgbus.subscribe_rna(
+                key=key,
+                owner=msgbus_owner,
+                args=(),
+                notify=MSFS_OT_ReloadLODGroups.name_changed
+            )
 
     def execute(self, context):
         MSFS_OT_ReloadLODGroups.reload_lod_groups(self, context)
@@ -177,8 +469,11 @@ class MSFS_PT_MultiExporterObjectsView(bpy.types.Panel):
         layout = self.layout
 
         layout.operator(MSFS_OT_ReloadLODGroups.bl_idname, text="Reload LODs")
+        layout.prop(context.scene, "multi_exporter_auto_reload_lods")
         layout.prop(context.scene, "multi_exporter_show_hidden_objects")
         layout.prop(context.scene, "multi_exporter_grouped_by_collections")
+        layout.prop(context.scene, "multi_exporter_lod_prefixes")
+        layout.prop(context.scene, "multi_exporter_lod_suffixes")
 
         lod_groups = context.scene.msfs_multi_exporter_lod_groups
         sort_by_collection = context.scene.multi_exporter_grouped_by_collections
@@ -240,6 +535,34 @@ class MSFS_PT_MultiExporterObjectsView(bpy.types.Panel):
         row.operator(MSFS_OT_MultiExportGLTF2.bl_idname, text="Export")
 
 
+@persistent
+def depsgraph_update_post(scene, depsgraph):
+    MSFS_LODGroupUtility.clear_visibility_cache()
+    MSFS_OT_ReloadLODGroups.depsgraph_update(scene, depsgraph)
+
+
+@persistent
+def undo_post(dummy):
+    MSFS_LODGroupUtility.clear_visibility_cache()
+
+    # Undo restores the LOD groups along with the objects, start again from the restored items
+    MSFS_OT_ReloadLODGroups.known_items = {}
+    MSFS_OT_ReloadLODGroups.clear_pending()
+
+
+@persistent
+def load_post(dummy):
+    MSFS_LODGroupUtility.clear_visibility_cache()
+
+    # Message bus subscriptions are cleared when a file is loaded
+    MSFS_OT_ReloadLODGroups.known_items = {}
+    MSFS_OT_ReloadLODGroups.is_suspended = False
+    MSFS_OT_ReloadLODGroups.clear_pending()
+    MSFS_LODNameMatcher.get_group_from_name.cache_clear()
+    bpy.msgbus.clear_by_owner(msgbus_owner)
+    MSFS_OT_ReloadLODGroups.subscribe_to_renames()
+
+
 def register():
     bpy.types.Scene.msfs_multi_exporter_lod_groups = bpy.props.CollectionProperty(type=MultiExporterLODGroup)
     bpy.types.Scene.multi_exporter_show_hidden_objects = bpy.props.BoolProperty(name="Show hidden objects", default=True)
@@ -248,3 +571,38 @@ def register():
         default=False,
         update=MSFS_OT_ReloadLODGroups.update_grouped_by
     )
+    bpy.types.Scene.multi_exporter_lod_prefixes = bpy.props.StringProperty(
+        name="LOD prefixes",
+        description="Comma separated name prefixes marking a LOD, # stands for the LOD number (e.g. x#_, LOD#_)",
+        default=MSFS_LODNameMatcher.default_prefixes,
+        update=MSFS_OT_ReloadLODGroups.update_name_schemes
+    )
+    bpy.types.Scene.multi_exporter_lod_suffixes = bpy.props.StringProperty(
+        name="LOD suffixes",
+        description="Comma separated name suffixes marking a LOD, # stands for the LOD number (e.g. _LOD#, _L#)",
+        default=MSFS_LODNameMatcher.default_suffixes,
+        update=MSFS_OT_ReloadLODGroups.update_name_schemes
+    )
+    bpy.types.Scene.multi_exporter_auto_reload_lods = bpy.props.BoolProperty(
+        name="Reload LODs automatically",
+        description="Update the LOD groups when objects or collections are added, renamed or deleted",
+        default=False
+    )
+
+    bpy.app.handlers.depsgraph_update_post.append(depsgraph_update_post)
+    bpy.app.handlers.load_post.append(load_post)
+    bpy.app.handlers.undo_post.append(undo_post)
+    bpy.app.handlers.redo_post.append(undo_post)
+    MSFS_OT_ReloadLODGroups.subscribe_to_renames()
+
+
+def unregister():
+    if depsgraph_update_post in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(depsgraph_update_post)
+    if load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(load_post)
+    if undo_post in bpy.app.handlers.undo_post:
+        bpy.app.handlers.undo_post.remove(undo_post)
+    if undo_post in bpy.app.handlers.redo_post:
+        bpy.app.handlers.redo_post.remove(undo_post)
+    bpy.msgbus.clear_by_owner(msgbus_owner)
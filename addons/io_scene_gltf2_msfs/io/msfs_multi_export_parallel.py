@@ -0,0 +1,186 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import bpy
+
+from .msfs_image_pool import MSFSImagePool
+
+
+class MSFS_ParallelExport:
+    """
+    Runs multi-export jobs in background Blender processes.
+    The current file is saved to a snapshot that every worker loads, each worker then exports its share of the jobs
+    and writes one result file per job so progress can be followed from the main process.
+    """
+
+    def __new__(cls, *args, **kwargs):
+        raise RuntimeError("%s should not be instantiated" % cls)
+
+    @staticmethod
+    def get_result_path(temp_dir, index):
+        return os.path.join(temp_dir, "job_%d.result.json" % index)
+
+    @staticmethod
+    def start(jobs, worker_count):
+        temp_dir = tempfile.mkdtemp(prefix="msfs_multi_export_")
+        snapshot_path = os.path.join(temp_dir, "snapshot.blend")
+        bpy.ops.wm.save_as_mainfile(filepath=snapshot_path, copy=True)
+
+        worker_count = max(1, min(worker_count, len(jobs)))
+        workers = []
+        for worker_index in range(worker_count):
+            worker_jobs = [dict(job, index=i) for i, job in enumerate(jobs) if i % worker_count == worker_index]
+
+            job_file = os.path.join(temp_dir, "worker_%d.json" % worker_index)
+            with open(job_file, "w") as f:
+                json.dump({"temp_dir": temp_dir, "jobs": worker_jobs}, f)
+
+            log_path = os.path.join(temp_dir, "worker_%d.log" % worker_index)
+            expression = "import importlib; importlib.import_module(%r).MSFS_ParallelExport.worker_main(%r)" % (__name__, job_file)
+            with open(log_path, "w") as log:
+                process = subprocess.Popen(
+                    [
+                        bpy.app.binary_path,
+                        "--background",
+                        snapshot_path,
+                        "--python-exit-code",
+                        "1",
+                        "--python-expr",
+                        expression
+                    ],
+                    stdout=log,
+                    stderr=subprocess.STDOUT
+                )
+
+            workers.append({
+                "process": process,
+                "jobs": [job["index"] for job in worker_jobs],
+                "log": log_path
+            })
+
+        return {
+            "temp_dir": temp_dir,
+            "jobs": jobs,
+            "workers": workers,
+            "results": [None] * len(jobs)
+        }
+
+    @staticmethod
+    def poll(handle):
+        # Collect the results written since the last poll
+        finished = []
+        for worker in handle["workers"]:
+            exit_code = worker["process"].poll()
+
+            for index in worker["jobs"]:
+                if handle["results"][index] is not None:
+                    continue
+
+                result_path = MSFS_ParallelExport.get_result_path(handle["temp_dir"], index)
+                if os.path.exists(result_path):
+                    with open(result_path, "r") as f:
+                        result = json.load(f)
+                elif exit_code is not None:
+                    job = handle["jobs"][index]
+                    result = {
+                        "name": job["name"],
+                        "file_path": job["file_path"],
+                        "status": "FAILED",
+                        "message": "Worker exited with code " + str(exit_code) + " (see " + worker["log"] + ")"
+                    }
+                else:
+                    continue
+
+                handle["results"][index] = result
+                finished.append(result)
+
+        return finished
+
+    @staticmethod
+    def is_finished(handle):
+        return all(result is not None for result in handle["results"])
+
+    @staticmethod
+    def cancel(handle):
+        for worker in handle["workers"]:
+            if worker["process"].poll() is None:
+                worker["process"].terminate()
+
+        for worker in handle["workers"]:
+            worker["process"].wait()
+
+    @staticmethod
+    def cleanup(handle):
+        # Keep the worker logs around if something went wrong
+        if all(result is not None and result["status"] != "FAILED" for result in handle["results"]):
+            shutil.rmtree(handle["temp_dir"], ignore_errors=True)
+
+    @staticmethod
+    def run(context, jobs, worker_count):
+        handle = MSFS_ParallelExport.start(jobs, worker_count)
+
+        wm = context.window_manager
+        wm.progress_begin(0, len(jobs))
+        done = 0
+        try:
+            while not MSFS_ParallelExport.is_finished(handle):
+                for result in MSFS_ParallelExport.poll(handle):
+                    done += 1
+                    wm.progress_update(done)
+                    print("[ASOBO] Exported " + result["name"] + " (" + str(done) + "/" + str(len(jobs)) + ")")
+                time.sleep(0.1)
+        finally:
+            wm.progress_end()
+            MSFS_ParallelExport.cancel(handle)
+            MSFS_ParallelExport.cleanup(handle)
+
+        return handle["results"]
+
+    @staticmethod
+    def worker_main(job_file):
+        from .msfs_multi_export import MSFS_OT_MultiExportGLTF2
+
+        with open(job_file, "r") as f:
+            data = json.load(f)
+
+        context = bpy.context
+        objects_by_name = {obj.name: obj for obj in context.view_layer.objects}
+
+        MSFSImagePool.begin()
+        try:
+            for job in data["jobs"]:
+                try:
+                    result = MSFS_OT_MultiExportGLTF2.export_job(context, job, objects_by_name)
+                except Exception as e:
+                    result = {
+                        "name": job["name"],
+                        "file_path": job["file_path"],
+                        "status": "FAILED",
+                        "message": str(e)
+                    }
+
+                # Write to a temporary file first so the main process never reads a partial result
+                result_path = MSFS_ParallelExport.get_result_path(data["temp_dir"], job["index"])
+                with open(result_path + ".tmp", "w") as f:
+                    json.dump(result, f)
+                os.replace(result_path + ".tmp", result_path)
+        finally:
+            MSFSImagePool.end()
@@ -14,6 +14,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+
 import bpy
 
 
@@ -438,7 +440,37 @@ class MSFS_MultiExporterSettings(bpy.types.PropertyGroup):
         ),
         default=False,
     )
-    
+
+    #### Performance Options
+    ## Incremental export Check
+    use_incremental_export: bpy.props.BoolProperty(
+        name="Incremental Export",
+        description=(
+            "Skip the files whose objects, materials and export settings haven't changed since the last export. "
+            "A manifest of content hashes is stored in each export folder"
+        ),
+        default=False,
+    )
+
+    ## Parallel export Check
+    use_parallel_export: bpy.props.BoolProperty(
+        name="Parallel Export",
+        description=(
+            "Export LODs and presets in background Blender processes. "
+            "The current file is saved to a temporary snapshot that the workers load"
+        ),
+        default=False,
+    )
+
+    ## Parallel export worker count
+    parallel_worker_count: bpy.props.IntProperty(
+        name="Workers",
+        description="Number of background Blender processes used for parallel export",
+        default=max(1, min(4, os.cpu_count() or 1)),
+        min=1,
+        max=64,
+    )
+
 
 
 class MSFS_PT_export_main(bpy.types.Panel):
@@ -734,6 +766,43 @@ class MSFS_PT_export_animation_skinning(bpy.types.Panel):
             layout.label(text="Export only deformation bones is not possible when not sampling animation")
 
 
+class MSFS_PT_export_performance(bpy.types.Panel):
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_label = "Performance"
+    bl_parent_id = "MSFS_PT_MultiExporter"
+    bl_options = {"DEFAULT_CLOSED"}
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene.msfs_multi_exporter_current_tab == "SETTINGS"
+
+    def draw(self, context):
+        layout = self.layout
+        layout.use_property_split = True
+        layout.use_property_decorate = False  # No animation.
+
+        settings = context.scene.msfs_multi_exporter_settings
+
+        layout.prop(settings, "use_incremental_export")
+        layout.prop(settings, "use_parallel_export")
+        col = layout.column()
+        col.active = settings.use_parallel_export
+        col.prop(settings, "parallel_worker_count")
+
+        props = context.scene.msfs_exporter_properties
+        layout.prop(props, "enable_profiler")
+        col = layout.column()
+        col.active = props.enable_profiler
+        col.prop(props, "profiler_report_format")
+
+        layout.prop(props, "use_texture_cache")
+        col = layout.column()
+        col.active = props.use_texture_cache
+        col.prop(props, "texture_cache_dir")
+        col.prop(props, "texture_cache_max_size")
+
+
 def register():
     bpy.types.Scene.msfs_multi_exporter_settings = bpy.props.PointerProperty(
         type=MSFS_MultiExporterSettings
@@ -0,0 +1,73 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import csv
+import json
+import os
+import time
+
+
+class MSFSExportProfiler:
+    """
+    Records the call count, total and max wall time of the export hooks and material extensions.
+    """
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextlib.contextmanager
+    def measure(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, elapsed):
+        timing = self.timings.get(name)
+        if timing is None:
+            self.timings[name] = timing = {"count": 0, "total": 0.0, "max": 0.0}
+
+        timing["count"] += 1
+        timing["total"] += elapsed
+        timing["max"] = max(timing["max"], elapsed)
+
+    def get_rows(self):
+        rows = [
+            {
+                "name": name,
+                "count": timing["count"],
+                "total_ms": timing["total"] * 1000,
+                "max_ms": timing["max"] * 1000
+            }
+            for name, timing in self.timings.items()
+        ]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def write_report(self, file_path, report_format):
+        # Write the report next to the exported file
+        report_path = os.path.splitext(file_path)[0] + ".msfs_profile." + report_format.lower()
+
+        rows = self.get_rows()
+        if report_format == "CSV":
+            with open(report_path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=["name", "count", "total_ms", "max_ms"])
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            with open(report_path, "w") as f:
+                json.dump({"file": os.path.basename(file_path), "timings": rows}, f, indent=4)
+
+        return report_path
@@ -0,0 +1,217 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import bpy
+import numpy as np
+
+from .msfs_image_pool import MSFSImagePool
+
+
+class MSFSTextureCache:
+    """
+    On disk cache of the encoded textures, kept between export sessions.
+    Entries are keyed on the image content, its colorspace and the image export settings, and keep the sampler and
+    texture coordinate set the texture was gathered with. Cached textures are copied to the export folder instead of being
+    encoded again. The least recently used entries are evicted once the cache grows over its maximum size.
+    The index can be saved by several export processes at once, it is merged with the one on disk under a lock file.
+    """
+
+    INDEX_FILE = "index.json"
+    LOCK_FILE = "index.lock"
+    # Seconds to wait for another process to save the index, and age after which a lock is considered left over by a
+    # process that crashed
+    LOCK_TIMEOUT = 10.0
+    STALE_LOCK_AGE = 60.0
+
+    def __init__(self, cache_dir, max_size):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.entries = self.read_index()
+        # Keys used, stored or found broken during this export, merged into the index on disk when saving
+        self.updated = set()
+        self.removed = set()
+
+    @staticmethod
+    def get(export_settings):
+        # One cache per export, created the first time a texture is exported
+        if "msfs_texture_cache" not in export_settings:
+            props = bpy.context.scene.msfs_exporter_properties
+
+            # Embedded images aren't written as separate files, they are left to the glTF exporter
+            texture_cache = None
+            if props.use_texture_cache and export_settings["gltf_format"] != "GLB":
+                cache_dir = bpy.path.abspath(props.texture_cache_dir) if props.texture_cache_dir else os.path.join(tempfile.gettempdir(), "msfs_texture_cache")
+                texture_cache = MSFSTextureCache(cache_dir, props.texture_cache_max_size * 1024 * 1024)
+            export_settings["msfs_texture_cache"] = texture_cache
+
+        return export_settings["msfs_texture_cache"]
+
+    @staticmethod
+    def get_key(blender_image, type, export_settings):
+        key = hashlib.sha1()
+        for value in (
+            type,
+            blender_image.colorspace_settings.name,
+            blender_image.alpha_mode,
+            blender_image.file_format,
+            export_settings.get("gltf_image_format"),
+            export_settings.get("gltf_image_quality"),
+        ):
+            key.update(str(value).encode())
+
+        # Use the cheapest way of identifying the pixels: the packed data, the file on disk, or the pixels themselves
+        file_path = bpy.path.abspath(blender_image.filepath_raw, library=blender_image.library)
+        if blender_image.packed_file is not None:
+            key.update(blender_image.packed_file.data)
+        elif blender_image.source == "FILE" and not blender_image.is_dirty and os.path.isfile(file_path):
+            stat = os.stat(file_path)
+            key.update((os.path.normcase(os.path.abspath(file_path)) + str(stat.st_mtime_ns) + str(stat.st_size)).encode())
+        else:
+            pixels = np.empty(len(blender_image.pixels), dtype=np.float32)
+            blender_image.pixels.foreach_get(pixels)
+            key.update(str(tuple(blender_image.size)).encode())
+            key.update(pixels.tobytes())
+
+        return key.hexdigest()
+
+    def read_index(self):
+        try:
+            with open(os.path.join(self.cache_dir, MSFSTextureCache.INDEX_FILE), "r") as f:
+                return json.load(f)["entries"]
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def get_path(self, entry):
+        return os.path.join(self.cache_dir, entry["file"])
+
+    def load(self, key):
+        # Entries written before the sampler was cached are gathered again
+        entry = self.entries.get(key)
+        if entry is None or "sampler" not in entry:
+            return None
+
+        if not os.path.isfile(self.get_path(entry)):
+            self.remove(key)
+            return None
+
+        entry["last_used"] = time.time()
+        self.updated.add(key)
+        return entry
+
+    def remove(self, key):
+        self.entries.pop(key, None)
+        self.updated.discard(key)
+        self.removed.add(key)
+
+    def export_file(self, key, path):
+        # Copy the cached texture rather than linking it, editing the exported file in place would change the cache
+        try:
+            MSFSImagePool.copy_file(self.get_path(self.entries[key]), path)
+        except OSError:
+            # Evicted by another export process in the meantime
+            self.remove(key)
+            return False
+        return True
+
+    def store(self, key, data, mime_type, name, sampler=None, tex_coord=None):
+        file_name = key + (".png" if mime_type == "image/png" else ".jpg")
+        MSFSImagePool.write_file(os.path.join(self.cache_dir, file_name), data)
+
+        self.entries[key] = {
+            "file": file_name,
+            "mime_type": mime_type,
+            "name": name,
+            "sampler": sampler,
+            "tex_coord": tex_coord,
+            "size": len(data),
+            "last_used": time.time()
+        }
+        self.updated.add(key)
+        self.removed.discard(key)
+
+    def evict(self):
+        total_size = sum(entry["size"] for entry in self.entries.values())
+        for key, entry in sorted(self.entries.items(), key=lambda item: item[1]["last_used"]):
+            if total_size <= self.max_size:
+                break
+
+            try:
+                os.remove(self.get_path(entry))
+            except OSError:
+                pass
+            total_size -= entry["size"]
+            del self.entries[key]
+
+    @contextlib.contextmanager
+    def lock_index(self):
+        lock_path = os.path.join(self.cache_dir, MSFSTextureCache.LOCK_FILE)
+        deadline = time.monotonic() + MSFSTextureCache.LOCK_TIMEOUT
+        fd = None
+
+        while fd is None:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > MSFSTextureCache.STALE_LOCK_AGE:
+                        os.remove(lock_path)
+                        continue
+                except OSError:
+                    # Released in the meantime
+                    continue
+
+                if time.monotonic() > deadline:
+                    print("[ASOBO] Texture cache index is locked, saving it without the lock")
+                    break
+                time.sleep(0.05)
+
+        try:
+            yield
+        finally:
+            if fd is not None:
+                os.close(fd)
+                try:
+                    os.remove(lock_path)
+                except OSError:
+                    pass
+
+    def save(self):
+        if not self.updated and not self.removed:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with self.lock_index():
+            # Other export processes may have saved the index since it was read, only apply the changes of this export
+            entries = self.read_index()
+            for key in self.removed:
+                entries.pop(key, None)
+            for key in self.updated:
+                if key in self.entries:
+                    entries[key] = self.entries[key]
+            self.entries = entries
+
+            self.evict()
+
+            index = json.dumps({"entries": self.entries})
+            MSFSImagePool.write_file(os.path.join(self.cache_dir, MSFSTextureCache.INDEX_FILE), index.encode())
+
+        self.updated = set()
+        self.removed = set()
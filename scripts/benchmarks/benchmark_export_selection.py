@@ -0,0 +1,100 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Time to gather the objects of every LOD with MSFS_OT_MultiExportGLTF2.gather_jobs, against the previous selection code that
+# listed the view layer objects for every visited object.
+#   blender --background --factory-startup --python scripts/benchmarks/benchmark_export_selection.py
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import common  # noqa: E402
+
+import bpy  # noqa: E402
+
+SCENE_SIZES = (1000, 5000, 10000, 30000)
+# The previous code is quadratic, larger scenes take minutes
+MAX_PREVIOUS_SIZE = 5000
+CHILDREN_PER_LOD = 9
+
+
+def build_scene(object_count):
+    common.reset_file()
+    context = bpy.context
+    collection = context.scene.collection
+
+    # LOD roots with a flat list of children, each LOD holds CHILDREN_PER_LOD + 1 objects
+    for i in range(object_count // (CHILDREN_PER_LOD + 1)):
+        root = bpy.data.objects.new("Group%d_LOD%d" % (i // 4, i % 4), None)
+        collection.objects.link(root)
+        for j in range(CHILDREN_PER_LOD):
+            child = bpy.data.objects.new("Part%d_%d" % (i, j), None)
+            child.parent = root
+            collection.objects.link(child)
+
+    context.view_layer.update()
+
+    from io_scene_gltf2_msfs.io.msfs_multi_export_objects import MSFS_OT_ReloadLODGroups
+    MSFS_OT_ReloadLODGroups.reload_lod_groups(None, context)
+    for lod_group in context.scene.msfs_multi_exporter_lod_groups:
+        for lod in lod_group.lods:
+            lod.enabled = True
+
+
+def previous_selection(context):
+    # Selection code of the multi-exporter before the view layer index
+    from io_scene_gltf2_msfs.io.msfs_multi_export_objects import MSFS_LODGroupUtility
+
+    def select_recursive(obj, selected):
+        if obj in list(context.view_layer.objects):
+            selected.append(obj)
+            for child in obj.children:
+                select_recursive(child, selected)
+
+    for lod_group in context.scene.msfs_multi_exporter_lod_groups:
+        for lod in lod_group.lods:
+            if lod.enabled and MSFS_LODGroupUtility.lod_is_visible(context, lod):
+                select_recursive(lod.object, [])
+
+
+def main():
+    common.register_addon()
+    from io_scene_gltf2_msfs.io.msfs_multi_export import MSFS_OT_MultiExportGLTF2
+
+    rows = []
+    for object_count in SCENE_SIZES:
+        build_scene(object_count)
+        context = bpy.context
+
+        current = common.measure(lambda: MSFS_OT_MultiExportGLTF2.gather_jobs(context, "OBJECTS"))
+        previous = None
+        if object_count <= MAX_PREVIOUS_SIZE:
+            previous = common.measure(lambda: previous_selection(context), repeat=1)
+
+        rows.append((
+            object_count,
+            common.format_time(current),
+            common.format_time(current / object_count),
+            common.format_time(previous)
+        ))
+
+    common.print_table(
+        "Gathering the objects of every LOD",
+        ("objects", "gather_jobs", "per object", "previous"),
+        rows
+    )
+
+
+main()
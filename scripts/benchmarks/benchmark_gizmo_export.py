@@ -0,0 +1,121 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Time to export the collision gizmos of a mesh with 10k child gizmos with MSFSGizmo.export, against the previous recursive
+# export that looked every child up in the scene and removed the gizmo nodes one at a time.
+#   blender --background --factory-startup --python scripts/benchmarks/benchmark_gizmo_export.py
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import common  # noqa: E402
+
+import bpy  # noqa: E402
+
+GIZMO_COUNTS = (1000, 10000)
+GIZMO_TYPES = ("sphere", "box", "cylinder")
+# The mesh also has regular children, which stay in the exported node tree
+MESH_CHILD_COUNT = 100
+
+
+def build_scene(gizmo_count):
+    common.reset_file()
+    collection = bpy.context.scene.collection
+
+    mesh = bpy.data.objects.new("Mesh", bpy.data.meshes.new("Mesh"))
+    collection.objects.link(mesh)
+    for i in range(gizmo_count):
+        gizmo = bpy.data.objects.new("Gizmo%d" % i, None)
+        gizmo.msfs_gizmo_type = GIZMO_TYPES[i % len(GIZMO_TYPES)]
+        gizmo.parent = mesh
+        collection.objects.link(gizmo)
+    for i in range(MESH_CHILD_COUNT):
+        child = bpy.data.objects.new("Child%d" % i, None)
+        child.parent = mesh
+        collection.objects.link(child)
+
+
+def gather_nodes(gizmo_count):
+    # Nodes as gathered by the glTF exporter, named after their object
+    from io_scene_gltf2.io.com import gltf2_io
+
+    def create_node(name, children=None, mesh=None, scale=None):
+        return gltf2_io.Node(
+            camera=None, children=children or [], extensions=None, extras=None, matrix=None, mesh=mesh, name=name,
+            rotation=None, scale=scale, skin=None, translation=[0.0, 0.0, 0.0], weights=None
+        )
+
+    children = [create_node("Gizmo%d" % i, scale=[1.0, 2.0, 3.0]) for i in range(gizmo_count)]
+    children.extend(create_node("Child%d" % i) for i in range(MESH_CHILD_COUNT))
+    mesh = gltf2_io.Mesh(extensions={}, extras=None, name="Mesh", primitives=[], weights=None)
+    return [create_node("Mesh", children=children, mesh=mesh)]
+
+
+def previous_export(nodes, blender_scene, export_settings):
+    # Previous MSFSGizmo.export, without the extensions it added
+    for node in nodes:
+        collisions = []
+        for child in list(node.children):
+            blender_object = blender_scene.objects.get(child.name)
+            if blender_object is None:
+                continue
+            if blender_object.parent is None or blender_object.parent.type != "MESH":
+                continue
+            if blender_object.msfs_gizmo_type != "NONE":
+                if child.scale is None:
+                    child.scale = [1.0, 1.0, 1.0]
+                if export_settings["gltf_yup"]:
+                    child.scale = [child.scale[2], child.scale[0], child.scale[1]]
+                else:
+                    child.scale = [child.scale[1], child.scale[0], child.scale[2]]
+                collisions.append({"type": blender_object.msfs_gizmo_type, "translation": child.translation})
+                node.children.remove(child)
+        previous_export(node.children, blender_scene, export_settings)
+
+
+def measure_export(export, gizmo_count, repeat=3):
+    # The export removes the gizmo nodes, every run gets freshly gathered nodes
+    best = float("inf")
+    for _ in range(repeat):
+        nodes = gather_nodes(gizmo_count)
+        start = time.perf_counter()
+        export(nodes, bpy.context.scene, {"gltf_yup": True})
+        best = min(best, time.perf_counter() - start)
+
+    assert len(nodes[0].children) == MESH_CHILD_COUNT
+    return best
+
+
+def main():
+    common.register_addon()
+    from io_scene_gltf2_msfs.io.msfs_gizmo import MSFSGizmo
+
+    rows = []
+    for gizmo_count in GIZMO_COUNTS:
+        build_scene(gizmo_count)
+        current = measure_export(MSFSGizmo.export, gizmo_count)
+        previous = measure_export(previous_export, gizmo_count, repeat=1)
+        rows.append((
+            gizmo_count,
+            common.format_time(current),
+            common.format_time(current / gizmo_count),
+            common.format_time(previous)
+        ))
+
+    common.print_table("Exporting the collision gizmos of a mesh", ("gizmos", "export", "per gizmo", "previous"), rows)
+
+
+main()
@@ -0,0 +1,93 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Time to find the LOD group of 100k synthetic names with MSFS_LODNameMatcher, against matching each name with an uncompiled
+# pattern like the previous code did.
+#   blender --background --factory-startup --python scripts/benchmarks/benchmark_lod_name_matcher.py
+
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import common  # noqa: E402
+
+NAME_COUNT = 100000
+
+
+def get_names():
+    names = []
+    for i in range(NAME_COUNT):
+        base = "Part%d" % (i // 8)
+        kind = i % 4
+        if kind == 0:
+            names.append(base + "_LOD" + str(i % 8))
+        elif kind == 1:
+            names.append("x" + str(i % 8) + "_" + base)
+        elif kind == 2:
+            names.append(base + "_lod" + str(10 + i % 8))
+        else:
+            names.append(base)
+    return names
+
+
+def previous_get_group_from_name(name):
+    # Previous matcher, with the inline flag moved to the front so that it still compiles on recent Python versions
+    matches = re.findall("(?i)^x[0-9]_|_lod[0-9]+", name)
+    if matches:
+        return name.replace(matches[-1], "")
+    return name
+
+
+def main():
+    common.register_addon()
+    from io_scene_gltf2_msfs.io.msfs_multi_export_objects import MSFS_LODNameMatcher
+
+    names = get_names()
+    prefixes = MSFS_LODNameMatcher.default_prefixes
+    suffixes = MSFS_LODNameMatcher.default_suffixes
+
+    def match_cold():
+        MSFS_LODNameMatcher.get_group_from_name.cache_clear()
+        for name in names:
+            MSFS_LODNameMatcher.get_group_from_name(name, prefixes, suffixes)
+
+    def match_previous():
+        for name in names:
+            previous_get_group_from_name(name)
+
+    # Both matchers must agree on the names they can both read
+    for name in names:
+        assert MSFS_LODNameMatcher.get_group_from_name(name, prefixes, suffixes) == previous_get_group_from_name(name), name
+
+    # The cache is bounded, only the most recent names are still cached after a cold run
+    recent_names = names[-4096:]
+
+    def match_cached():
+        for name in recent_names:
+            MSFS_LODNameMatcher.get_group_from_name(name, prefixes, suffixes)
+
+    rows = []
+    for label, function, count in (
+        ("previous", match_previous, NAME_COUNT),
+        ("compiled, cold cache", match_cold, NAME_COUNT),
+        ("compiled, cached names", match_cached, len(recent_names)),
+    ):
+        duration = common.measure(function)
+        rows.append((label, count, common.format_time(duration), common.format_time(duration / count)))
+
+    common.print_table("Finding the LOD group of synthetic names", ("matcher", "names", "time", "per name"), rows)
+
+
+main()
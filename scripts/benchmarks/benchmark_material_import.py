@@ -0,0 +1,92 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Time to set the properties of 500 imported MSFS materials the way MSFSMaterial.create does, with the node tree built once
+# per material at the end of a deferred batch, against the previous behaviour that updated the node tree on every property.
+#   blender --background --factory-startup --python scripts/benchmarks/benchmark_material_import.py
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import common  # noqa: E402
+
+import bpy  # noqa: E402
+
+MATERIAL_COUNT = 500
+MATERIAL_TYPES = ("msfs_standard", "msfs_glass", "msfs_geo_decal", "msfs_parallax")
+
+
+def set_properties(mat, i):
+    # Same order as the import: the material type first, then the values read from the glTF file
+    mat.msfs_material_type = MATERIAL_TYPES[i % len(MATERIAL_TYPES)]
+    mat.msfs_alpha_mode = "MASK"
+    mat.msfs_alpha_cutoff = 0.3
+    mat.msfs_base_color_factor = (0.5, 0.4, 0.3, 1.0)
+    mat.msfs_emissive_factor = (0.1, 0.1, 0.1)
+    mat.msfs_metallic_factor = 0.2
+    mat.msfs_roughness_factor = 0.7
+    mat.msfs_normal_scale = 0.8
+    mat.msfs_double_sided = True
+
+
+def import_materials(deferred):
+    from io_scene_gltf2_msfs.blender.msfs_material_prop_update import MSFS_Material_Property_Update
+
+    for i in range(MATERIAL_COUNT):
+        mat = bpy.data.materials.new("Material%d" % i)
+        mat.use_nodes = True
+        if deferred:
+            MSFS_Material_Property_Update.begin_deferred_updates()
+            try:
+                set_properties(mat, i)
+            finally:
+                MSFS_Material_Property_Update.end_deferred_updates()
+        else:
+            set_properties(mat, i)
+
+
+def get_tree_summary():
+    return [
+        (mat.name, len(mat.node_tree.nodes), len(mat.node_tree.links), mat.blend_method)
+        for mat in sorted(bpy.data.materials, key=lambda mat: mat.name)
+    ]
+
+
+def main():
+    common.register_addon()
+
+    # Both ways must build the same node trees
+    common.reset_file()
+    import_materials(deferred=False)
+    immediate_trees = get_tree_summary()
+    common.reset_file()
+    import_materials(deferred=True)
+    assert get_tree_summary() == immediate_trees
+
+    rows = []
+    for label, deferred in (("every property", False), ("deferred", True)):
+        # Each run adds new materials, start from an empty file once
+        common.reset_file()
+        duration = common.measure(lambda: import_materials(deferred), repeat=1)
+        rows.append((label, MATERIAL_COUNT, common.format_time(duration), common.format_time(duration / MATERIAL_COUNT)))
+
+    common.print_table(
+        "Setting the properties of imported materials",
+        ("node tree updates", "materials", "time", "per material"),
+        rows
+    )
+
+
+main()
@@ -0,0 +1,119 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Time to toggle properties on many MSFS materials, where each update callback creates an MSFS_Material and looks its nodes
+# up by name. Also times the node lookups themselves: MSFS_Material.getNodeByName, the previous find followed by a second
+# lookup, and a name index built once per MSFS_Material instance.
+#   blender --background --factory-startup --python scripts/benchmarks/benchmark_material_updates.py
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import common  # noqa: E402
+
+import bpy  # noqa: E402
+
+MATERIAL_COUNT = 200
+# Node lookups made by an update callback, the names are read from the tree itself
+LOOKUPS_PER_CALLBACK = 8
+
+
+def build_materials():
+    common.reset_file()
+    materials = []
+    for i in range(MATERIAL_COUNT):
+        mat = bpy.data.materials.new("Material%d" % i)
+        mat.use_nodes = True
+        mat.msfs_material_type = "msfs_standard"
+        materials.append(mat)
+    return materials
+
+
+def toggle_properties(materials):
+    for mat in materials:
+        mat.msfs_alpha_mode = "BLEND" if mat.msfs_alpha_mode != "BLEND" else "OPAQUE"
+        mat.msfs_double_sided = not mat.msfs_double_sided
+        mat.msfs_metallic_factor = 1.0 - mat.msfs_metallic_factor
+        mat.msfs_roughness_factor = 1.0 - mat.msfs_roughness_factor
+
+
+def previous_get_node_by_name(node_tree, nodename):
+    if node_tree.nodes.find(nodename) > -1:
+        return node_tree.nodes[nodename]
+    return None
+
+
+def indexed_get_node_by_name(node_tree, nodename, handles):
+    # Name index built on the first lookup of each instance, checked against the node name on every call
+    if not handles:
+        handles.update({node.name: node for node in node_tree.nodes})
+    node = handles.get(nodename)
+    if node is not None and node.name != nodename:
+        return None
+    return node
+
+
+def main():
+    common.register_addon()
+    from io_scene_gltf2_msfs.blender.msfs_material_function import MSFS_Material
+
+    materials = build_materials()
+    node_count = len(materials[0].node_tree.nodes)
+    names = [node.name for node in materials[0].node_tree.nodes]
+    # Spread the lookups over the tree, the nodes near its end are the slowest to find by name
+    names = names[::max(1, len(names) // LOOKUPS_PER_CALLBACK)][:LOOKUPS_PER_CALLBACK]
+
+    def lookup_current():
+        for mat in materials:
+            msfs = MSFS_Material(mat)
+            for name in names:
+                msfs.getNodeByName(name)
+
+    def lookup_previous():
+        for mat in materials:
+            for name in names:
+                previous_get_node_by_name(mat.node_tree, name)
+
+    def lookup_indexed():
+        for mat in materials:
+            handles = {}
+            for name in names:
+                indexed_get_node_by_name(mat.node_tree, name, handles)
+
+    callback_count = len(materials)
+    rows = []
+    for label, function in (
+        ("nodes.get", lookup_current),
+        ("previous find + lookup", lookup_previous),
+        ("index per instance", lookup_indexed),
+    ):
+        duration = common.measure(function)
+        rows.append((label, callback_count, common.format_time(duration), common.format_time(duration / callback_count)))
+
+    common.print_table(
+        "Looking up %d nodes by name in trees of %d nodes" % (len(names), node_count),
+        ("lookup", "callbacks", "time", "per callback"),
+        rows
+    )
+
+    duration = common.measure(lambda: toggle_properties(materials))
+    common.print_table(
+        "Toggling 4 properties on MSFS materials",
+        ("materials", "time", "per material"),
+        [(len(materials), common.format_time(duration), common.format_time(duration / len(materials)))]
+    )
+
+
+main()
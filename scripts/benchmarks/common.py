@@ -0,0 +1,62 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Helpers shared by the benchmarks. Each benchmark runs inside Blender:
+#   blender --background --factory-startup --python scripts/benchmarks/<benchmark>.py
+
+import sys
+import time
+from pathlib import Path
+
+ADDONS_DIR = Path(__file__).resolve().parents[2] / "addons"
+
+
+def register_addon():
+    sys.path.insert(0, str(ADDONS_DIR))
+    import io_scene_gltf2_msfs
+
+    io_scene_gltf2_msfs.register()
+    return io_scene_gltf2_msfs
+
+
+def reset_file():
+    import bpy
+
+    bpy.ops.wm.read_homefile(use_empty=True)
+
+
+def measure(function, repeat=3):
+    # Best of a few runs, the first one often pays for caches warming up
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def print_table(title, header, rows):
+    print()
+    print(title)
+    widths = [max(len(str(value)) for value in column) for column in zip(header, *rows)]
+    for row in [header] + rows:
+        print("  ".join(str(value).rjust(width) for value, width in zip(row, widths)))
+
+
+def format_time(seconds):
+    if seconds is None:
+        return "-"
+    if seconds < 1.0:
+        return "%.2f ms" % (seconds * 1000.0)
+    return "%.2f s" % seconds
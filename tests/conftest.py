@@ -0,0 +1,44 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Tests using the addon fixture need Blender's Python, e.g.:
+#   blender --background --factory-startup --python-expr "import pytest, sys; sys.exit(pytest.main(['tests']))"
+# They are skipped when bpy isn't available.
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ADDONS_DIR = Path(__file__).parent.parent / "addons"
+
+
+@pytest.fixture(scope="session")
+def addon():
+    pytest.importorskip("bpy")
+
+    sys.path.insert(0, str(ADDONS_DIR))
+    import io_scene_gltf2_msfs
+
+    io_scene_gltf2_msfs.register()
+    yield io_scene_gltf2_msfs
+    io_scene_gltf2_msfs.unregister()
+
+
+@pytest.fixture
+def empty_file(addon):
+    import bpy
+
+    bpy.ops.wm.read_homefile(use_empty=True)
+    return bpy.context
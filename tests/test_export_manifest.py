@@ -0,0 +1,150 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import pytest
+
+
+@pytest.fixture
+def manifest_class(addon):
+    from io_scene_gltf2_msfs.io.msfs_multi_export_manifest import MSFS_ExportManifest
+
+    return MSFS_ExportManifest
+
+
+def add_cube(context, name, location=(0.0, 0.0, 0.0)):
+    import bpy
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(
+        [(-1, -1, -1), (1, -1, -1), (1, 1, -1), (-1, 1, -1), (-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1)],
+        [],
+        [(0, 1, 2, 3), (4, 7, 6, 5), (0, 4, 5, 1), (1, 5, 6, 2), (2, 6, 7, 3), (3, 7, 4, 0)]
+    )
+    obj = bpy.data.objects.new(name, mesh)
+    obj.location = location
+    context.scene.collection.objects.link(obj)
+    return obj
+
+
+def get_fingerprint(manifest_class, context, objects):
+    context.view_layer.update()
+    job = {"objects": [obj.name for obj in objects]}
+    return manifest_class.get_fingerprint(context, job, {obj.name: obj for obj in context.view_layer.objects})
+
+
+def test_material_node_tree_changes_fingerprint(manifest_class, empty_file):
+    import bpy
+
+    context = empty_file
+    obj = add_cube(context, "Cube")
+    material = bpy.data.materials.new("Material")
+    material.use_nodes = True
+    obj.data.materials.append(material)
+
+    before = get_fingerprint(manifest_class, context, [obj])
+
+    bsdf = material.node_tree.nodes["Principled BSDF"]
+    bsdf.inputs["Roughness"].default_value = 0.123
+    after_value = get_fingerprint(manifest_class, context, [obj])
+    assert after_value != before
+
+    image = bpy.data.images.new("Texture", 4, 4)
+    texture = material.node_tree.nodes.new("ShaderNodeTexImage")
+    texture.image = image
+    after_node = get_fingerprint(manifest_class, context, [obj])
+    assert after_node != after_value
+
+    material.node_tree.links.new(texture.outputs["Color"], bsdf.inputs["Base Color"])
+    after_link = get_fingerprint(manifest_class, context, [obj])
+    assert after_link != after_node
+
+    texture.image = bpy.data.images.new("Other", 8, 8)
+    assert get_fingerprint(manifest_class, context, [obj]) != after_link
+
+
+def test_node_group_changes_fingerprint(manifest_class, empty_file):
+    import bpy
+
+    context = empty_file
+    obj = add_cube(context, "Cube")
+    material = bpy.data.materials.new("Material")
+    material.use_nodes = True
+    obj.data.materials.append(material)
+
+    group = bpy.data.node_groups.new("Group", "ShaderNodeTree")
+    math_node = group.nodes.new("ShaderNodeMath")
+    group_node = material.node_tree.nodes.new("ShaderNodeGroup")
+    group_node.node_tree = group
+
+    before = get_fingerprint(manifest_class, context, [obj])
+    math_node.inputs[1].default_value = 42.0
+    assert get_fingerprint(manifest_class, context, [obj]) != before
+
+
+def test_modifier_target_changes_fingerprint(manifest_class, empty_file):
+    context = empty_file
+    obj = add_cube(context, "Cube")
+    cutter = add_cube(context, "Cutter", location=(1.0, 0.0, 0.0))
+
+    modifier = obj.modifiers.new("Boolean", "BOOLEAN")
+    modifier.object = cutter
+
+    # Only the cube is exported, the cutter is only referenced by the modifier
+    before = get_fingerprint(manifest_class, context, [obj])
+
+    cutter.location = (0.5, 0.0, 0.0)
+    after_move = get_fingerprint(manifest_class, context, [obj])
+    assert after_move != before
+
+    cutter.data.vertices[0].co = (-2.0, -2.0, -2.0)
+    assert get_fingerprint(manifest_class, context, [obj]) != after_move
+
+
+def test_reference_cycle(manifest_class, empty_file):
+    context = empty_file
+    first = add_cube(context, "First")
+    second = add_cube(context, "Second")
+    first.modifiers.new("Boolean", "BOOLEAN").object = second
+    second.modifiers.new("Boolean", "BOOLEAN").object = first
+
+    assert get_fingerprint(manifest_class, context, [first]) == get_fingerprint(manifest_class, context, [first])
+
+
+@pytest.mark.parametrize("missing", ["model.bin", "texture/image.png"])
+def test_missing_output_is_stale(manifest_class, tmp_path, missing):
+    gltf_path = tmp_path / "model.gltf"
+    gltf_path.write_text(json.dumps({
+        "buffers": [{"uri": "model.bin"}],
+        "images": [{"uri": "texture/image.png"}, {"uri": "data:image/png;base64,AAAA"}]
+    }))
+    (tmp_path / "model.bin").write_bytes(b"\0")
+    (tmp_path / "texture").mkdir()
+    (tmp_path / "texture" / "image.png").write_bytes(b"\0")
+
+    manifest = manifest_class(str(tmp_path))
+    manifest.update(str(gltf_path), "fingerprint")
+    assert manifest.is_up_to_date(str(gltf_path), "fingerprint")
+
+    (tmp_path / missing).unlink()
+    assert not manifest.is_up_to_date(str(gltf_path), "fingerprint")
+
+
+def test_manifest_without_dependencies_is_stale(manifest_class, tmp_path):
+    gltf_path = tmp_path / "model.gltf"
+    gltf_path.write_text("{}")
+    (tmp_path / manifest_class.file_name).write_text(json.dumps({"files": {"model.gltf": "fingerprint"}}))
+
+    assert not manifest_class(str(tmp_path)).is_up_to_date(str(gltf_path), "fingerprint")
@@ -0,0 +1,125 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("numpy")
+
+# Loaded from its file, importing the add-on package requires bpy
+spec = importlib.util.spec_from_file_location(
+    "msfs_gizmo_scale",
+    Path(__file__).parent.parent / "addons" / "io_scene_gltf2_msfs" / "io" / "msfs_gizmo_scale.py",
+)
+msfs_gizmo_scale = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(msfs_gizmo_scale)
+
+
+GIZMOS = [
+    ("sphere", {"radius": 8.0}),
+    ("sphere", {"radius": 0.25}),
+    ("box", {"length": 4.0, "width": 2.0, "height": 0.5}),
+    ("cylinder", {"radius": 3.0, "height": 5.0}),
+    ("cylinder", {"radius": 0.5, "height": 0.1}),
+]
+
+
+def test_import_export_round_trip():
+    gizmo_types = [gizmo_type for gizmo_type, _ in GIZMOS]
+    params = [params for _, params in GIZMOS]
+
+    scales = msfs_gizmo_scale.get_import_scales(gizmo_types, params)
+    exported = msfs_gizmo_scale.get_export_params(gizmo_types, scales.tolist(), True)
+
+    for original, result in zip(params, exported):
+        assert result.keys() == original.keys()
+        for key in original:
+            assert result[key] == pytest.approx(original[key])
+
+
+def test_import_scales_keep_the_radius():
+    scales = msfs_gizmo_scale.get_import_scales(["sphere", "cylinder"], [{"radius": 8.0}, {"radius": 3.0, "height": 5.0}])
+
+    assert scales.tolist() == [[8.0, 8.0, 8.0], [3.0, 5.0, 3.0]]
+
+
+def test_export_params_ignore_sign_and_use_largest_axis():
+    params = msfs_gizmo_scale.get_export_params(["sphere", "box"], [[-1.0, 2.0, 0.5], [1.0, -2.0, 3.0]], True)
+
+    assert params[0] == {"radius": 2.0}
+    assert params[1] == {"length": 6.0, "width": 2.0, "height": 4.0}
+
+
+def test_export_params_z_up():
+    params = msfs_gizmo_scale.get_export_params(["box"], [[1.0, 2.0, 3.0]], False)
+
+    assert params[0] == {"length": 4.0, "width": 2.0, "height": 6.0}
+
+
+def test_legacy_export_params_use_product_of_scales():
+    params = msfs_gizmo_scale.get_export_params(
+        ["sphere", "cylinder"], [[2.0, 3.0, 0.5], [3.0, 5.0, 2.0]], True, legacy_radius=True
+    )
+
+    assert params[0] == {"radius": pytest.approx(3.0)}
+    assert params[1] == {"radius": pytest.approx(6.0), "height": pytest.approx(5.0)}
+
+
+def test_legacy_import_export_round_trip():
+    gizmo_types = [gizmo_type for gizmo_type, _ in GIZMOS]
+    params = [params for _, params in GIZMOS]
+
+    scales = msfs_gizmo_scale.get_import_scales(gizmo_types, params, legacy_radius=True)
+    exported = msfs_gizmo_scale.get_export_params(gizmo_types, scales.tolist(), True, legacy_radius=True)
+
+    for original, result in zip(params, exported):
+        assert result.keys() == original.keys()
+        for key in original:
+            assert result[key] == pytest.approx(original[key])
+
+
+@pytest.fixture
+def gizmo_scene(empty_file):
+    import bpy
+
+    mesh = bpy.data.objects.new("Mesh", bpy.data.meshes.new("Mesh"))
+    gizmo = bpy.data.objects.new("Sphere Collision", None)
+    gizmo.msfs_gizmo_type = "sphere"
+    gizmo.parent = mesh
+    for obj in (mesh, gizmo):
+        empty_file.scene.collection.objects.link(obj)
+    return empty_file.scene
+
+
+def test_scenes_saved_before_the_radius_version_keep_the_legacy_radius(gizmo_scene):
+    from io_scene_gltf2_msfs.io.msfs_gizmo import MSFSGizmo
+
+    props = gizmo_scene.msfs_exporter_properties
+    props.gizmo_radius_version = 0
+    MSFSGizmo.migrate_radius_mode(gizmo_scene)
+
+    assert props.gizmo_radius_mode == "PRODUCT"
+    assert props.gizmo_radius_version == MSFSGizmo.radius_version
+
+
+def test_scenes_saved_with_the_radius_version_keep_their_mode(gizmo_scene, tmp_path):
+    import bpy
+
+    file_path = str(tmp_path / "gizmo.blend")
+    bpy.ops.wm.save_as_mainfile(filepath=file_path)
+    bpy.ops.wm.open_mainfile(filepath=file_path)
+
+    assert bpy.context.scene.msfs_exporter_properties.gizmo_radius_mode == "LARGEST_SCALE"
@@ -0,0 +1,40 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+
+def test_concurrent_writes_of_the_same_file(addon, tmp_path):
+    from io_scene_gltf2_msfs.io.msfs_image_pool import MSFSImagePool
+
+    path = tmp_path / "texture" / "image.png"
+    payloads = [bytes([i]) * 65536 for i in range(8)]
+    errors = []
+
+    def write(data):
+        try:
+            for _ in range(20):
+                MSFSImagePool.write_file(str(path), data)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(data,)) for data in payloads]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert path.read_bytes() in payloads
+    assert [file.name for file in path.parent.iterdir()] == ["image.png"]
@@ -0,0 +1,41 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+
+@pytest.fixture
+def matcher(addon):
+    from io_scene_gltf2_msfs.io.msfs_multi_export_objects import MSFS_LODNameMatcher
+
+    MSFS_LODNameMatcher.get_group_from_name.cache_clear()
+    return MSFS_LODNameMatcher
+
+
+@pytest.mark.parametrize("name, group", [
+    ("Body_LOD0", "Body"),
+    ("x1_Body", "Body"),
+    ("x2_Body_lod12", "x2_Body"),
+    ("x_LOD0_part_LOD1", "x_LOD0_part"),
+    ("Wheel_LOD1_LOD1", "Wheel"),
+    ("Body", "Body"),
+])
+def test_default_schemes_remove_the_last_match(matcher, name, group):
+    assert matcher.get_group_from_name(name, matcher.default_prefixes, matcher.default_suffixes) == group
+
+
+def test_custom_schemes(matcher):
+    assert matcher.get_group_from_name("LOD10_Body", "LOD#_", "_L#") == "Body"
+    assert matcher.get_group_from_name("Body_L3", "LOD#_", "_L#") == "Body"
+    assert matcher.get_group_from_name("Body_LOD3", "", "") == "Body_LOD3"
@@ -0,0 +1,93 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import pytest
+
+SAMPLER = {"mag_filter": 9729, "min_filter": 9987, "name": None, "wrap_s": 10497, "wrap_t": 33648}
+
+
+@pytest.fixture
+def cache_class(addon):
+    from io_scene_gltf2_msfs.io.msfs_texture_cache import MSFSTextureCache
+
+    return MSFSTextureCache
+
+
+def test_store_and_load(cache_class, tmp_path):
+    cache = cache_class(str(tmp_path), 1024 * 1024)
+    cache.store("key", b"png data", "image/png", "Texture", SAMPLER, 1)
+    cache.save()
+
+    entry = cache_class(str(tmp_path), 1024 * 1024).load("key")
+    assert entry["sampler"] == SAMPLER
+    assert entry["tex_coord"] == 1
+    assert (tmp_path / entry["file"]).read_bytes() == b"png data"
+
+
+def test_export_file_copies_the_cached_file(cache_class, tmp_path):
+    cache = cache_class(str(tmp_path / "cache"), 1024 * 1024)
+    cache.store("key", b"png data", "image/png", "Texture", None, None)
+
+    target = tmp_path / "export" / "texture" / "Texture.png"
+    assert cache.export_file("key", str(target))
+    assert target.read_bytes() == b"png data"
+    assert target.stat().st_ino != (tmp_path / "cache" / "key.png").stat().st_ino
+
+
+def test_concurrent_saves_are_merged(cache_class, tmp_path):
+    first = cache_class(str(tmp_path), 1024 * 1024)
+    second = cache_class(str(tmp_path), 1024 * 1024)
+
+    first.store("first", b"1", "image/png", "First", None, None)
+    second.store("second", b"2", "image/png", "Second", None, None)
+    first.save()
+    second.save()
+
+    index = json.loads((tmp_path / cache_class.INDEX_FILE).read_text())
+    assert set(index["entries"]) == {"first", "second"}
+    assert not (tmp_path / cache_class.LOCK_FILE).exists()
+
+
+def test_missing_file_is_a_miss(cache_class, tmp_path):
+    cache = cache_class(str(tmp_path), 1024 * 1024)
+    cache.store("key", b"png data", "image/png", "Texture", None, None)
+    cache.save()
+    (tmp_path / "key.png").unlink()
+
+    cache = cache_class(str(tmp_path), 1024 * 1024)
+    assert cache.load("key") is None
+    cache.save()
+    assert "key" not in json.loads((tmp_path / cache_class.INDEX_FILE).read_text())["entries"]
+
+
+def test_entries_without_sampler_are_a_miss(cache_class, tmp_path):
+    (tmp_path / "key.png").write_bytes(b"png data")
+    (tmp_path / cache_class.INDEX_FILE).write_text(json.dumps({"entries": {
+        "key": {"file": "key.png", "mime_type": "image/png", "name": "Texture", "size": 8, "last_used": 0.0}
+    }}))
+
+    assert cache_class(str(tmp_path), 1024 * 1024).load("key") is None
+
+
+def test_eviction_keeps_the_most_recent_entries(cache_class, tmp_path):
+    cache = cache_class(str(tmp_path), 10)
+    cache.store("old", b"x" * 8, "image/png", "Old", None, None)
+    cache.entries["old"]["last_used"] = 0.0
+    cache.store("new", b"y" * 8, "image/png", "New", None, None)
+    cache.save()
+
+    assert set(cache.entries) == {"new"}
+    assert not (tmp_path / "old.png").exists()